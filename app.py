@@ -1,10 +1,29 @@
+import json
+import os
 import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List
+
 from loguru import logger
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from langchain_core.documents import Document
 
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 
+from bussinessreportanalysisagent.core.controller import BusinessAnalysisController  # noqa: E402
+from bussinessreportanalysisagent.core.ingest_jobs import IngestConflictError, IngestJob, IngestJobQueue  # noqa: E402
+from bussinessreportanalysisagent.metrics import metrics  # noqa: E402
+from bussinessreportanalysisagent.validations.request_validation import (  # noqa: E402
+    FigureTrendRequest,
+    QnaRequest,
+    SummaryRequest,
+    TrendsRequest,
+)
+from steps.utils import load_config_data  # noqa: E402
+
 
 logger.remove()
 logger.add(
@@ -14,10 +33,164 @@ logger.add(
 )
 
 
-app = FastAPI()
+def _sse_event(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_events(documents: List[Document], tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Server-sent events of an answer: one "token" event per model token, then the
+    report pages the answer is based on ("sources") and "done".
+    """
+    try:
+        async for token in tokens:
+            if token:
+                yield _sse_event("token", {"token": token})
+        sources = [
+            {
+                "company_name": document.metadata.get("Company_Name"),
+                "year": document.metadata.get("Year"),
+                "page": document.metadata.get("page"),
+                "point_id": document.metadata.get("point_id"),
+            }
+            for document in documents
+        ]
+        yield _sse_event("sources", sources)
+        yield _sse_event("done", {})
+    except Exception as e:
+        logger.error(f"Answer streaming failed: {e}")
+        yield _sse_event("error", {"detail": str(e)})
+
+
+def _sse_response(documents: List[Document], tokens: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_events(documents, tokens),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _config_data() -> dict:
+    return load_config_data(os.getenv("CONFIG_FILE_PATH", "steps/config.yml"))
+
+
+def _controller_from_config() -> BusinessAnalysisController:
+    return BusinessAnalysisController.from_config(_config_data())
+
+
+def _ingest_queue_from_config(controller: BusinessAnalysisController) -> IngestJobQueue:
+    return IngestJobQueue(
+        _config_data(),
+        client=controller.retriever.vector_store.client,
+        on_ingested=controller.self_query.add_report if controller.self_query else None,
+    )
+
+
+def create_app(
+    controller_factory: Callable[[], BusinessAnalysisController] = _controller_from_config,
+    ingest_queue_factory: Callable[[BusinessAnalysisController], IngestJobQueue] = _ingest_queue_from_config,
+) -> FastAPI:
+    """
+    Create the API. The controller, and with it the Qdrant, embedding and LLM clients,
+    is created once at startup and shared by every request.
+
+    Args:
+        controller_factory (Callable[[], BusinessAnalysisController]): Builds the
+            controller, e.g. with stub backends for load tests
+        ingest_queue_factory (Callable[[BusinessAnalysisController], IngestJobQueue]):
+            Builds the background ingestion queue from the controller
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Loading the models is blocking, keep it off the event loop
+        app.state.controller = await run_in_threadpool(controller_factory)
+        app.state.ingest_queue = await run_in_threadpool(ingest_queue_factory, app.state.controller)
+        logger.info("Business analysis controller ready")
+        yield
+        await run_in_threadpool(app.state.ingest_queue.shutdown)
+        app.state.controller.close()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Hello World"}
+
+    @app.post("/qna")
+    async def qna(body: QnaRequest, request: Request) -> StreamingResponse:
+        documents, tokens = await request.app.state.controller.qnaResponse(body.question, body.company_name, body.year)
+        return _sse_response(documents, tokens)
+
+    @app.post("/summary")
+    async def summary(body: SummaryRequest, request: Request) -> StreamingResponse:
+        documents, tokens = await request.app.state.controller.summaryResponse(
+            body.question, body.company_name, body.keyword, body.year
+        )
+        return _sse_response(documents, tokens)
+
+    @app.post("/trends")
+    async def trends(body: TrendsRequest, request: Request) -> StreamingResponse:
+        documents, tokens = await request.app.state.controller.trendAnalysis(body.keywords, body.year)
+        return _sse_response(documents, tokens)
+
+    @app.post("/trends/figures")
+    async def figure_trends(body: FigureTrendRequest, request: Request) -> dict:
+        """
+        Figures of a financial statement line item over the years, e.g. "net debt 2019-2023",
+        from the tables extracted at ingestion, without the LLM.
+        """
+        controller = request.app.state.controller
+        if controller.table_store is None:
+            raise HTTPException(status_code=404, detail="Financial table extraction is disabled")
+        return await run_in_threadpool(controller.figureTrend, body.query, body.company_name, body.year)
+
+    @app.get("/cache/answers")
+    async def answer_cache_stats(request: Request) -> dict:
+        """
+        Hit rate of the semantic answer cache and the retrieval and generation time it saved.
+        """
+        answer_cache = request.app.state.controller.answer_cache
+        return {"enabled": False} if answer_cache is None else {"enabled": True, **answer_cache.stats()}
+
+    @app.get("/metrics")
+    async def stage_metrics() -> PlainTextResponse:
+        """
+        Call counts, bytes and latency histograms of the ingestion and query stages, in
+        the Prometheus text format.
+        """
+        return PlainTextResponse(metrics.prometheus_text(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.post("/ingest", status_code=202)
+    async def ingest(file_name: str, request: Request) -> IngestJob:
+        """
+        Queue a report for ingestion, the request body is the content of the pdf file.
+        """
+        content = await request.body()
+        if not content:
+            raise HTTPException(status_code=422, detail="The request body must contain the pdf file")
+        try:
+            return await run_in_threadpool(request.app.state.ingest_queue.submit, file_name, content)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except IngestConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    @app.get("/ingest/{job_id}")
+    async def ingest_status(job_id: str, request: Request) -> IngestJob:
+        job = request.app.state.ingest_queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown ingestion job {job_id}")
+        return job
+
+    @app.delete("/ingest/{job_id}")
+    async def cancel_ingest(job_id: str, request: Request) -> IngestJob:
+        job = request.app.state.ingest_queue.cancel(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown ingestion job {job_id}")
+        return job
 
+    return app
 
-@app.get("/")
-async def root():
-    return {"message": "Hello World"}
 
+app = create_app()
@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import WORDS
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever  # noqa: E402
+from bussinessreportanalysisagent.application.rag.self_query import SelfQuery  # noqa: E402
+from bussinessreportanalysisagent.core.controller import BusinessAnalysisController  # noqa: E402
+from bussinessreportanalysisagent.db.answer_cache import SemanticAnswerCache  # noqa: E402
+from bussinessreportanalysisagent.db.embeddings import VectorEmbeddings  # noqa: E402
+from bussinessreportanalysisagent.db.ingest_versions import IngestVersions  # noqa: E402
+from bussinessreportanalysisagent.db.report_index import ReportIndex  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+COMPANIES = ["VGS", "Telecom_One", "Telecom_Two"]
+YEARS = [2021, 2022]
+# Phrasings analysts use for the same questions
+PHRASINGS = [
+    "What is {company}'s net debt in {year}?",
+    "What is {company} net debt in {year}",
+    "what is {company}'s net debt in {year}?",
+    "What was the net debt of {company} in {year}?",
+]
+
+
+async def ask(controller: BusinessAnalysisController, question: str) -> float:
+    start = time.perf_counter()
+    _, tokens = await controller.qnaResponse(question)
+    async for _ in tokens:
+        pass
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(args: argparse.Namespace, temp_dir: str) -> None:
+    rng = random.Random(0)
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark_answer_cache",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(":memory:"),
+    )
+    vector_store.doc_store = VectorEmbeddings(model_id=args.model_id) if args.model_id else StubEmbeddings()
+    vector_store.create_collection(vector_size=len(vector_store.doc_store.get_embedding("probe")))
+    report_index = ReportIndex(os.path.join(temp_dir, "report_index.json"))
+    documents = []
+    for company in COMPANIES:
+        for year in YEARS:
+            report_index.add(AnnualReportFile(filename=f"{company}_{year}.pdf"))
+            documents += [
+                Document(
+                    page_content=" ".join(rng.choices(WORDS, k=120)),
+                    metadata={"Company_Name": company, "Year": year, "page": page, "chunk_index": 0},
+                )
+                for page in range(50)
+            ]
+    vector_store.bulk_insert_documents(documents, max_concurrent_upserts=1)
+
+    versions = IngestVersions(os.path.join(temp_dir, "ingest_versions.sqlite"))
+    answer_cache = SemanticAnswerCache(versions, similarity_threshold=args.threshold)
+    controller = BusinessAnalysisController(
+        retriever=BusinessReportRetriever(vector_store),
+        llm=StubChatModel(latency=args.llm_latency, response=" ".join(rng.choices(WORDS, k=80))),
+        self_query=SelfQuery(report_index, use_llm=False),
+        answer_cache=answer_cache,
+    )
+
+    latencies = {"miss": [], "hit": []}
+    for _ in range(args.questions):
+        question = rng.choice(PHRASINGS).format(company=rng.choice(COMPANIES), year=rng.choice(YEARS))
+        hits = answer_cache.hits
+        latency = await ask(controller, question)
+        latencies["hit" if answer_cache.hits > hits else "miss"].append(latency)
+
+    stats = answer_cache.stats()
+    print(f"{args.questions} questions, threshold {args.threshold}, stub LLM latency {args.llm_latency * 1000:.0f} ms")
+    print(f"hit rate {stats['hit_rate']:.1%}, {stats['saved_seconds']:.1f} s saved")
+    for name, values in latencies.items():
+        if values:
+            print(f"{name:>5}: {len(values):4d} questions, p50 {np.percentile(values, 50):8.2f} ms")
+
+    versions.bump(["VGS"])
+    hits = answer_cache.hits
+    await ask(controller, PHRASINGS[0].format(company="VGS", year=2022))
+    print(f"after ingesting a VGS report: {'hit' if answer_cache.hits > hits else 'miss (invalidated)'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic answer cache on repeated questions")
+    parser.add_argument("--questions", type=int, default=200, help="Number of questions asked")
+    parser.add_argument("--threshold", type=float, default=0.95, help="Similarity threshold")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stub LLM answer")
+    parser.add_argument("--model-id", type=str, default=None, help="Local SentenceTransformers model, stub vectors only match exact repeats")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        asyncio.run(run(args, temp_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import WORDS
+
+configure_offline_environment()
+
+import uvicorn  # noqa: E402
+from qdrant_client import QdrantClient  # noqa: E402
+
+from app import create_app  # noqa: E402
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever  # noqa: E402
+from bussinessreportanalysisagent.application.rag.self_query import SelfQuery  # noqa: E402
+from bussinessreportanalysisagent.core.controller import BusinessAnalysisController  # noqa: E402
+from bussinessreportanalysisagent.db.report_index import ReportIndex  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile  # noqa: E402
+
+COMPANIES = ["VGS", "Telecom_One", "Telecom_Two", "Telecom_Three"]
+YEARS = [2021, 2022, 2023]
+KEYWORDS = ["Net Debt", "Balance Sheet", "Risks", "Sustainability"]
+
+
+def stub_controller(args: argparse.Namespace, index_dir: str) -> BusinessAnalysisController:
+    """
+    Controller over an in-memory Qdrant of synthetic chunks, stub embeddings and a stub LLM.
+    """
+    rng = random.Random(0)
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark_api",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(":memory:"),
+    )
+    vector_store.doc_store = StubEmbeddings(latency=args.embedding_latency)
+    vector_store.create_collection(vector_size=vector_store.doc_store.vector_size)
+    report_index = ReportIndex(os.path.join(index_dir, "report_index.json"))
+    documents = []
+    for company in COMPANIES:
+        for year in YEARS:
+            report_index.add(AnnualReportFile(filename=f"{company}_{year}.pdf"))
+            documents += [
+                Document(
+                    page_content=" ".join(rng.choices(WORDS, k=120)),
+                    metadata={
+                        "Company_Name": company,
+                        "Year": year,
+                        "keywords": rng.sample(KEYWORDS, k=2),
+                        "page": page,
+                        "chunk_index": 0,
+                    },
+                )
+                for page in range(args.pages)
+            ]
+    vector_store.bulk_insert_documents(documents, max_concurrent_upserts=1)
+    llm = StubChatModel(
+        latency=args.ttft,
+        token_latency=args.token_latency,
+        response=" ".join(rng.choices(WORDS, k=args.answer_tokens)),
+    )
+    return BusinessAnalysisController(
+        retriever=BusinessReportRetriever(vector_store),
+        llm=llm,
+        self_query=SelfQuery(report_index, use_llm=False),
+    )
+
+
+def serve(args: argparse.Namespace, port: int) -> None:
+    """
+    Run the API with stub backends, in its own process so the load generator does not
+    compete with it for the GIL.
+    """
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+    index_dir = tempfile.mkdtemp()
+    app = create_app(lambda: stub_controller(args, index_dir))
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_for_server(base_url: str, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/", timeout=1.0).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise TimeoutError(f"API at {base_url} did not start")
+
+
+async def stream_request(client: httpx.AsyncClient, path: str, body: dict) -> tuple[float, float]:
+    """
+    Send one request and read its event stream.
+
+    Returns:
+        tuple[float, float]: Seconds to the first token event, and to the end of the stream
+    """
+    start = time.perf_counter()
+    first_token = None
+    async with client.stream("POST", path, json=body) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if first_token is None and line == "event: token":
+                first_token = time.perf_counter() - start
+    return first_token if first_token is not None else float("nan"), time.perf_counter() - start
+
+
+async def run_load(base_url: str, concurrency: int, num_requests: int) -> None:
+    rng = random.Random(concurrency)
+    requests = []
+    for _ in range(num_requests):
+        company, year = rng.choice(COMPANIES), rng.choice(YEARS)
+        requests.append(
+            rng.choice(
+                [
+                    ("/qna", {"question": f"What was the net debt of {company} in {year}?"}),
+                    ("/summary", {"question": "Summarise the risks", "keyword": "Risks", "company_name": company}),
+                    ("/trends", {"keywords": ["Sustainability"], "year": year}),
+                ]
+            )
+        )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+
+        async def bounded(path: str, body: dict) -> tuple[float, float]:
+            async with semaphore:
+                return await stream_request(client, path, body)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(bounded(path, body) for path, body in requests))
+        seconds = time.perf_counter() - start
+
+    ttft = [result[0] * 1000 for result in results]
+    total = [result[1] * 1000 for result in results]
+    print(
+        f"concurrency {concurrency:<4}: {num_requests / seconds:7.1f} req/s, "
+        f"TTFT p50 {np.nanpercentile(ttft, 50):7.1f} ms p99 {np.nanpercentile(ttft, 99):7.1f} ms, "
+        f"total p50 {np.percentile(total, 50):7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the streaming /qna, /summary and /trends endpoints")
+    parser.add_argument("--url", type=str, default=None, help="Running API to test, defaults to a local app with stub backends")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64], help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic chunks per report")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Stub LLM seconds to first token")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Stub LLM seconds between tokens")
+    parser.add_argument("--answer-tokens", type=int, default=100, help="Tokens per stub answer")
+    parser.add_argument("--embedding-latency", type=float, default=0.01, help="Stub embedding seconds per call")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+    base_url, server = args.url, None
+    if base_url is None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = multiprocessing.get_context("spawn").Process(target=serve, args=(args, port), daemon=True)
+        server.start()
+        base_url = f"http://127.0.0.1:{port}"
+        print(f"stub LLM: {args.ttft * 1000:.0f} ms to first token, {args.answer_tokens} tokens every {args.token_latency * 1000:.0f} ms")
+    wait_for_server(base_url)
+
+    try:
+        for concurrency in args.concurrency:
+            asyncio.run(run_load(base_url, concurrency, args.requests))
+    finally:
+        if server:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
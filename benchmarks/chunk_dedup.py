@@ -0,0 +1,130 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from langchain_core.documents import Document
+from loguru import logger
+
+from benchmarks.stubs import StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import WORDS
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.db.chunk_dedup import ChunkDeduplicator  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+
+def synthetic_reports(num_years: int, chunks_per_report: int, repeat_ratio: float, seed: int = 0) -> tuple[list[list[Document]], int]:
+    """
+    Yearly reports of one company where `repeat_ratio` of the chunks repeat a passage of
+    the previous year with one word changed.
+
+    Returns:
+        tuple[list[list[Document]], int]: Chunks of each report and the number of repeated chunks
+    """
+    rng = random.Random(seed)
+    reports, previous, repeated = [], [], 0
+    for year_index in range(num_years):
+        texts = []
+        for _ in range(chunks_per_report):
+            if previous and rng.random() < repeat_ratio:
+                words = rng.choice(previous).split()
+                words[rng.randrange(len(words))] = rng.choice(WORDS)
+                texts.append(" ".join(words))
+                repeated += 1
+            else:
+                texts.append(" ".join(rng.choices(WORDS, k=150)))
+        year = 2019 + year_index
+        reports.append(
+            [
+                Document(
+                    page_content=text,
+                    metadata={"Company_Name": "Company0", "Year": year, "page": index // 4, "chunk_index": index % 4, "keywords": []},
+                )
+                for index, text in enumerate(texts)
+            ]
+        )
+        previous = texts
+    return reports, repeated
+
+
+def ingest(reports: list[list[Document]], embed_latency: float, index_path: str = None) -> tuple[int, int, float, float, QdrantVectorStore]:
+    """
+    Embed and store the reports one run per year, optionally through the dedup index.
+
+    Returns:
+        tuple: Chunks stored, chunks dropped, seconds embedding and storing, seconds deduplicating
+    """
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark_dedup",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(":memory:"),
+    )
+    vector_store.doc_store = StubEmbeddings(latency=embed_latency)
+    vector_store.create_collection(vector_size=384)
+    stored, dropped, insert_seconds, dedup_seconds = 0, 0, 0.0, 0.0
+    for report in reports:
+        chunks = report
+        if index_path:
+            # A new deduplicator per run, the index persists on disk in between
+            deduplicator = ChunkDeduplicator(index_path)
+            start = time.perf_counter()
+            chunks = list(deduplicator.iter_unique(report, vector_store.point_id))
+            dedup_seconds += time.perf_counter() - start
+            dropped += deduplicator.duplicates
+        start = time.perf_counter()
+        stored += vector_store.bulk_insert_documents(
+            chunks,
+            batch_size=64,
+            max_concurrent_upserts=1,
+            on_upserted=deduplicator.confirm if index_path else None,
+        )
+        insert_seconds += time.perf_counter() - start
+        if index_path:
+            start = time.perf_counter()
+            deduplicator.apply_merges(vector_store)
+            dedup_seconds += time.perf_counter() - start
+            deduplicator.close()
+    return stored, dropped, insert_seconds, dedup_seconds, vector_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate chunk dedup before embedding")
+    parser.add_argument("--years", type=int, default=4, help="Number of yearly reports")
+    parser.add_argument("--chunks", type=int, default=500, help="Chunks per report")
+    parser.add_argument("--repeat-ratio", type=float, default=0.4, help="Share of the chunks repeated from the previous year")
+    parser.add_argument("--embed-latency", type=float, default=0.5, help="Stub embedding latency per batch of 64 chunks, about MiniLM on a CPU")
+    args = parser.parse_args()
+
+    reports, repeated = synthetic_reports(args.years, args.chunks, args.repeat_ratio)
+    total = sum(len(report) for report in reports)
+
+    stored, _, baseline_seconds, _, _ = ingest(reports, args.embed_latency)
+    print(f"  no dedup: {stored} chunks embedded, {baseline_seconds:.2f}s")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        stored, dropped, insert_seconds, dedup_seconds, vector_store = ingest(
+            reports, args.embed_latency, os.path.join(temp_dir, "dedup_index.sqlite")
+        )
+    print(
+        f"     dedup: {stored} chunks embedded, {dropped} of {total} dropped ({repeated} repeated), "
+        f"{insert_seconds:.2f}s + {dedup_seconds:.2f}s dedup, "
+        f"{baseline_seconds - insert_seconds - dedup_seconds:.2f}s saved"
+    )
+    last_year = reports[-1][0].metadata["Year"]
+    year_points = vector_store.count_report_points("Company0", last_year)
+    print(f"points matching the {last_year} filter: {year_points} of {len(reports[-1])} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import time
+
+import pymupdf
+
+from bussinessreportanalysisagent.application.preprocessing.chunking import Chunking, TokenChunking
+from steps.utils import load_config_data
+
+
+def describe(name: str, chunks_per_page: list[list[str]], seconds: float, tokenizer) -> None:
+    chunks = [chunk for page_chunks in chunks_per_page for chunk in page_chunks]
+    token_counts = [len(ids) for ids in tokenizer(chunks, add_special_tokens=True)["input_ids"]]
+    print(
+        f"{name:>14}: {len(chunks_per_page) / seconds:8.1f} pages/sec, {len(chunks)} chunks, "
+        f"{sum(token_counts) / len(token_counts):.0f} mean / {max(token_counts)} max tokens per chunk"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recursive and token offset chunkers")
+    parser.add_argument("--pdf-path", type=str, default="test_folder/VGS_2022.pdf", help="Report to chunk")
+    parser.add_argument("--config-file-path", type=str, default="steps/config.yml", help="Path to the configuration file")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of passes over the report")
+    args = parser.parse_args()
+
+    config = load_config_data(args.config_file_path)["configurations"]["embedding_model_config"]
+    with pymupdf.open(args.pdf_path) as pdf:
+        pages = [page.get_text() for page in pdf] * args.repeat
+
+    recursive = Chunking(
+        model_id=config["model_id"],
+        max_seq_length=config["max_seq_length"],
+        chunk_size=config["chunk_size"],
+        chunk_overlap=config["chunk_overlap"],
+        model_kwargs=config["runtime"],
+    )
+    token_offsets = TokenChunking(
+        model_id=config["model_id"],
+        max_seq_length=config["max_seq_length"],
+        chunk_overlap=config["chunk_overlap"],
+        batch_size=config["chunking_batch_size"],
+        model_kwargs=config["runtime"],
+    )
+
+    start = time.perf_counter()
+    recursive_chunks = [recursive.chunk_text(page) for page in pages]
+    describe("recursive", recursive_chunks, time.perf_counter() - start, token_offsets.tokenizer)
+
+    start = time.perf_counter()
+    token_chunks = []
+    for batch_start in range(0, len(pages), token_offsets.batch_size):
+        token_chunks.extend(token_offsets.chunk_texts(pages[batch_start : batch_start + token_offsets.batch_size]))
+    describe("token offsets", token_chunks, time.perf_counter() - start, token_offsets.tokenizer)
+
+
+if __name__ == "__main__":
+    main()
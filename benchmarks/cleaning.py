@@ -0,0 +1,88 @@
+import argparse
+import sys
+import tempfile
+import time
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from loguru import logger
+
+from benchmarks.stubs import StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import write_synthetic_reports
+
+configure_offline_environment()
+
+from bussinessreportanalysisagent.application.preprocessing.cleaning import RepeatedLineCleaner  # noqa: E402
+from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader  # noqa: E402
+from bussinessreportanalysisagent.core.components import get_cleaner  # noqa: E402
+from steps.utils import load_config_data  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+
+def downstream(reports: dict[str, list[Document]], splitter: RecursiveCharacterTextSplitter, embeddings: StubEmbeddings) -> tuple[int, int, float]:
+    """
+    Tokens sent to the LLM tagger, then chunks produced and seconds spent chunking and
+    embedding them.
+    """
+    pages = [page.page_content for pages in reports.values() for page in pages]
+    tokens = sum(RepeatedLineCleaner.count_tokens(page) for page in pages)
+    start = time.perf_counter()
+    chunks = [chunk for page in pages for chunk in splitter.split_text(page)]
+    for batch_start in range(0, len(chunks), 64):
+        embeddings.get_embeddings(chunks[batch_start : batch_start + 64])
+    return tokens, len(chunks), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark header, footer and boilerplate stripping")
+    parser.add_argument("--pdf-dir", type=str, default=None, help="Reports to clean, e.g. test_folder, defaults to synthetic reports")
+    parser.add_argument("--reports", type=int, default=3, help="Number of synthetic reports")
+    parser.add_argument("--pages-per-report", type=int, default=60, help="Pages per synthetic report")
+    parser.add_argument("--disclaimer-lines", type=int, default=4, help="Disclaimer lines per synthetic page")
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="Stub embedding latency per batch of 64 chunks")
+    parser.add_argument("--config-file-path", type=str, default="steps/config.yml", help="Path to the configuration file")
+    args = parser.parse_args()
+
+    config_data = load_config_data(args.config_file_path)
+    embedding_config = config_data["configurations"]["embedding_model_config"]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_dir = args.pdf_dir
+        if pdf_dir is None:
+            pdf_dir = temp_dir
+            write_synthetic_reports(pdf_dir, args.reports, args.pages_per_report, disclaimer_lines=args.disclaimer_lines)
+        raw_reports = PdfLoader.extract_pages(pdf_dir)
+
+    cleaner = get_cleaner(config_data) or RepeatedLineCleaner()
+    start = time.perf_counter()
+    cleaned_reports = {pdf_name: cleaner.clean_pages(pdf_name, pages) for pdf_name, pages in raw_reports.items()}
+    cleaning_seconds = time.perf_counter() - start
+    num_pages = sum(len(pages) for pages in raw_reports.values())
+    print(f"cleaning: {num_pages / cleaning_seconds:8.1f} pages/sec")
+    stats = cleaner.stats
+    raw_tokens = sum(
+        RepeatedLineCleaner.count_tokens(page.page_content) for pages in raw_reports.values() for page in pages
+    )
+    print(
+        f"{stats['reports']} reports: {stats['pages']} pages, {stats['lines_removed']} lines, "
+        f"{stats['bytes_removed']} bytes ({stats['bytes_removed'] / max(stats['bytes_before'], 1):.1%}) and "
+        f"{stats['tokens_removed']} tokens ({stats['tokens_removed'] / max(raw_tokens, 1):.1%}) removed"
+    )
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=embedding_config["chunk_size"], chunk_overlap=embedding_config["chunk_overlap"]
+    )
+    embeddings = StubEmbeddings(latency=args.embed_latency)
+    raw_tokens, raw_chunks, raw_seconds = downstream(raw_reports, splitter, embeddings)
+    tokens, chunks, seconds = downstream(cleaned_reports, splitter, embeddings)
+    print(f"tagging : {raw_tokens} -> {tokens} LLM input tokens ({raw_tokens / max(tokens, 1):.2f}x fewer)")
+    print(
+        f"chunking and embedding: {raw_chunks} -> {chunks} chunks, {raw_seconds:.2f}s -> {seconds:.2f}s "
+        f"({raw_seconds / seconds:.2f}x speedup)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import re
+import sys
+import time
+
+import httpx
+import numpy as np
+from loguru import logger
+
+from benchmarks.stubs import StubEmbeddings, configure_offline_environment
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.http import models  # noqa: E402
+
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+# name: (hnsw, quantization, on_disk_vectors)
+CONFIGURATIONS = {
+    "baseline": ({"m": 16, "ef_construct": 100, "search_ef": 128}, None, False),
+    "lean-hnsw": ({"m": 8, "ef_construct": 64, "search_ef": 64}, None, False),
+    "dense-hnsw": ({"m": 32, "ef_construct": 200, "search_ef": 256}, None, False),
+    "int8": ({"m": 16, "ef_construct": 100, "search_ef": 128}, {"type": "scalar", "rescore": True, "oversampling": 2.0}, False),
+    "int8-on-disk": (
+        {"m": 16, "ef_construct": 100, "search_ef": 128},
+        {"type": "scalar", "always_ram": True, "rescore": True, "oversampling": 2.0},
+        True,
+    ),
+    "binary": ({"m": 16, "ef_construct": 100, "search_ef": 128}, {"type": "binary", "rescore": True, "oversampling": 3.0}, False),
+}
+
+
+def synthetic_vectors(num_vectors: int, dimensions: int, num_clusters: int = 50, seed: int = 0) -> np.ndarray:
+    """
+    Normalised vectors drawn around random centroids, closer to real chunk embeddings
+    than uniform noise.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((num_clusters, dimensions))
+    vectors = centroids[rng.integers(num_clusters, size=num_vectors)] + 0.5 * rng.standard_normal((num_vectors, dimensions))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def estimated_ram_bytes(num_vectors: int, dimensions: int, hnsw: dict, quantization: dict, on_disk_vectors: bool) -> int:
+    """
+    RAM of the vectors and the HNSW graph: float32 vectors unless on disk, the quantized
+    copy (1 byte or 1 bit per dimension) and about 2 * m links of 4 bytes per point.
+    """
+    ram = 0 if on_disk_vectors else num_vectors * dimensions * 4
+    if quantization:
+        ram += num_vectors * (dimensions if quantization["type"] == "scalar" else -(-dimensions // 8))
+    return ram + num_vectors * 2 * hnsw["m"] * 4
+
+
+def resident_bytes(url: str) -> float:
+    """
+    Resident memory of the Qdrant server from its Prometheus metrics, NaN when unavailable.
+    """
+    try:
+        metrics = httpx.get(f"{url}/metrics", timeout=10).text
+    except httpx.HTTPError:
+        return float("nan")
+    match = re.search(r"^memory_resident_bytes (\S+)$", metrics, re.MULTILINE)
+    return float(match.group(1)) if match else float("nan")
+
+
+def wait_indexed(client: QdrantClient, collection_name: str, timeout: float = 600) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(collection_name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    logger.warning(f"Collection '{collection_name}' is still being indexed")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark recall, latency and memory of HNSW, quantization and on-disk collection settings"
+    )
+    parser.add_argument("--vectors", type=int, default=50_000, help="Number of synthetic vectors")
+    parser.add_argument("--dimensions", type=int, default=384, help="Vector size")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Recall cut-off")
+    parser.add_argument("--url", type=str, default=None, help="Local Qdrant url, defaults to an in-memory client")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGURATIONS), choices=list(CONFIGURATIONS))
+    args = parser.parse_args()
+
+    if not args.url:
+        print("warning: the in-memory client searches exactly and ignores HNSW, quantization and on-disk settings")
+    vectors = synthetic_vectors(args.vectors, args.dimensions)
+    queries = synthetic_vectors(args.queries, args.dimensions, seed=1)
+    client = QdrantClient(url=args.url, timeout=120) if args.url else QdrantClient(":memory:")
+
+    for name in args.configs:
+        hnsw, quantization, on_disk_vectors = CONFIGURATIONS[name]
+        vector_store = QdrantVectorStore(
+            collection_name=f"benchmark_tuning_{name.replace('-', '_')}",
+            embedding_model_type="gemini",
+            embedding_model_id="models/stub",
+            client=client,
+            hnsw=hnsw,
+            quantization=quantization,
+            on_disk_vectors=on_disk_vectors,
+        )
+        vector_store.doc_store = StubEmbeddings()
+        vector_store.delete_collection()
+        memory_before = resident_bytes(args.url) if args.url else float("nan")
+
+        start = time.perf_counter()
+        vector_store.create_collection(vector_size=args.dimensions)
+        for batch_start in range(0, len(vectors), 1000):
+            client.upsert(
+                collection_name=vector_store.collection_name,
+                points=models.Batch(
+                    ids=list(range(batch_start, min(batch_start + 1000, len(vectors)))),
+                    vectors=vectors[batch_start : batch_start + 1000].tolist(),
+                ),
+                wait=True,
+            )
+        wait_indexed(client, vector_store.collection_name)
+        build_seconds = time.perf_counter() - start
+        memory_delta = (resident_bytes(args.url) - memory_before) if args.url else float("nan")
+
+        retriever = BusinessReportRetriever(vector_store)
+        exact = models.SearchParams(exact=True)
+        hits, latencies = 0, []
+        for query_vector in queries.tolist():
+            expected = {doc.metadata["point_id"] for doc in retriever.search(query_vector, limit=args.k, search_params=exact)}
+            start = time.perf_counter()
+            results = retriever.search(query_vector, limit=args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(expected & {doc.metadata["point_id"] for doc in results})
+
+        estimate = estimated_ram_bytes(args.vectors, args.dimensions, hnsw, quantization, on_disk_vectors)
+        print(
+            f"{name:>12}: recall@{args.k} {hits / (args.k * len(queries)):.3f}, "
+            f"p50 {np.percentile(latencies, 50):6.2f} ms, p99 {np.percentile(latencies, 99):6.2f} ms, "
+            f"est. RAM {estimate / 2**20:7.1f} MB, RSS delta {memory_delta / 2**20:7.1f} MB, "
+            f"build {build_seconds:6.1f}s"
+        )
+        vector_store.delete_collection()
+
+
+if __name__ == "__main__":
+    main()
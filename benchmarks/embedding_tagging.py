@@ -0,0 +1,177 @@
+import argparse
+import hashlib
+import random
+import re
+import sys
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel, configure_offline_environment
+from benchmarks.synthetic_corpus import WORDS
+
+configure_offline_environment()
+
+from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader  # noqa: E402
+from bussinessreportanalysisagent.db.embeddings import VectorEmbeddings  # noqa: E402
+from bussinessreportanalysisagent.services.content_keyword_generation import ContentKeyword  # noqa: E402
+from bussinessreportanalysisagent.services.embedding_keyword_tagger import EmbeddingKeywordTagger  # noqa: E402
+from steps.utils import load_config_data  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+PAGE_MARKER = re.compile(r"\[page (\d+)\]")
+
+
+class HashingEmbeddings:
+    """
+    Offline bag-of-words embeddings: the sum of a pseudo-random vector per word, so
+    texts sharing words are similar, unlike the hash-per-text `StubEmbeddings`.
+    """
+
+    def __init__(self, vector_size: int = 384) -> None:
+        self.vector_size = vector_size
+        self.word_vectors = {}
+        self.cache = None
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        if word not in self.word_vectors:
+            seed = int.from_bytes(hashlib.sha256(word.encode("utf-8")).digest()[:8], "little")
+            self.word_vectors[word] = np.random.default_rng(seed).standard_normal(self.vector_size, dtype=np.float32)
+        return self.word_vectors[word]
+
+    def get_embeddings(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.vector_size), dtype=np.float32)
+        for index, text in enumerate(texts):
+            for word in re.findall(r"[a-z]+", text.lower()):
+                vectors[index] += self._word_vector(word)
+        return vectors
+
+
+class OracleChatModel(StubChatModel):
+    """
+    Stub LLM tagger answering with the true keywords of each synthetic page, after the
+    stub latency.
+    """
+
+    truth: dict = {}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        match = PAGE_MARKER.search(messages[-1].content)
+        keywords = self.truth.get(int(match.group(1)), []) if match else []
+        content = '{"newKeyword": [%s]}' % ", ".join(f'"{keyword}"' for keyword in keywords)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+def synthetic_pages(keywords_list: List[str], num_pages: int, seed: int = 0) -> tuple[List[str], dict]:
+    """
+    Pages of business prose about 1 to 3 keywords. A fifth of the pages only mention
+    their topics in passing, the ambiguous pages an embedding tagger should escalate.
+    """
+    rng = random.Random(seed)
+    # Filler words naming no keyword, so the topic of a page comes from its mentions
+    label_words = {word for keyword in keywords_list for word in keyword.lower().split()}
+    filler_words = [word for word in WORDS if word not in label_words]
+    pages, truth = [], {}
+    for page_index in range(num_pages):
+        keywords = rng.sample(keywords_list, rng.randint(1, 3))
+        mentions = 1 if rng.random() < 0.2 else 4
+        sentences = [" ".join(rng.choices(filler_words, k=12)) for _ in range(20)]
+        for keyword in keywords:
+            for _ in range(mentions):
+                sentences.insert(rng.randrange(len(sentences)), f"{keyword} {rng.choice(filler_words)}")
+        pages.append(f"[page {page_index}] " + ". ".join(sentences))
+        truth[page_index] = keywords
+    return pages, truth
+
+
+def agreement(predicted: List[List[str]], reference: List[List[str]]) -> tuple[float, float]:
+    """
+    Mean Jaccard similarity of the tag sets and the share of pages whose first tag is
+    one of the reference tags.
+    """
+    jaccard = [
+        len(set(tags) & set(expected)) / len(set(tags) | set(expected)) if tags or expected else 1.0
+        for tags, expected in zip(predicted, reference)
+    ]
+    top1 = [bool(tags) and tags[0] in expected for tags, expected in zip(predicted, reference)]
+    return float(np.mean(jaccard)), float(np.mean(top1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agreement and throughput of the LLM, embedding and hybrid keyword taggers")
+    parser.add_argument("--pages", type=int, default=300, help="Number of synthetic pages")
+    parser.add_argument("--pdf-dir", type=str, default=None, help="Tag the pages of these reports with Groq as the reference instead")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub LLM latency per call in seconds")
+    parser.add_argument("--model-id", type=str, default=None, help="Local SentenceTransformers model, defaults to bag-of-words vectors")
+    parser.add_argument("--min-similarity", type=float, default=None, help="Override the configured min_similarity")
+    parser.add_argument("--min-margin", type=float, default=None, help="Override the configured min_margin")
+    parser.add_argument("--config-file-path", type=str, default="steps/config.yml", help="Path to the configuration file")
+    args = parser.parse_args()
+
+    config = load_config_data(args.config_file_path)["configurations"]
+    keywords_list = config["content_keywords_list"]
+    tagging_config = config["keyword_tagging_config"]
+    groq_config = config["llm_model_config"]["groq_model"]
+    if args.pdf_dir:
+        pages = [page.page_content for pages in PdfLoader.extract_pages(args.pdf_dir).values() for page in pages]
+        llm = None
+    else:
+        pages, truth = synthetic_pages(keywords_list, args.pages)
+        llm = OracleChatModel(latency=args.latency, truth=truth)
+    chain = ContentKeyword.build_chain(
+        model_name=groq_config["model_id"],
+        model_temperature=groq_config["temperature"],
+        max_retries=tagging_config["max_retries"],
+        llm=llm,
+    )
+    embeddings = VectorEmbeddings(model_id=args.model_id) if args.model_id else HashingEmbeddings()
+
+    batch_size = tagging_config["batch_size"]
+    tagger_config = tagging_config["embedding_tagger"]
+    min_similarity = tagger_config["min_similarity"] if args.min_similarity is None else args.min_similarity
+    min_margin = tagger_config["min_margin"] if args.min_margin is None else args.min_margin
+    results = {}
+    for mode in ("llm", "embedding", "hybrid"):
+        tagger = None
+        if mode != "llm":
+            tagger = EmbeddingKeywordTagger(
+                keywords_list=keywords_list,
+                embeddings=embeddings,
+                top_k=tagger_config["top_k"],
+                min_similarity=min_similarity,
+                min_margin=min_margin,
+                escalate=mode == "hybrid",
+                batch_size=batch_size,
+            )
+        start = time.perf_counter()
+        tags = []
+        for batch_start in range(0, len(pages), batch_size):
+            batch = pages[batch_start : batch_start + batch_size]
+            if tagger:
+                tags.extend(tagger.tag(batch, chain=chain, max_concurrency=tagging_config["max_concurrency"]))
+            else:
+                tags.extend(
+                    ContentKeyword.get_content_keywords_batch(
+                        keywords_list, batch, chain, max_concurrency=tagging_config["max_concurrency"]
+                    )
+                )
+        seconds = time.perf_counter() - start
+        results[mode] = tags
+        llm_calls = len(pages) if tagger is None else tagger.escalated
+        line = f"{mode:>9}: {len(pages) / seconds:9.1f} pages/sec, {llm_calls:5d} LLM calls"
+        if mode != "llm":
+            jaccard, top1 = agreement(tags, results["llm"])
+            line += f", agreement with LLM: jaccard {jaccard:.2f}, top-1 {top1:.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
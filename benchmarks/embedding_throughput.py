@@ -0,0 +1,41 @@
+import argparse
+import random
+import time
+
+from benchmarks.synthetic_corpus import WORDS
+from bussinessreportanalysisagent.db.embeddings import VectorEmbeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-text vs batched embedding with a local model")
+    parser.add_argument("--model-id", type=str, default="sentence-transformers/all-MiniLM-L6-v2", help="Local SentenceTransformers model")
+    parser.add_argument("--texts", type=int, default=2000, help="Number of synthetic chunks to embed")
+    parser.add_argument("--backend", type=str, default="torch", choices=["torch", "onnx"], help="Inference backend")
+    parser.add_argument("--onnx-file-name", type=str, default=None, help="ONNX file to load, e.g. onnx/model_qint8_avx2.onnx")
+    parser.add_argument("--num-threads", type=int, default=None, help="CPU threads used for inference")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256], help="Batch sizes to benchmark")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [" ".join(rng.choices(WORDS, k=150)) for _ in range(args.texts)]
+    embeddings = VectorEmbeddings(
+        model_id=args.model_id,
+        model_kwargs={"backend": args.backend, "onnx_file_name": args.onnx_file_name, "num_threads": args.num_threads},
+    )
+    embeddings.get_embeddings(texts[:32])  # warm up
+
+    start = time.perf_counter()
+    for text in texts:
+        embeddings.get_embedding(text)
+    seconds = time.perf_counter() - start
+    print(f"per text      : {len(texts) / seconds:8.1f} texts/sec")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        embeddings.get_embeddings(texts, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        print(f"batch of {batch_size:<5}: {len(texts) / seconds:8.1f} texts/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+from benchmarks.stubs import StubEmbeddings, configure_offline_environment
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+KEYWORDS = ["Net Debt", "Balance Sheet", "Income Statement", "Risks", "Governance", "Sustainability"]
+
+
+def synthetic_chunks(num_companies: int, years: list[int], chunks_per_report: int) -> list[Document]:
+    rng = random.Random(0)
+    return [
+        Document(
+            page_content=f"Company{company} {year} chunk {index}",
+            metadata={
+                "Company_Name": f"Company{company}",
+                "Year": year,
+                "Document_Type": "pdf",
+                "keywords": rng.sample(KEYWORDS, k=2),
+                "page": index // 4,
+                "chunk_index": index % 4,
+            },
+        )
+        for company in range(num_companies)
+        for year in years
+        for index in range(chunks_per_report)
+    ]
+
+
+def latency_ms(search, queries) -> tuple[float, float]:
+    latencies = []
+    for query_vector in queries:
+        start = time.perf_counter()
+        search(query_vector)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark filtered vs unfiltered retrieval latency")
+    parser.add_argument("--companies", type=int, default=20, help="Number of synthetic companies")
+    parser.add_argument("--chunks-per-report", type=int, default=500, help="Chunks per company and year")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries per mode")
+    parser.add_argument("--url", type=str, default=None, help="Local Qdrant url, defaults to an in-memory client (which ignores payload indexes)")
+    args = parser.parse_args()
+
+    years = [2019, 2020, 2021, 2022, 2023]
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark_filtered_search",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(url=args.url) if args.url else QdrantClient(":memory:"),
+    )
+    vector_store.doc_store = StubEmbeddings()
+    vector_store.delete_collection()
+    vector_store.create_collection(vector_size=vector_store.doc_store.vector_size)
+    vector_store.bulk_insert_documents(
+        synthetic_chunks(args.companies, years, args.chunks_per_report), max_concurrent_upserts=1
+    )
+
+    retriever = BusinessReportRetriever(vector_store)
+    rng = np.random.default_rng(0)
+    queries = [vector.tolist() for vector in rng.standard_normal((args.queries, vector_store.doc_store.vector_size))]
+    modes = {
+        "unfiltered": None,
+        "company + year": retriever.build_filter(company_name="Company3", year=2022),
+        "company + years + tag": retriever.build_filter(company_name="Company3", year=[2021, 2022], keywords=["Net Debt"]),
+    }
+    for name, query_filter in modes.items():
+        p50, p99 = latency_ms(lambda vector: retriever.search(vector, limit=10, query_filter=query_filter), queries)
+        print(f"{name:>22}: p50 {p50:6.2f} ms, p99 {p99:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
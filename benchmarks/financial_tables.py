@@ -0,0 +1,151 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pymupdf
+from loguru import logger
+
+from benchmarks.stubs import configure_offline_environment
+from benchmarks.synthetic_corpus import WORDS
+
+configure_offline_environment()
+
+from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader  # noqa: E402
+from bussinessreportanalysisagent.application.preprocessing.table_extraction import FinancialTableExtractor  # noqa: E402
+from bussinessreportanalysisagent.core.components import store_financial_tables  # noqa: E402
+from bussinessreportanalysisagent.db.financial_tables import FinancialTableStore  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+STATEMENTS = {
+    "Balance Sheet": ["Property, plant & equipment", "Intangible assets", "Trade receivables", "Cash and cash equivalents",
+                      "Total assets", "Interest-bearing liabilities", "Total equity", "Net debt"],
+    "Income Statement": ["Revenue", "Operating expenses", "EBITDA", "Depreciation and amortisation",
+                         "Operating profit", "Net financial items", "Income tax", "Net income"],
+}
+
+
+def _format_value(value: float) -> str:
+    return f"({-value:,.0f})" if value < 0 else f"{value:,.0f}"
+
+
+def _draw_table(page: pymupdf.Page, rows: list[list[str]], top: float, ruled: bool) -> None:
+    x, height = [40, 300, 360, 450, 540], 16
+    for row_index, row in enumerate(rows):
+        for column, cell in enumerate(row):
+            page.insert_text((x[column] + 3, top + row_index * height + 12), cell, fontsize=8)
+    if ruled:
+        for row_index in range(len(rows) + 1):
+            page.draw_line((x[0], top + row_index * height), (x[-1], top + row_index * height))
+        for column_x in x:
+            page.draw_line((column_x, top), (column_x, top + len(rows) * height))
+
+
+def write_financial_reports(
+    output_dir: str, num_companies: int, num_years: int, prose_pages: int, seed: int = 0
+) -> dict:
+    """
+    Write reports `Company<i>_<year>.pdf` with prose pages, a balance sheet and an income
+    statement page. Statements show the report year and the previous year, ruled for
+    even companies and borderless for odd ones, figures in thousands separated form with
+    negatives in parentheses.
+
+    Returns:
+        dict: True value of each (company, line item, fiscal year)
+    """
+    rng = random.Random(seed)
+    truth = {}
+    first_year = 2019
+    for company_index in range(num_companies):
+        company_name = f"Company{company_index}"
+        for statement_items in STATEMENTS.values():
+            for label in statement_items:
+                value = rng.uniform(-5_000, 50_000)
+                for fiscal_year in range(first_year - 1, first_year + num_years):
+                    value = round(value * rng.uniform(0.85, 1.2))
+                    truth[(company_name, FinancialTableExtractor.normalize_line_item(label), fiscal_year)] = value
+        for year in range(first_year, first_year + num_years):
+            pdf = pymupdf.open()
+            for _ in range(prose_pages):
+                page = pdf.new_page()
+                page.insert_text((40, 40), "\n".join(" ".join(rng.choices(WORDS, k=12)) for _ in range(40)), fontsize=8)
+            for statement, labels in STATEMENTS.items():
+                page = pdf.new_page()
+                page.insert_text((40, 40), f"Consolidated {statement}\n(NOK million)", fontsize=10)
+                rows = [["", "Note", str(year), str(year - 1)]]
+                for note, label in enumerate(labels, start=1):
+                    key = (company_name, FinancialTableExtractor.normalize_line_item(label))
+                    rows.append(
+                        [label, str(note), _format_value(truth[(*key, year)]), _format_value(truth[(*key, year - 1)])]
+                    )
+                _draw_table(page, rows, top=80, ruled=company_index % 2 == 0)
+            pdf.save(os.path.join(output_dir, f"{company_name}_{year}.pdf"))
+            pdf.close()
+    return truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark statement table extraction and numeric trend queries")
+    parser.add_argument("--companies", type=int, default=4, help="Number of companies")
+    parser.add_argument("--years", type=int, default=5, help="Reports per company")
+    parser.add_argument("--prose-pages", type=int, default=20, help="Pages of prose per report, not searched for tables")
+    parser.add_argument("--queries", type=int, default=200, help="Number of trend queries timed")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Latency of a retrieval and LLM trend answer, for reference")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_dir, store_dir = os.path.join(temp_dir, "reports"), os.path.join(temp_dir, "tables")
+        os.makedirs(pdf_dir)
+        truth = write_financial_reports(pdf_dir, args.companies, args.years, args.prose_pages)
+
+        # Tag the statement pages by their title, as the keyword tagger would
+        extractor = FinancialTableExtractor(keywords=list(STATEMENTS))
+        for pdf_name, pages in PdfLoader.extract_pages(pdf_dir).items():
+            company_name, year = pdf_name[:-4].rsplit("_", 1)
+            for page in pages:
+                keywords = [statement for statement in STATEMENTS if f"Consolidated {statement}" in page.page_content]
+                page.metadata.update({"Company_Name": company_name, "Year": int(year), "keywords": keywords})
+                extractor.record_page(page)
+        store = FinancialTableStore(store_dir)
+        start = time.perf_counter()
+        store_financial_tables(extractor, store)
+        extraction_seconds = time.perf_counter() - start
+        print(
+            f"extraction: {extractor.stats['pages']} of {args.companies * args.years * (args.prose_pages + 2)} pages searched, "
+            f"{extractor.stats['rows']} line items, {extraction_seconds / max(extractor.stats['pages'], 1) * 1000:.0f} ms/page"
+        )
+
+        start = time.perf_counter()
+        frame = store.load()
+        print(f"load      : {len(frame)} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+        extracted = {(row.company_name, row.line_item, row.fiscal_year): row.value for row in frame.itertuples()}
+        correct = sum(extracted.get(key) == value for key, value in truth.items())
+        print(f"accuracy  : {correct} of {len(truth)} figures extracted with the right value")
+
+        rng = random.Random(1)
+        line_items = [label for labels in STATEMENTS.values() for label in labels]
+        latencies, figures = [], 0
+        for _ in range(args.queries):
+            first_year = rng.randint(2018, 2021)
+            query = f"{rng.choice(line_items).lower()} {first_year}-{first_year + rng.randint(1, 4)}"
+            start = time.perf_counter()
+            _, trend = store.trend(query)
+            latencies.append(time.perf_counter() - start)
+            figures += len(trend)
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(
+            f"trend     : p50 {p50:.2f} ms, p99 {p99:.2f} ms, {figures / args.queries:.1f} figures per query "
+            f"({args.llm_latency * 1000 / p50:,.0f}x faster than a {args.llm_latency:.1f}s LLM answer)"
+        )
+        _, example = store.trend("net debt 2019-2023", company_names=["Company0"])
+        print(example[["company_name", "fiscal_year", "value", "unit", "report_year"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+from benchmarks.stubs import StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import WORDS
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever  # noqa: E402
+from bussinessreportanalysisagent.db.embeddings import VectorEmbeddings  # noqa: E402
+from bussinessreportanalysisagent.db.sparse_embeddings import SPARSE_VECTOR_NAME, BM25SparseEncoder  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+
+def synthetic_corpus(num_chunks: int, num_queries: int) -> tuple[list[Document], list[tuple[str, int]]]:
+    """
+    Random business prose where each query's answer is the only chunk naming a rare segment.
+    """
+    rng = random.Random(0)
+    documents = [
+        Document(
+            page_content=" ".join(rng.choices(WORDS, k=150)),
+            metadata={"Company_Name": "Company0", "Year": 2022, "page": index // 4, "chunk_index": index % 4},
+        )
+        for index in range(num_chunks)
+    ]
+    queries = []
+    for query_index, target in enumerate(rng.sample(range(num_chunks), num_queries)):
+        segment = f"segment{query_index}x"
+        documents[target].page_content += f" The {segment} net debt and EBITDA improved."
+        queries.append((f"What was the net debt of the {segment}?", target))
+    return documents, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recall and latency of dense, sparse and hybrid retrieval")
+    parser.add_argument("--chunks", type=int, default=5000, help="Number of synthetic chunks")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries")
+    parser.add_argument("--model-id", type=str, default=None, help="Local SentenceTransformers model for dense vectors, defaults to stub vectors")
+    parser.add_argument("--url", type=str, default=None, help="Local Qdrant url, defaults to an in-memory client")
+    parser.add_argument("--k", type=int, default=10, help="Recall cut-off")
+    args = parser.parse_args()
+
+    documents, queries = synthetic_corpus(args.chunks, args.queries)
+    sparse_encoder = BM25SparseEncoder()
+    start = time.perf_counter()
+    for batch_start in range(0, len(documents), 100):
+        sparse_encoder.encode_documents([doc.page_content for doc in documents[batch_start : batch_start + 100]])
+    print(f"sparse encoding: {len(documents) / (time.perf_counter() - start):8.1f} chunks/sec")
+
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark_hybrid",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(url=args.url) if args.url else QdrantClient(":memory:"),
+        sparse_encoder=sparse_encoder,
+    )
+    vector_store.doc_store = VectorEmbeddings(model_id=args.model_id) if args.model_id else StubEmbeddings()
+    vector_store.delete_collection()
+    vector_size = len(vector_store.doc_store.get_embedding("probe"))
+    vector_store.create_collection(vector_size=vector_size)
+    vector_store.bulk_insert_documents(documents, max_concurrent_upserts=1)
+    point_ids = [vector_store.point_id(doc.metadata) for doc in documents]
+
+    retriever = BusinessReportRetriever(vector_store)
+
+    def sparse_only(question: str, query_vector: list[float]) -> list[Document]:
+        points = vector_store.client.query_points(
+            collection_name=vector_store.collection_name,
+            query=sparse_encoder.encode_query(question),
+            using=SPARSE_VECTOR_NAME,
+            limit=args.k,
+            with_payload=True,
+        ).points
+        return [retriever.to_document(point) for point in points]
+
+    modes = {
+        "dense": lambda question, query_vector: retriever.search(query_vector, limit=args.k),
+        "sparse": sparse_only,
+        "hybrid": lambda question, query_vector: retriever.search(
+            query_vector, limit=args.k, sparse_query=sparse_encoder.encode_query(question)
+        ),
+    }
+    query_vectors = [vector_store.doc_store.get_embedding(question) for question, _ in queries]
+    for name, search in modes.items():
+        hits, latencies = 0, []
+        for (question, target), query_vector in zip(queries, query_vectors):
+            start = time.perf_counter()
+            results = search(question, query_vector)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += point_ids[target] in {doc.metadata["point_id"] for doc in results}
+        print(
+            f"{name:>7}: recall@{args.k} {hits / len(queries):.2f}, "
+            f"p50 {np.percentile(latencies, 50):6.2f} ms, p99 {np.percentile(latencies, 99):6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
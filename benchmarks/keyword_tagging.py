@@ -0,0 +1,55 @@
+import argparse
+import sys
+import time
+
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel
+from bussinessreportanalysisagent.services.content_keyword_generation import ContentKeyword
+from steps.utils import load_config_data
+
+
+logger.remove()
+logger.add(sys.stderr, level="INFO", format="<level>{message}</level>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page keyword tagging with a stub LLM")
+    parser.add_argument("--pages", type=int, default=300, help="Number of synthetic pages to tag")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub LLM latency per call in seconds")
+    parser.add_argument("--config-file-path", type=str, default="steps/config.yml", help="Path to the configuration file")
+    args = parser.parse_args()
+
+    config = load_config_data(args.config_file_path)["configurations"]
+    keywords_list = config["content_keywords_list"]
+    tagging_config = config["keyword_tagging_config"]
+    contents = [f"Synthetic annual report page {i} about net debt and the balance sheet." for i in range(args.pages)]
+    llm = StubChatModel(latency=args.latency)
+
+    # Serial baseline: one chain per page, one call at a time
+    start = time.perf_counter()
+    for content in contents:
+        chain = ContentKeyword.build_chain(model_name="stub", model_temperature=0, llm=llm)
+        chain.invoke({"keywords": keywords_list, "content": content})
+    serial_seconds = time.perf_counter() - start
+
+    # Batched: chain built once, bounded concurrency
+    start = time.perf_counter()
+    chain = ContentKeyword.build_chain(
+        model_name="stub", model_temperature=0, max_retries=tagging_config["max_retries"], llm=llm
+    )
+    for batch_start in range(0, len(contents), tagging_config["batch_size"]):
+        ContentKeyword.get_content_keywords_batch(
+            keywords_list=keywords_list,
+            contents=contents[batch_start : batch_start + tagging_config["batch_size"]],
+            chain=chain,
+            max_concurrency=tagging_config["max_concurrency"],
+        )
+    batched_seconds = time.perf_counter() - start
+
+    logger.info(f"serial : {args.pages / serial_seconds:8.1f} pages/sec ({serial_seconds:.2f}s)")
+    logger.info(f"batched: {args.pages / batched_seconds:8.1f} pages/sec ({batched_seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import write_synthetic_reports
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+from bussinessreportanalysisagent.metrics import StageMetrics, metrics  # noqa: E402
+from steps.utils import load_config_data  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+
+def track_cost(calls: int, enabled: bool) -> float:
+    """
+    Seconds per tracked call of an empty block.
+    """
+    registry = StageMetrics(enabled=enabled)
+    start = time.perf_counter()
+    for _ in range(calls):
+        with registry.track("stage", 1, 100) as span:
+            span.items = 1
+    return (time.perf_counter() - start) / calls
+
+
+def ingest(dir_path: str, config: dict) -> float:
+    """
+    Extract, tag (stub LLM) and insert (stub embeddings, in-memory Qdrant) the corpus.
+    """
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark_metrics",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(":memory:"),
+    )
+    vector_store.doc_store = StubEmbeddings(vector_size=config["vector_database_config"]["vector_size"])
+    pages = PdfLoader.iter_documents(
+        pdfs_file_path=dir_path,
+        keywords_list=config["content_keywords_list"],
+        model_name="stub",
+        model_temperature=0,
+        batch_size=config["keyword_tagging_config"]["batch_size"],
+        max_concurrency=config["keyword_tagging_config"]["max_concurrency"],
+        llm=StubChatModel(latency=0),
+    )
+    start = time.perf_counter()
+    vector_store.load_data_into_qdrant(
+        all_documents=pages,
+        vector_size=config["vector_database_config"]["vector_size"],
+        batch_size=config["vector_database_config"]["upsert_batch_size"],
+        max_concurrent_upserts=1,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the overhead of the stage metrics")
+    parser.add_argument("--reports", type=int, default=4, help="Number of synthetic reports")
+    parser.add_argument("--pages-per-report", type=int, default=100, help="Pages per synthetic report")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per setting, the fastest one is kept")
+    parser.add_argument("--config-file-path", type=str, default="steps/config.yml", help="Path to the configuration file")
+    args = parser.parse_args()
+
+    enabled_cost, disabled_cost = track_cost(200_000, True), track_cost(200_000, False)
+    print(f"track(): {enabled_cost * 1e6:.2f} us per call enabled, {disabled_cost * 1e6:.2f} us disabled")
+
+    config = load_config_data(args.config_file_path)["configurations"]
+    with tempfile.TemporaryDirectory() as dir_path:
+        write_synthetic_reports(dir_path, args.reports, args.pages_per_report)
+        ingest(dir_path, config)
+        seconds = {True: [], False: []}
+        calls = 0
+        for _ in range(args.repeats):
+            # Alternate the settings so drifts of the machine hit both alike
+            for enabled in (False, True):
+                metrics.enabled = enabled
+                metrics.reset()
+                seconds[enabled].append(ingest(dir_path, config))
+                calls = max(calls, sum(stats["calls"] for stats in metrics.summary().values()))
+        metrics.enabled = True
+
+    fastest_off, fastest_on = min(seconds[False]), min(seconds[True])
+    print(
+        f"ingestion: {fastest_off:.2f}s disabled, {fastest_on:.2f}s enabled "
+        f"({(fastest_on - fastest_off) / fastest_off:+.2%}, run to run noise included)"
+    )
+    print(
+        f"{calls} tracked calls per run, {calls * enabled_cost * 1000:.2f} ms of recording: "
+        f"{calls * enabled_cost / fastest_off:.4%} of the run"
+    )
+    # The last run had the metrics enabled
+    for stage, stats in metrics.summary().items():
+        print(
+            f"{stage:>16}: {stats['calls']:5d} calls, {stats['items']:6d} items, {stats['bytes']:9d} bytes, "
+            f"{stats['seconds']:.2f}s, p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import random
+import sys
+import time
+
+from langchain_core.documents import Document
+from loguru import logger
+
+from benchmarks.stubs import StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import WORDS
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+
+def synthetic_chunks(num_chunks: int) -> list[Document]:
+    rng = random.Random(0)
+    return [
+        Document(
+            page_content=" ".join(rng.choices(WORDS, k=150)),
+            metadata={"Company_Name": "Company0", "Year": 2022, "page": index // 4, "chunk_index": index % 4},
+        )
+        for index in range(num_chunks)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipelined Qdrant upserts")
+    parser.add_argument("--chunks", type=int, default=5000, help="Number of synthetic chunks to insert")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="Stub embedding latency per batch in seconds")
+    parser.add_argument("--url", type=str, default=None, help="Local Qdrant url, defaults to an in-memory client")
+    parser.add_argument("--prefer-grpc", action="store_true", help="Use gRPC with --url")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4], help="Concurrent upserts to benchmark")
+    args = parser.parse_args()
+
+    documents = synthetic_chunks(args.chunks)
+    for max_concurrent_upserts in args.concurrency:
+        if args.url:
+            client = QdrantClient(url=args.url, prefer_grpc=args.prefer_grpc)
+        else:
+            # The in-memory client is not thread safe, so it only runs a single upsert at a
+            # time; embedding still overlaps with it
+            client = QdrantClient(":memory:")
+            max_concurrent_upserts = 1
+        vector_store = QdrantVectorStore(
+            collection_name="benchmark_upsert",
+            embedding_model_type="gemini",
+            embedding_model_id="models/stub",
+            client=client,
+        )
+        vector_store.doc_store = StubEmbeddings(latency=args.embedding_latency)
+        vector_store.delete_collection()
+        vector_store.create_collection(vector_size=vector_store.doc_store.vector_size)
+
+        start = time.perf_counter()
+        inserted = vector_store.bulk_insert_documents(documents, max_concurrent_upserts=max_concurrent_upserts)
+        seconds = time.perf_counter() - start
+        stored = client.count(collection_name="benchmark_upsert", exact=True).count
+        print(
+            f"{max_concurrent_upserts} concurrent upserts: {inserted / seconds:8.1f} vectors/sec "
+            f"({inserted} inserted, {stored} stored)"
+        )
+        if not args.url:
+            break
+
+
+if __name__ == "__main__":
+    main()
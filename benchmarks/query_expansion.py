@@ -0,0 +1,92 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import WORDS
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.application.rag.query_expansion import QueryExpansion  # noqa: E402
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+
+def percentiles(latencies: list[float]) -> str:
+    return f"p50 {np.percentile(latencies, 50):7.2f} ms, p99 {np.percentile(latencies, 99):7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-query retrieval against sequential paraphrase searches")
+    parser.add_argument("--chunks", type=int, default=5000, help="Number of synthetic chunks")
+    parser.add_argument("--questions", type=int, default=30, help="Number of distinct questions")
+    parser.add_argument("--num-queries", type=int, default=3, help="Paraphrases per question")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per stub LLM call")
+    parser.add_argument("--url", type=str, default=None, help="Local Qdrant url, defaults to an in-memory client")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark_query_expansion",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(url=args.url) if args.url else QdrantClient(":memory:"),
+    )
+    vector_store.doc_store = StubEmbeddings()
+    vector_store.delete_collection()
+    vector_store.create_collection(vector_size=vector_store.doc_store.vector_size)
+    vector_store.bulk_insert_documents(
+        [
+            Document(page_content=" ".join(rng.choices(WORDS, k=100)), metadata={"page": index, "chunk_index": 0})
+            for index in range(args.chunks)
+        ],
+        max_concurrent_upserts=1,
+    )
+
+    retriever = BusinessReportRetriever(vector_store)
+    llm = StubChatModel(
+        latency=args.llm_latency,
+        response=json.dumps({"queries": [f"paraphrase {index}" for index in range(args.num_queries)]}),
+    )
+    expansion = QueryExpansion(retriever, model_name="stub", num_queries=args.num_queries, llm=llm)
+    questions = [f"What was the net debt of Company{index} in 2022?" for index in range(args.questions)]
+
+    modes = {"single query": [], "sequential expansion": [], "batched expansion": [], "cached expansion": []}
+    for question in questions:
+        start = time.perf_counter()
+        retriever.retrieve(question)
+        modes["single query"].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        paraphrases = expansion.chain.invoke({"question": question, "num_queries": args.num_queries}).queries
+        for query in [question] + paraphrases:
+            retriever.retrieve(query)
+        modes["sequential expansion"].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        expansion.retrieve(question)
+        modes["batched expansion"].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        expansion.retrieve(question)
+        modes["cached expansion"].append((time.perf_counter() - start) * 1000)
+
+    print(f"stub LLM latency: {args.llm_latency * 1000:.0f} ms")
+    for name, latencies in modes.items():
+        print(f"{name:>20}: {percentiles(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import random
+import time
+
+from langchain_core.documents import Document
+
+from benchmarks.synthetic_corpus import WORDS
+from bussinessreportanalysisagent.application.rag.reranker import CrossEncoderReranker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-encoder reranking on CPU")
+    parser.add_argument("--model-id", type=str, default="cross-encoder/ms-marco-MiniLM-L-6-v2", help="Cross-encoder model")
+    parser.add_argument("--pairs", type=int, default=512, help="Number of (query, chunk) pairs per throughput run")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64], help="Batch sizes to benchmark")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[10, 20, 50], help="Candidate budgets M to benchmark")
+    parser.add_argument("--num-threads", type=int, default=None, help="CPU threads used for inference")
+    parser.add_argument("--local-files-only", action="store_true", help="Never download the model")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    query = "What was the net debt and EBITDA growth of the company in 2022?"
+    documents = [Document(page_content=" ".join(rng.choices(WORDS, k=150))) for _ in range(args.pairs)]
+    reranker = CrossEncoderReranker(
+        model_id=args.model_id, num_threads=args.num_threads, local_files_only=args.local_files_only
+    )
+    reranker.score(query, documents[:8])  # warm up
+
+    for batch_size in args.batch_sizes:
+        reranker.clear()
+        reranker.batch_size = batch_size
+        start = time.perf_counter()
+        reranker.score(query, documents)
+        seconds = time.perf_counter() - start
+        print(f"batch of {batch_size:<4}: {len(documents) / seconds:8.1f} pairs/sec")
+
+    reranker.batch_size = 32
+    for budget in args.budgets:
+        reranker.clear()
+        start = time.perf_counter()
+        reranker.rerank(query, documents[:budget], top_k=5)
+        cold = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        reranker.rerank(query, documents[:budget], top_k=5)
+        cached = (time.perf_counter() - start) * 1000
+        print(f"rerank top {budget:<4}: {cold:8.1f} ms, {cached:6.2f} ms with cached scores")
+
+
+if __name__ == "__main__":
+    main()
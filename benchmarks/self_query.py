@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel, configure_offline_environment
+
+configure_offline_environment()
+
+from bussinessreportanalysisagent.application.rag.self_query import SelfQuery  # noqa: E402
+from bussinessreportanalysisagent.db.report_index import ReportIndex  # noqa: E402
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+TEMPLATES = [
+    "What was the net debt of {company} in {year}?",
+    "How did {company} revenue grow between {year} and {next_year}?",
+    "Summarise the risks reported by {company}",
+    "Which sustainability targets were set in {year}?",
+    "What are the main technology trends in the telecom market?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rule-first self-query against LLM-only extraction")
+    parser.add_argument("--companies", type=int, default=200, help="Number of indexed companies")
+    parser.add_argument("--questions", type=int, default=200, help="Number of questions")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per stub LLM call")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    years = [2019, 2020, 2021, 2022, 2023]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report_index = ReportIndex(os.path.join(temp_dir, "report_index.json"))
+        for company in range(args.companies):
+            for year in years:
+                report_index.add(AnnualReportFile(filename=f"Telecom_Company_{company}_{year}.pdf"))
+        report_index.save()
+        report_index = ReportIndex(report_index.index_path)
+
+    llm = StubChatModel(latency=args.llm_latency, response=json.dumps({"company_names": [], "years": []}))
+    questions = []
+    for _ in range(args.questions):
+        year = rng.choice(years[:-1])
+        questions.append(
+            rng.choice(TEMPLATES).format(
+                company=f"Telecom Company {rng.randrange(args.companies)}", year=year, next_year=year + 1
+            )
+        )
+
+    self_query = SelfQuery(report_index, llm=llm)
+    for question in questions:
+        self_query.get_filter(question)
+    print(f"rule-first, {args.companies} companies, stub LLM latency {args.llm_latency * 1000:.0f} ms")
+    total_seconds = sum(self_query.path_seconds.values())
+    for path, values in self_query.stats().items():
+        print(f"{path:>6}: {values['count']:5d} questions, mean {values['mean_ms']:8.3f} ms")
+    print(f"mean latency: {total_seconds / len(questions) * 1000:8.3f} ms per question")
+    print(f"LLM-only    : {args.llm_latency * 1000:8.3f} ms per question (one LLM call each)")
+
+
+if __name__ == "__main__":
+    main()
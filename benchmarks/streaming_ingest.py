@@ -0,0 +1,96 @@
+import argparse
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings, configure_offline_environment
+from benchmarks.synthetic_corpus import write_synthetic_reports
+
+configure_offline_environment()
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.application.preprocessing.chunking import Chunking  # noqa: E402
+from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+from steps.utils import load_config_data  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+
+def run_ingestion(mode: str, dir_path: str, config_file_path: str, results) -> None:
+    """
+    Ingest the corpus in the given mode and report the peak RSS of this process.
+    """
+    config = load_config_data(config_file_path)["configurations"]
+    loader_args = dict(
+        pdfs_file_path=dir_path,
+        keywords_list=config["content_keywords_list"],
+        model_name="stub",
+        model_temperature=0,
+        batch_size=config["keyword_tagging_config"]["batch_size"],
+        max_concurrency=config["keyword_tagging_config"]["max_concurrency"],
+        num_workers=config["pdf_loading_config"]["num_workers"],
+        pages_per_task=config["pdf_loading_config"]["pages_per_task"],
+        llm=StubChatModel(latency=0),
+    )
+    chunking = Chunking(
+        model_id=config["embedding_model_config"]["model_id"],
+        chunk_size=config["embedding_model_config"]["chunk_size"],
+        chunk_overlap=config["embedding_model_config"]["chunk_overlap"],
+        max_seq_length=config["embedding_model_config"]["max_seq_length"],
+        model_kwargs=config["embedding_model_config"]["runtime"],
+    )
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(":memory:"),
+    )
+    vector_store.doc_store = StubEmbeddings(vector_size=config["vector_database_config"]["vector_size"])
+
+    start = time.perf_counter()
+    if mode == "streaming":
+        chunks = chunking.iter_chunks(PdfLoader.iter_documents(**loader_args))
+    else:
+        chunks = [chunk for report in PdfLoader.load_and_parse(**loader_args) for chunk in chunking.iter_chunks(report)]
+    inserted = vector_store.load_data_into_qdrant(
+        all_documents=chunks,
+        vector_size=config["vector_database_config"]["vector_size"],
+        batch_size=config["vector_database_config"]["upsert_batch_size"],
+    )
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is reported in kilobytes on Linux
+    results.put((mode, inserted, seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of streaming vs materialized ingestion")
+    parser.add_argument("--reports", type=int, default=10, help="Number of synthetic reports")
+    parser.add_argument("--pages-per-report", type=int, default=100, help="Pages per synthetic report")
+    parser.add_argument("--config-file-path", type=str, default="steps/config.yml", help="Path to the configuration file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir_path:
+        write_synthetic_reports(dir_path, args.reports, args.pages_per_report)
+
+        # Each mode runs in a fresh process so its peak RSS is measured in isolation
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        for mode in ["materialized", "streaming"]:
+            process = context.Process(target=run_ingestion, args=(mode, dir_path, args.config_file_path, results))
+            process.start()
+            process.join()
+            mode, inserted, seconds, peak_rss_mb = results.get()
+            print(f"{mode:>12}: {inserted} points in {seconds:.1f}s, peak RSS {peak_rss_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import os
+import string
+import time
+from typing import AsyncIterator, List
+
+import numpy as np
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+from transformers import PreTrainedTokenizerFast
+
+from benchmarks.synthetic_corpus import WORDS
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Offline chat model that answers every prompt with a fixed response after a
+    fixed delay, used to benchmark the pipeline without calling a real provider.
+    When streamed, the first token arrives after `latency` and the next ones every
+    `token_latency` seconds.
+    """
+
+    latency: float = 0.05
+    token_latency: float = 0.0
+    response: str = '{"newKeyword": ["Net Debt", "Balance Sheet"]}'
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for index, word in enumerate(self.response.split(" ")):
+            if index:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else f" {word}"))
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+
+class StubEmbeddings:
+    """
+    Offline stand-in for VectorEmbeddings returning deterministic pseudo-random unit
+    vectors derived from the text hash, after an optional fixed delay per batch.
+    """
+
+    def __init__(self, vector_size: int = 384, model_id: str = "stub", latency: float = 0.0) -> None:
+        self.vector_size = vector_size
+        self.model_id = model_id
+        self.latency = latency
+        self.cache = None
+
+    def get_embedding(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.vector_size, dtype=np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def get_embeddings(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        # latency simulates the model compute time of one call
+        time.sleep(self.latency)
+        return np.asarray([self.get_embedding(text) for text in texts], dtype=np.float32)
+
+
+def stub_tokenizer() -> PreTrainedTokenizerFast:
+    """
+    Offline stand-in for the fast tokenizer of the embedding model: a BERT-style
+    WordPiece tokenizer whose vocabulary is the synthetic corpus words plus single
+    characters, so other words are split into one token per character.
+    """
+    vocab = {token: index for index, token in enumerate(["[PAD]", "[UNK]", "[CLS]", "[SEP]"])}
+    for token in sorted(set(WORDS)) + list(string.ascii_lowercase + string.digits + string.punctuation):
+        vocab.setdefault(token, len(vocab))
+    for character in string.ascii_lowercase + string.digits:
+        vocab.setdefault(f"##{character}", len(vocab))
+    tokenizer = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, unk_token="[UNK]", cls_token="[CLS]", sep_token="[SEP]", pad_token="[PAD]"
+    )
+
+
+def configure_offline_environment() -> None:
+    """
+    Provide placeholder values for the settings required at import time, so the
+    package can be imported without a .env file.
+    """
+    for name in [
+        "HUGGING_FACE_TOKEN",
+        "OPENAI_API_KEY",
+        "GOOGLE_API_KEY",
+        "GROQ_API_KEY",
+        "QDRANT_API_KEY",
+        "QDRANT_HOST_URL",
+        "LANGSMITH_ENDPOINT",
+        "LINKEDIN_USERNAME",
+        "LINKEDIN_PASSWORD",
+    ]:
+        os.environ.setdefault(name, "offline")
+    os.environ["LANGSMITH_TRACING"] = "false"
@@ -0,0 +1,252 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+import numpy as np
+from loguru import logger
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings, configure_offline_environment, stub_tokenizer
+from benchmarks.synthetic_corpus import WORDS, write_synthetic_reports
+
+configure_offline_environment()
+# Models are only loaded from the local cache, never downloaded
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from bussinessreportanalysisagent.application.preprocessing.chunking import Chunking, TokenChunking  # noqa: E402
+from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader  # noqa: E402
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever  # noqa: E402
+from bussinessreportanalysisagent.core.components import get_chunking, get_cleaner, get_sparse_encoder  # noqa: E402
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore  # noqa: E402
+from bussinessreportanalysisagent.metrics import metrics  # noqa: E402
+from steps.utils import load_config_data  # noqa: E402
+
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>")
+
+SCHEMA_VERSION = 1
+# Headline metric of each case and whether higher is better, compared with --compare
+HEADLINE_METRICS = {
+    ("load", "pages_per_sec"): True,
+    ("chunking", "chunks_per_sec"): True,
+    ("insertion", "vectors_per_sec"): True,
+    ("query", "p50_ms"): False,
+    ("query", "p99_ms"): False,
+    ("process", "peak_rss_mb"): False,
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_chunker(config_data: dict) -> tuple[Union[Chunking, TokenChunking], str]:
+    """
+    The configured chunker when the embedding model is in the local cache, else token
+    offset chunking with the stub tokenizer.
+
+    Returns:
+        tuple[Union[Chunking, TokenChunking], str]: The chunker and the tokenizer it uses
+    """
+    offline_config = copy.deepcopy(config_data)
+    embedding_config = offline_config["configurations"]["embedding_model_config"]
+    embedding_config["runtime"]["local_files_only"] = True
+    try:
+        return get_chunking(offline_config), embedding_config["model_id"]
+    except Exception as e:
+        logger.warning(f"{embedding_config['model_id']} is not in the local cache, chunking with the stub tokenizer: {e}")
+        chunker = TokenChunking(
+            model_id="stub",
+            max_seq_length=embedding_config["max_seq_length"],
+            chunk_overlap=embedding_config["chunk_overlap"],
+            batch_size=embedding_config["chunking_batch_size"],
+            tokenizer=stub_tokenizer(),
+        )
+        return chunker, "stub"
+
+
+def finish_case(name: str, result: dict, start: float, since: dict) -> dict:
+    """
+    Add the duration, the process peak RSS so far and the stage metrics to a case result.
+    """
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    result["stages"] = metrics.summary(since)
+    headline = ", ".join(f"{key} {value}" for key, value in result.items() if key not in ("stages",))
+    print(f"{name:>10}: {headline}")
+    return result
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """
+    Print the change of the headline metrics against a previous run.
+    """
+    for (case, key), higher_is_better in HEADLINE_METRICS.items():
+        current, previous = results["results"].get(case, {}).get(key), baseline["results"].get(case, {}).get(key)
+        if not current or not previous:
+            continue
+        change = current / previous - 1
+        better = change > 0 if higher_is_better else change < 0
+        print(f"{case + '.' + key:>26}: {previous:>10} -> {current:>10} ({change:+.1%}, {'better' if better else 'worse'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline benchmark suite of ingestion and retrieval: stub LLM and embeddings, in-memory Qdrant"
+    )
+    parser.add_argument("--reports", type=int, default=4, help="Number of synthetic reports")
+    parser.add_argument("--pages-per-report", type=int, default=50, help="Pages per synthetic report")
+    parser.add_argument("--pdf", type=str, default="test_folder/VGS_2022.pdf", help="Real report added to the corpus, empty for none")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed queries")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM latency per tagging call in seconds")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Stub embedding latency per batch in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpus and queries")
+    parser.add_argument("--output", type=str, default=None, help="Write the results to this JSON file, else print them")
+    parser.add_argument("--compare", type=str, default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument("--config-file-path", type=str, default="steps/config.yml", help="Path to the configuration file")
+    args = parser.parse_args()
+
+    config_data = load_config_data(args.config_file_path)
+    config = config_data["configurations"]
+    tagging_config = config["keyword_tagging_config"]
+    vector_database_config = config["vector_database_config"]
+    metrics.enabled = True
+    results = {
+        "schema_version": SCHEMA_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": vars(args),
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        write_synthetic_reports(corpus_dir, args.reports, args.pages_per_report, seed=args.seed)
+        if args.pdf:
+            shutil.copy(args.pdf, corpus_dir)
+
+        since, start = metrics.snapshot(), time.perf_counter()
+        pages = list(
+            PdfLoader.iter_documents(
+                pdfs_file_path=corpus_dir,
+                keywords_list=config["content_keywords_list"],
+                model_name="stub",
+                model_temperature=0,
+                batch_size=tagging_config["batch_size"],
+                max_concurrency=tagging_config["max_concurrency"],
+                max_retries=tagging_config["max_retries"],
+                num_workers=config["pdf_loading_config"]["num_workers"],
+                pages_per_task=config["pdf_loading_config"]["pages_per_task"],
+                llm=StubChatModel(latency=args.llm_latency),
+                cleaner=get_cleaner(config_data),
+            )
+        )
+        seconds = time.perf_counter() - start
+        results["results"]["load"] = finish_case(
+            "load", {"pages": len(pages), "pages_per_sec": round(len(pages) / seconds, 1)}, start, since
+        )
+
+    chunker, tokenizer = load_chunker(config_data)
+    since, start = metrics.snapshot(), time.perf_counter()
+    chunks = list(chunker.iter_chunks(pages))
+    seconds = time.perf_counter() - start
+    results["results"]["chunking"] = finish_case(
+        "chunking",
+        {"tokenizer": tokenizer, "chunks": len(chunks), "chunks_per_sec": round(len(chunks) / seconds, 1)},
+        start,
+        since,
+    )
+
+    vector_store = QdrantVectorStore(
+        collection_name="benchmark_suite",
+        embedding_model_type="gemini",
+        embedding_model_id="models/stub",
+        client=QdrantClient(":memory:"),
+        sparse_encoder=get_sparse_encoder(config_data),
+    )
+    vector_store.doc_store = StubEmbeddings(vector_size=vector_database_config["vector_size"], latency=args.embed_latency)
+    since, start = metrics.snapshot(), time.perf_counter()
+    inserted = vector_store.load_data_into_qdrant(
+        all_documents=chunks,
+        vector_size=vector_database_config["vector_size"],
+        batch_size=vector_database_config["upsert_batch_size"],
+        max_concurrent_upserts=vector_database_config["max_concurrent_upserts"],
+        max_request_bytes=vector_database_config["max_request_bytes"],
+        max_retries=vector_database_config["upsert_max_retries"],
+    )
+    seconds = time.perf_counter() - start
+    results["results"]["insertion"] = finish_case(
+        "insertion", {"vectors": inserted, "vectors_per_sec": round(inserted / seconds, 1)}, start, since
+    )
+
+    # Half of the queries are scoped to the company and year of a report, like self-query does
+    retriever = BusinessReportRetriever(vector_store)
+    reports = sorted({(page.metadata["Company_Name"], page.metadata["Year"]) for page in pages})
+    rng = random.Random(args.seed)
+    latencies = []
+    since, start = metrics.snapshot(), time.perf_counter()
+    for query_index in range(args.queries):
+        company_name, year = rng.choice(reports) if query_index % 2 else (None, None)
+        query_start = time.perf_counter()
+        retriever.retrieve(
+            query=" ".join(rng.choices(WORDS, k=8)),
+            limit=config["reranker_config"]["top_k"],
+            company_name=company_name,
+            year=year,
+            hybrid=vector_store.sparse_encoder is not None,
+        )
+        latencies.append(time.perf_counter() - query_start)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    results["results"]["query"] = finish_case(
+        "query",
+        {
+            "queries": args.queries,
+            "p50_ms": round(float(p50), 3),
+            "p99_ms": round(float(p99), 3),
+            "queries_per_sec": round(args.queries / sum(latencies), 1),
+        },
+        start,
+        since,
+    )
+    results["results"]["process"] = {"peak_rss_mb": round(peak_rss_mb(), 1)}
+    print(f"{'process':>10}: peak RSS {results['results']['process']['peak_rss_mb']} MB")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            compare(results, json.load(file))
+    if args.output:
+        output_dir = os.path.dirname(args.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
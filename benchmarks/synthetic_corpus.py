@@ -0,0 +1,59 @@
+import os
+import random
+
+import pymupdf
+
+
+WORDS = (
+    "revenue growth margin net debt ebitda dividend capital expenditure customers network "
+    "spectrum subscribers segment guidance sustainability emissions governance board risk "
+    "investment acquisition partnership cash flow balance sheet income statement market share "
+    "broadband mobile fibre enterprise wholesale operating costs strategy outlook innovation"
+).split()
+
+
+def write_synthetic_reports(
+    output_dir: str,
+    num_reports: int,
+    pages_per_report: int,
+    lines_per_page: int = 40,
+    seed: int = 0,
+    disclaimer_lines: int = 0,
+) -> list[str]:
+    """
+    Write synthetic annual reports named `Company<i>_<year>.pdf`, each page carrying a
+    running header, a page-number footer and random business prose.
+
+    Args:
+        output_dir (str): Directory the pdfs are written to.
+        num_reports (int): Number of reports to write.
+        pages_per_report (int): Number of pages per report.
+        lines_per_page (int, optional): Lines of prose per page. Defaults to 40.
+        seed (int, optional): Random seed, the same seed writes the same corpus. Defaults to 0.
+        disclaimer_lines (int, optional): Lines of a fixed disclaimer printed above the
+            footer of every page. Defaults to 0.
+
+    Returns:
+        list[str]: Paths of the written pdfs.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for report_index in range(num_reports):
+        company_name, year = f"Company{report_index}", 2019 + report_index % 5
+        pdf = pymupdf.open()
+        for page_number in range(pages_per_report):
+            page = pdf.new_page()
+            lines = [f"{company_name} Annual Report {year}"]
+            lines += [" ".join(rng.choices(WORDS, k=12)) for _ in range(lines_per_page)]
+            lines += [
+                f"This report contains forward-looking statements about {company_name}, clause {line + 1}."
+                for line in range(disclaimer_lines)
+            ]
+            lines.append(f"Page {page_number + 1}")
+            page.insert_text((40, 40), "\n".join(lines), fontsize=8)
+        path = os.path.join(output_dir, f"{company_name}_{year}.pdf")
+        pdf.save(path)
+        pdf.close()
+        paths.append(path)
+    return paths
@@ -1,7 +1,13 @@
-from langchain_text_splitters import (
-    RecursiveCharacterTextSplitter,
-    SentenceTransformersTokenTextSplitter,
-)
+from itertools import islice
+from typing import Iterable, Iterator
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_text_splitters.base import Tokenizer, split_text_on_tokens
+from transformers import PreTrainedTokenizerFast
+
+from bussinessreportanalysisagent.metrics import metrics, text_bytes
+from bussinessreportanalysisagent.models.models import LLMModel
 
 
 class Chunking:
@@ -13,6 +19,7 @@ class Chunking:
         max_seq_length: int,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        model_kwargs: dict = None,
     ):
         if cls._instance is None:
             cls._instance = super(Chunking, cls).__new__(cls)
@@ -25,6 +32,7 @@ class Chunking:
         max_seq_length: int,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        model_kwargs: dict = None,
     ):
         """
         Initialize the Chunking class with a model ID and optional chunk size and overlap.
@@ -33,6 +41,8 @@ class Chunking:
             model_id (str): The model ID to be used for the token text splitter.
             chunk_size (int, optional): The size of each chunk. Defaults to 1000.
             chunk_overlap (int, optional): The overlap between chunks. Defaults to 200.
+            model_kwargs (dict, optional): Runtime options of the model, the same as the
+                embedder's so both share one loaded model. Defaults to None.
         """
         # Only initialize once
         if not hasattr(self, "initialized") or not self.initialized:
@@ -41,10 +51,14 @@ class Chunking:
                 chunk_overlap=chunk_overlap,
                 length_function=len,
             )
-            self.token_text_splitter = SentenceTransformersTokenTextSplitter(
-                model_name=model_id,
+            # Reuse the tokenizer of the embedding model instead of loading a second copy
+            tokenizer = LLMModel.get_sentence_transformer_model(model_id, **(model_kwargs or {})).tokenizer
+            self.token_text_splitter = Tokenizer(
                 chunk_overlap=chunk_overlap,
                 tokens_per_chunk=max_seq_length,
+                decode=tokenizer.decode,
+                # drop the start and stop tokens added by the tokenizer
+                encode=lambda text: tokenizer.encode(text, truncation=False, verbose=False)[1:-1],
             )
             self.initialized = True
 
@@ -61,11 +75,136 @@ class Chunking:
         Returns:
             list[str]: A list of text chunks, where each chunk is a string.
         """
-        text_split_by_character = self.text_splitter.split_text(text)
+        with metrics.track("chunking", num_bytes=text_bytes([text])) as span:
+            text_split_by_character = self.text_splitter.split_text(text)
 
-        chunks_by_token = []
+            chunks_by_token = []
 
-        for section in text_split_by_character:
-            chunks_by_token.extend(self.token_text_splitter.split_text(section))
+            for section in text_split_by_character:
+                chunks_by_token.extend(split_text_on_tokens(text=section, tokenizer=self.token_text_splitter))
+            span.items = len(chunks_by_token)
 
         return chunks_by_token
+
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Lazily chunk a stream of pages.
+
+        Args:
+            documents (Iterable[Document]): Pages to be chunked, e.g. from
+                `PdfLoader.iter_documents`.
+
+        Yields:
+            Document: One chunk per Document, carrying the page metadata and its
+                `chunk_index` within the page.
+        """
+        for document in documents:
+            for chunk_index, chunk in enumerate(self.chunk_text(document.page_content)):
+                yield Document(
+                    page_content=chunk,
+                    metadata={**document.metadata, "chunk_index": chunk_index},
+                )
+
+
+class TokenChunking:
+    """
+    Single-pass chunker: each page is tokenized once with the fast tokenizer of the
+    embedding model, and chunks are cut from the original text at token offsets. This
+    avoids splitting every page twice and re-tokenizing each section, keeps the original
+    casing and whitespace, and guarantees every chunk fits the model's sequence length.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        max_seq_length: int,
+        chunk_overlap: int = 0,
+        batch_size: int = 32,
+        model_kwargs: dict = None,
+        tokenizer: PreTrainedTokenizerFast = None,
+    ):
+        """
+        Args:
+            model_id (str): The model ID whose tokenizer is used to count tokens.
+            max_seq_length (int): Maximum number of tokens of a chunk, special tokens included.
+            chunk_overlap (int, optional): Number of tokens shared by consecutive chunks. Defaults to 0.
+            batch_size (int, optional): Number of pages tokenized per call. Defaults to 32.
+            model_kwargs (dict, optional): Runtime options of the model, the same as the
+                embedder's so both share one loaded model. Defaults to None.
+            tokenizer (PreTrainedTokenizerFast, optional): Tokenizer to use instead of the
+                model's, e.g. a stub tokenizer for offline benchmarks. Defaults to None.
+        """
+        if tokenizer is None:
+            tokenizer = LLMModel.get_sentence_transformer_model(model_id, **(model_kwargs or {})).tokenizer
+        self.tokenizer = tokenizer
+        if not self.tokenizer.is_fast:
+            raise ValueError(f"Token chunking needs a fast tokenizer, {model_id} has none.")
+
+        # Leave room for the special tokens added when the chunk is embedded
+        self.tokens_per_chunk = max_seq_length - self.tokenizer.num_special_tokens_to_add()
+        if chunk_overlap >= self.tokens_per_chunk:
+            raise ValueError("chunk_overlap must be smaller than the number of tokens per chunk.")
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+
+    def chunk_texts(self, texts: list[str]) -> list[list[str]]:
+        """
+        Chunk several texts with a single tokenizer call.
+
+        Args:
+            texts (list[str]): The texts to be chunked, e.g. the pages of a report.
+
+        Returns:
+            list[list[str]]: The chunks of each text, in the same order as `texts`.
+        """
+        with metrics.track("chunking", num_bytes=text_bytes(texts)) as span:
+            encodings = self.tokenizer(
+                texts,
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+                verbose=False,
+            )
+            stride = self.tokens_per_chunk - self.chunk_overlap
+
+            all_chunks = []
+            for text, offsets in zip(texts, encodings["offset_mapping"]):
+                chunks = []
+                for start in range(0, len(offsets), stride):
+                    window = offsets[start : start + self.tokens_per_chunk]
+                    chunk = text[window[0][0] : window[-1][1]].strip()
+                    if chunk:
+                        chunks.append(chunk)
+                    if start + self.tokens_per_chunk >= len(offsets):
+                        break
+                all_chunks.append(chunks)
+            span.items = sum(len(chunks) for chunks in all_chunks)
+        return all_chunks
+
+    def chunk_text(self, text: str) -> list[str]:
+        """
+        Chunk the text into smaller pieces, see `TokenChunking.chunk_texts`.
+        """
+        return self.chunk_texts([text])[0]
+
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Lazily chunk a stream of pages, tokenizing `batch_size` pages at a time.
+
+        Args:
+            documents (Iterable[Document]): Pages to be chunked, e.g. from
+                `PdfLoader.iter_documents`.
+
+        Yields:
+            Document: One chunk per Document, carrying the page metadata and its
+                `chunk_index` within the page.
+        """
+        documents = iter(documents)
+        while batch := list(islice(documents, self.batch_size)):
+            for document, chunks in zip(batch, self.chunk_texts([doc.page_content for doc in batch])):
+                for chunk_index, chunk in enumerate(chunks):
+                    yield Document(
+                        page_content=chunk,
+                        metadata={**document.metadata, "chunk_index": chunk_index},
+                    )
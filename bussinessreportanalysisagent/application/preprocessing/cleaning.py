@@ -0,0 +1,117 @@
+import re
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+DIGITS_PATTERN = re.compile(r"\d+")
+SPACES_PATTERN = re.compile(r"\s+")
+# Words and punctuation marks, a tokenizer-independent estimate of model tokens
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class RepeatedLineCleaner:
+    """
+    Strip the running headers, footers, page numbers and disclaimer blocks of a report.
+    Lines are normalized (lower case, digits replaced, whitespace collapsed) and hashed,
+    and a line found on a large share of the report's pages is boilerplate. Only lines
+    near the top or bottom of a page, or long lines, are stripped, so repeated table
+    cells such as "2022" or "1,234" in the middle of a page are kept.
+
+    Lines are counted over every page of the report before any line is stripped, so
+    `clean_pages` takes a whole report and keeps no state about it afterwards, only
+    the totals of the run.
+    """
+
+    def __init__(
+        self,
+        min_page_ratio: float = 0.5,
+        min_pages: int = 3,
+        edge_lines: int = 3,
+        min_block_chars: int = 40,
+    ) -> None:
+        """
+        Args:
+            min_page_ratio (float): Share of the report's pages a line must appear on
+            min_pages (int): Minimum number of pages a line must appear on
+            edge_lines (int): Number of lines at the top and bottom of a page where
+                short repeated lines (headers, page numbers) are stripped
+            min_block_chars (int): Length from which a repeated line is stripped
+                anywhere on the page (disclaimers)
+        """
+        self.min_page_ratio = min_page_ratio
+        self.min_pages = min_pages
+        self.edge_lines = edge_lines
+        self.min_block_chars = min_block_chars
+        self.stats: Dict[str, int] = {
+            "reports": 0, "pages": 0, "lines_removed": 0, "bytes_before": 0, "bytes_removed": 0, "tokens_removed": 0
+        }
+
+    @staticmethod
+    def normalize(line: str) -> str:
+        return SPACES_PATTERN.sub(" ", DIGITS_PATTERN.sub("#", line.lower())).strip()
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        return len(TOKEN_PATTERN.findall(text))
+
+    def clean_pages(self, report_name: str, pages: List[Document]) -> List[Document]:
+        """
+        Strip the repeated lines of a report.
+
+        Args:
+            report_name (str): Name of the report, for logging
+            pages (List[Document]): Every page of the report
+
+        Returns:
+            List[Document]: The pages with the boilerplate lines removed, same metadata
+        """
+        if not pages:
+            return pages
+        page_lines = [page.page_content.split("\n") for page in pages]
+        normalized = [self.normalize(line) for lines in page_lines for line in lines]
+        line_hashes = np.fromiter((hash(line) for line in normalized), dtype=np.int64, count=len(normalized))
+        line_pages = np.repeat(np.arange(len(pages)), [len(lines) for lines in page_lines])
+        positions = np.concatenate([np.arange(len(lines)) for lines in page_lines])
+        lengths = np.fromiter((len(line) for line in normalized), dtype=np.int64, count=len(normalized))
+        from_bottom = np.repeat([len(lines) for lines in page_lines], [len(lines) for lines in page_lines]) - positions - 1
+
+        # Number of pages each line appears on, a line repeated within a page counts once
+        unique_hashes, inverse = np.unique(line_hashes, return_inverse=True)
+        page_hashes = np.unique(np.stack([line_pages, inverse]), axis=1)[1]
+        counts = np.bincount(page_hashes, minlength=len(unique_hashes))
+        min_count = max(self.min_pages, self.min_page_ratio * len(pages))
+        repeated = (counts >= min_count)[inverse] & (lengths > 0)
+        near_edge = (positions < self.edge_lines) | (from_bottom < self.edge_lines)
+        removed = repeated & (near_edge | (lengths >= self.min_block_chars))
+
+        cleaned_pages, start = [], 0
+        stats = {"reports": 1, "pages": 0, "lines_removed": 0, "bytes_before": 0, "bytes_removed": 0, "tokens_removed": 0}
+        for page, lines in zip(pages, page_lines):
+            page_removed = removed[start : start + len(lines)]
+            start += len(lines)
+            kept_text = "\n".join(line for line, drop in zip(lines, page_removed) if not drop)
+            removed_text = "\n".join(line for line, drop in zip(lines, page_removed) if drop)
+            stats["pages"] += 1
+            stats["lines_removed"] += int(page_removed.sum())
+            stats["bytes_before"] += len(page.page_content.encode("utf-8"))
+            stats["bytes_removed"] += len(page.page_content.encode("utf-8")) - len(kept_text.encode("utf-8"))
+            stats["tokens_removed"] += self.count_tokens(removed_text)
+            cleaned_pages.append(Document(page_content=kept_text, metadata=page.metadata))
+
+        self._log(f"Cleaned {report_name}", stats)
+        for key, value in stats.items():
+            self.stats[key] += value
+        return cleaned_pages
+
+    @staticmethod
+    def _log(prefix: str, stats: Dict[str, int]) -> None:
+        share = stats["bytes_removed"] / stats["bytes_before"] if stats["bytes_before"] else 0.0
+        logger.info(
+            f"{prefix}: {stats['lines_removed']} lines, {stats['bytes_removed']} bytes ({share:.1%}) "
+            f"and ~{stats['tokens_removed']} tokens removed from {stats['pages']} pages."
+        )
+
+    def log_stats(self) -> None:
+        self._log(f"Cleaned {self.stats['reports']} reports", self.stats)
@@ -1,46 +1,360 @@
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+from typing import Callable, Iterator, Optional
+
+import pymupdf
 from tqdm import tqdm
-from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
 from loguru import logger
 
+from bussinessreportanalysisagent.application.preprocessing.cleaning import RepeatedLineCleaner
+from bussinessreportanalysisagent.db.tag_cache import KeywordTagCache
+from bussinessreportanalysisagent.metrics import metrics, text_bytes
 from bussinessreportanalysisagent.services.content_keyword_generation import ContentKeyword
+from bussinessreportanalysisagent.services.embedding_keyword_tagger import EmbeddingKeywordTagger
 from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile
 
+
+def _extract_page_range(file_path: str, start_page: int, end_page: int) -> tuple[list[Document], float]:
+    """
+    Extract the text of pages [start_page, end_page) of a pdf, one Document per page,
+    with the same metadata layout as PyMuPDFLoader. Runs inside the worker processes,
+    so the extraction is timed here rather than by the parent waiting for the result.
+
+    Returns:
+        tuple[list[Document], float]: The pages and the seconds spent extracting them
+    """
+    start = time.perf_counter()
+    with pymupdf.open(file_path) as pdf:
+        file_metadata = {
+            key: value for key, value in (pdf.metadata or {}).items() if isinstance(value, (str, int))
+        }
+        pages = [
+            Document(
+                page_content=pdf[page_number].get_text(),
+                metadata={
+                    **file_metadata,
+                    "source": file_path,
+                    "file_path": file_path,
+                    "page": page_number,
+                    "total_pages": pdf.page_count,
+                },
+            )
+            for page_number in range(start_page, end_page)
+        ]
+    return pages, time.perf_counter() - start
+
+
 class PdfLoader:
 
     @staticmethod
-    def load_and_parse(pdfs_file_path: str, keywords_list: list[str], model_name: str, model_temperature: int) -> list[list[Document]]:
+    def _plan_extraction_tasks(
+        pdfs_file_path: str, pages_per_task: int, file_names: Optional[list[str]] = None
+    ) -> list[tuple[str, str, int, int]]:
+        """
+        Split every valid pdf of a directory (or only `file_names`) into
+        (pdf_name, file_path, start_page, end_page) tasks, in sorted file order. Files with
+        an invalid name or that cannot be opened are reported and skipped.
+        """
+        tasks = []
+        for pdf_name in sorted(file_names if file_names is not None else os.listdir(pdfs_file_path)):
+            file_path = os.path.join(pdfs_file_path, pdf_name)
+            try:
+                AnnualReportFile(filename=pdf_name)
+                with pymupdf.open(file_path) as pdf:
+                    page_count = pdf.page_count
+            except Exception as e:
+                logger.error(f"Skipping {pdf_name}: {e}")
+                continue
+            for start_page in range(0, page_count, pages_per_task):
+                tasks.append((pdf_name, file_path, start_page, min(start_page + pages_per_task, page_count)))
+        return tasks
+
+    @staticmethod
+    def _page_range_result(
+        pdf_name: str, extract: Callable[[], tuple[list[Document], float]]
+    ) -> tuple[str, Optional[list[Document]]]:
+        """
+        Run or wait for the extraction of a page range and record the time the worker
+        spent extracting it as the "pdf_extract" stage.
+        """
+        try:
+            pages, seconds = extract()
+        except Exception as e:
+            logger.error(f"Failed to extract {pdf_name}: {e}")
+            # The duration of a failed range is unknown, only the error is counted
+            metrics.observe("pdf_extract", 0.0, errors=1)
+            return pdf_name, None
+        metrics.observe("pdf_extract", seconds, len(pages), text_bytes(page.page_content for page in pages))
+        return pdf_name, pages
+
+    @staticmethod
+    def iter_page_ranges(
+        pdfs_file_path: str,
+        num_workers: int = 1,
+        pages_per_task: int = 50,
+        file_names: Optional[list[str]] = None,
+    ) -> Iterator[tuple[str, Optional[list[Document]]]]:
+        """
+        Lazily extract the pages of every pdf in a directory, optionally in a process pool.
+        Large files are split into page ranges so a single report can use several cores,
+        and at most two ranges per worker are in flight at any time.
+
+        Args:
+            pdfs_file_path (str): Path to the directory containing the pdf files.
+            num_workers (int, optional): Number of worker processes, 1 extracts in the
+                current process. Defaults to 1.
+            pages_per_task (int, optional): Maximum number of pages extracted by a single
+                task. Defaults to 50.
+            file_names (Optional[list[str]], optional): Only extract these files of the
+                directory. Defaults to None, every file.
+
+        Yields:
+            tuple[str, Optional[list[Document]]]: File name and pages of each range, in
+                sorted file and page order. Pages are None when the range failed to parse.
+        """
+        tasks = PdfLoader._plan_extraction_tasks(pdfs_file_path, pages_per_task, file_names)
+
+        if num_workers > 1:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                # Results are yielded in submission order, which keeps the output stable
+                pending = deque()
+                for pdf_name, file_path, start_page, end_page in tasks:
+                    future = executor.submit(_extract_page_range, file_path, start_page, end_page)
+                    pending.append((pdf_name, future.result))
+                    if len(pending) >= 2 * num_workers:
+                        yield PdfLoader._page_range_result(*pending.popleft())
+                while pending:
+                    yield PdfLoader._page_range_result(*pending.popleft())
+        else:
+            for pdf_name, file_path, start_page, end_page in tasks:
+                yield PdfLoader._page_range_result(
+                    pdf_name, partial(_extract_page_range, file_path, start_page, end_page)
+                )
+
+    @staticmethod
+    def extract_pages(
+        pdfs_file_path: str,
+        num_workers: int = 1,
+        pages_per_task: int = 50,
+    ) -> dict[str, list[Document]]:
+        """
+        Extract the pages of every pdf in a directory, see `PdfLoader.iter_page_ranges`.
+        A pdf with any range that fails to parse is reported and left out.
+
+        Returns:
+            dict[str, list[Document]]: Pages of each pdf, keyed by file name in sorted
+                order, with pages in document order.
+        """
+        extracted = {}
+        failed = set()
+        for pdf_name, pages in PdfLoader.iter_page_ranges(pdfs_file_path, num_workers, pages_per_task):
+            if pages is None:
+                failed.add(pdf_name)
+                extracted.pop(pdf_name, None)
+            elif pdf_name not in failed:
+                extracted.setdefault(pdf_name, []).extend(pages)
+
+        logger.info(f"Extracted {len(extracted)} pdfs, {len(failed)} failed.")
+        return extracted
+
+    @staticmethod
+    def _build_keyword_chain(
+        model_name: str,
+        model_temperature: int,
+        max_retries: int,
+        llm: BaseChatModel,
+        embedding_tagger: EmbeddingKeywordTagger,
+    ) -> Optional[Runnable]:
+        """
+        Build the tagging chain once for the whole run, None when the embedding tagger
+        tags every page on its own.
+        """
+        if embedding_tagger and not embedding_tagger.escalate:
+            return None
+        return ContentKeyword.build_chain(
+            model_name=model_name,
+            model_temperature=model_temperature,
+            max_retries=max_retries,
+            llm=llm,
+        )
+
+    @staticmethod
+    def _tag_pages(
+        report: AnnualReportFile,
+        pages: list[Document],
+        keywords_list: list[str],
+        keyword_chain: Optional[Runnable],
+        max_concurrency: int,
+        tag_cache: KeywordTagCache,
+        embedding_tagger: EmbeddingKeywordTagger = None,
+    ) -> list[Document]:
+        """
+        Tag a batch of pages with content keywords and the report metadata, with the
+        embedding tagger first when one is given.
+        """
+        if embedding_tagger:
+            batch_keywords = embedding_tagger.tag(
+                contents=[doc.page_content for doc in pages],
+                chain=keyword_chain,
+                max_concurrency=max_concurrency,
+                cache=tag_cache,
+            )
+        else:
+            batch_keywords = ContentKeyword.get_content_keywords_batch(
+                keywords_list=keywords_list,
+                contents=[doc.page_content for doc in pages],
+                chain=keyword_chain,
+                max_concurrency=max_concurrency,
+                cache=tag_cache,
+            )
+        tagged_docs = []
+        for doc, all_keyword in zip(pages, batch_keywords):
+            logger.debug(f"Keyword: {all_keyword}")
+            meta_data = doc.metadata
+            for new_keyword in all_keyword:
+                meta_data[new_keyword] = new_keyword
+            # All tags in one field so they can be indexed and filtered on
+            meta_data['keywords'] = list(all_keyword)
+
+            meta_data['Company_Name'], meta_data['Document_Type'], meta_data[
+                'Year'] = report.company_name, report.document_type, report.year
+            tagged_docs.append(Document(page_content=doc.page_content, metadata=meta_data))
+        return tagged_docs
+
+    @staticmethod
+    def iter_documents(
+        pdfs_file_path: str,
+        keywords_list: list[str],
+        model_name: str,
+        model_temperature: int,
+        batch_size: int = 32,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        tag_cache: KeywordTagCache = None,
+        num_workers: int = 1,
+        pages_per_task: int = 50,
+        llm: BaseChatModel = None,
+        file_names: Optional[list[str]] = None,
+        embedding_tagger: EmbeddingKeywordTagger = None,
+        cleaner: RepeatedLineCleaner = None,
+    ) -> Iterator[Document]:
+        """
+        Streaming counterpart of `PdfLoader.load_and_parse`: yields tagged pages as soon
+        as their batch is tagged, so memory only holds one report and the page ranges in
+        flight. The ranges of a report are collected until it is fully extracted, so a
+        report with a range that fails to parse is left out, like in `extract_pages`,
+        instead of being ingested in part.
+        `llm` replaces the Groq model, e.g. with a stub model for benchmarks, and
+        `file_names` restricts loading to some files of the directory. With an
+        `embedding_tagger`, the LLM only tags the pages it escalates, and is not built
+        at all when the tagger does not escalate. With a `cleaner`, the repeated
+        headers, footers and disclaimers are stripped before tagging.
+
+        Yields:
+            Document: Tagged page, in sorted file and page order.
+        """
+        keyword_chain = PdfLoader._build_keyword_chain(
+            model_name, model_temperature, max_retries, llm, embedding_tagger
+        )
+        page_ranges = PdfLoader.iter_page_ranges(pdfs_file_path, num_workers, pages_per_task, file_names)
+        for pdf_name, report_ranges in groupby(page_ranges, key=itemgetter(0)):
+            pages = []
+            for _, range_pages in report_ranges:
+                if pages is None or range_pages is None:
+                    pages = None
+                else:
+                    pages.extend(range_pages)
+            if pages is None:
+                logger.error(f"Skipping {pdf_name}, some of its pages failed to parse")
+                continue
+            report = AnnualReportFile(filename=pdf_name)
+            if cleaner:
+                pages = cleaner.clean_pages(pdf_name, pages)
+            for start in range(0, len(pages), batch_size):
+                yield from PdfLoader._tag_pages(
+                    report=report,
+                    pages=pages[start : start + batch_size],
+                    keywords_list=keywords_list,
+                    keyword_chain=keyword_chain,
+                    max_concurrency=max_concurrency,
+                    tag_cache=tag_cache,
+                    embedding_tagger=embedding_tagger,
+                )
+
+        if tag_cache:
+            tag_cache.log_stats()
+        if embedding_tagger:
+            embedding_tagger.log_stats()
+        if cleaner:
+            cleaner.log_stats()
+
+    @staticmethod
+    def load_and_parse(
+        pdfs_file_path: str,
+        keywords_list: list[str],
+        model_name: str,
+        model_temperature: int,
+        batch_size: int = 32,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        tag_cache: KeywordTagCache = None,
+        num_workers: int = 1,
+        pages_per_task: int = 50,
+        llm: BaseChatModel = None,
+        embedding_tagger: EmbeddingKeywordTagger = None,
+        cleaner: RepeatedLineCleaner = None,
+    ) -> list[list[Document]]:
 
         logger.info("Pdf parsing started....................")
         all_documents = []
         try:
-            logger.info(f"parsing: {pdfs_file_path}")
-            for pdf_name in os.listdir(pdfs_file_path):
-                # Check if the file is a PDF
-                report = AnnualReportFile(filename=pdf_name)
-                loaded_docs = PyMuPDFLoader(file_path=os.path.join(pdfs_file_path, pdf_name)).load()
-                new_doc = []
-                i = 0
-                for doc in tqdm(loaded_docs, desc=f"Processing {pdf_name}", unit="page"):
-                    all_keyword = ContentKeyword.get_content_keyword(
-                        keywords_list=keywords_list,
-                        content=doc.page_content,
-                        model_name=model_name,
-                        model_temperature=model_temperature
-                    )
-                    logger.debug("Keyword:", all_keyword)
-                    meta_data = doc.metadata
-                    if len(all_keyword):
-                        i += 1
-                        for new_keyword in all_keyword:
-                            meta_data[new_keyword] = new_keyword
-
-                    meta_data['Company_Name'], meta_data['Document_Type'], meta_data[
-                        'Year'] = report.company_name, report.document_type, report.year
-                    new_doc.append(Document(page_content=doc.page_content, meta_data=meta_data))
-                all_documents.append(new_doc)
+            with metrics.track("pdf_load") as span:
+                logger.info(f"parsing: {pdfs_file_path}")
+                loaded_reports = PdfLoader.extract_pages(
+                    pdfs_file_path=pdfs_file_path,
+                    num_workers=num_workers,
+                    pages_per_task=pages_per_task,
+                )
+                keyword_chain = PdfLoader._build_keyword_chain(
+                    model_name, model_temperature, max_retries, llm, embedding_tagger
+                )
+                for pdf_name, loaded_docs in loaded_reports.items():
+                    report = AnnualReportFile(filename=pdf_name)
+                    if cleaner:
+                        loaded_docs = cleaner.clean_pages(pdf_name, loaded_docs)
+                    new_doc = []
+                    with tqdm(total=len(loaded_docs), desc=f"Processing {pdf_name}", unit="page") as progress:
+                        for start in range(0, len(loaded_docs), batch_size):
+                            batch_docs = loaded_docs[start : start + batch_size]
+                            new_doc.extend(
+                                PdfLoader._tag_pages(
+                                    report=report,
+                                    pages=batch_docs,
+                                    keywords_list=keywords_list,
+                                    keyword_chain=keyword_chain,
+                                    max_concurrency=max_concurrency,
+                                    tag_cache=tag_cache,
+                                    embedding_tagger=embedding_tagger,
+                                )
+                            )
+                            progress.update(len(batch_docs))
+                    all_documents.append(new_doc)
 
+                if tag_cache:
+                    tag_cache.log_stats()
+                if embedding_tagger:
+                    embedding_tagger.log_stats()
+                if cleaner:
+                    cleaner.log_stats()
+                span.items = sum(len(report_docs) for report_docs in all_documents)
             return all_documents
         
         except FileNotFoundError as e:
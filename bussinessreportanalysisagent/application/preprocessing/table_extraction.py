@@ -0,0 +1,183 @@
+import re
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+import pymupdf
+from langchain_core.documents import Document
+from loguru import logger
+
+YEAR_PATTERN = re.compile(r"^(?:fy\s*)?((?:19|20)\d{2})$")
+# 1,234.5  (1,234)  -1 234  12.3%
+NUMBER_PATTERN = re.compile(r"^(?P<open>\()?(?P<sign>[-−–])?\s*(?P<digits>\d[\d,\s]*(?:\.\d+)?)\s*(?P<close>\))?%?$")
+UNIT_PATTERN = re.compile(
+    r"\b(?P<currency>[A-Z]{3})\s*(?P<scale>thousands?|millions?|billions?|mn|bn)\b", re.IGNORECASE
+)
+# Note references and parenthesised remarks, e.g. "Net debt (note 12)" or "Total assets 4"
+NOTE_PATTERN = re.compile(r"\([^)]*\)|\b\d+\b")
+NON_WORD_PATTERN = re.compile(r"[^a-z]+")
+
+COLUMNS = ["company_name", "report_year", "fiscal_year", "statement", "page", "line_item", "label", "value", "unit"]
+
+
+class FinancialTableExtractor:
+    """
+    Extract the line items of the financial statement tables of a report. Pages are
+    tracked as they stream through tagging, and only the pages tagged with one of the
+    statement keywords are opened again and searched for tables with PyMuPDF, which
+    takes around 100 ms per page.
+
+    A table is kept when one of its first rows holds year headers ("2022", "FY 2021"):
+    every numeric cell under a year column becomes a row keyed by company, report year
+    and fiscal year, with the label of its row normalized into a line item.
+    """
+
+    def __init__(self, keywords: List[str], strategies: Optional[List[str]] = None, header_rows: int = 3) -> None:
+        """
+        Args:
+            keywords (List[str]): Keywords of the statement pages, e.g. "Balance Sheet"
+            strategies (Optional[List[str]]): PyMuPDF table finder strategies, tried in
+                order until one finds a table: "lines" (ruled tables) and "text"
+                (borderless tables). Defaults to both.
+            header_rows (int): Number of first rows searched for the year headers
+        """
+        self.keywords = keywords
+        self.strategies = strategies or ["lines", "text"]
+        self.header_rows = header_rows
+        # file_path -> (company_name, year, {page: statement})
+        self.tagged_pages: Dict[str, tuple[str, int, Dict[int, str]]] = {}
+        self.stats = {"pages": 0, "tables": 0, "skipped_tables": 0, "rows": 0}
+
+    @staticmethod
+    def normalize_line_item(label: str) -> str:
+        label = NOTE_PATTERN.sub(" ", label.lower().replace("&", " and "))
+        return NON_WORD_PATTERN.sub(" ", label).strip()
+
+    @staticmethod
+    def parse_number(cell: Optional[str]) -> Optional[float]:
+        """
+        Parse a statement figure, negative in parentheses or with a minus sign. Dashes
+        and text are not numbers.
+        """
+        if not cell:
+            return None
+        match = NUMBER_PATTERN.match(cell.strip())
+        if match is None or bool(match.group("open")) != bool(match.group("close")):
+            return None
+        value = float(re.sub(r"[,\s]", "", match.group("digits")))
+        return -value if match.group("open") or match.group("sign") else value
+
+    def record_page(self, page: Document) -> None:
+        """
+        Remember a tagged page for extraction when it is tagged with a statement keyword.
+        """
+        statement = next((keyword for keyword in self.keywords if keyword in page.metadata.get("keywords", [])), None)
+        if statement:
+            _, _, report_pages = self.tagged_pages.setdefault(
+                page.metadata["file_path"], (page.metadata["Company_Name"], page.metadata["Year"], {})
+            )
+            report_pages[page.metadata["page"]] = statement
+
+    def track_pages(self, pages: Iterator[Document]) -> Iterator[Document]:
+        """
+        Pass tagged pages through unchanged, recording the statement pages of each report.
+        """
+        for page in pages:
+            self.record_page(page)
+            yield page
+
+    def _year_columns(self, rows: List[List[Optional[str]]]) -> tuple[int, Dict[int, int]]:
+        """
+        Index of the header row and the fiscal year of each of its year columns.
+        """
+        for row_index, row in enumerate(rows[: self.header_rows]):
+            years = {}
+            for column, cell in enumerate(row):
+                match = YEAR_PATTERN.match((cell or "").strip().lower())
+                if match:
+                    years[column] = int(match.group(1))
+            if years:
+                return row_index, years
+        return -1, {}
+
+    def extract_page(self, page: pymupdf.Page) -> List[dict]:
+        """
+        Line items of the tables of a page.
+
+        Returns:
+            List[dict]: One dict per figure with the label, line_item, fiscal_year and value
+        """
+        tables = []
+        for strategy in self.strategies:
+            tables = page.find_tables(strategy=strategy).tables
+            if tables:
+                break
+        unit_match = UNIT_PATTERN.search(page.get_text())
+        unit = f"{unit_match.group('currency').upper()} {unit_match.group('scale').lower()}" if unit_match else None
+
+        figures = []
+        for table in tables:
+            rows = [[(cell or "").replace("\n", " ").strip() for cell in row] for row in table.extract()]
+            header_index, year_columns = self._year_columns(rows)
+            if not year_columns:
+                self.stats["skipped_tables"] += 1
+                continue
+            self.stats["tables"] += 1
+            for row in rows[header_index + 1 :]:
+                label = next(
+                    (cell for column, cell in enumerate(row) if cell and column not in year_columns and self.parse_number(cell) is None),
+                    None,
+                )
+                line_item = self.normalize_line_item(label) if label else ""
+                if not line_item:
+                    continue
+                for column, fiscal_year in year_columns.items():
+                    value = self.parse_number(row[column]) if column < len(row) else None
+                    if value is not None:
+                        figures.append(
+                            {"label": label, "line_item": line_item, "fiscal_year": fiscal_year, "value": value, "unit": unit}
+                        )
+        return figures
+
+    def extract_report(self, file_path: str, company_name: str, year: int, pages: Dict[int, str]) -> pd.DataFrame:
+        """
+        Line items of the statement pages of a report.
+
+        Args:
+            file_path (str): Path of the pdf
+            company_name (str): Company of the report
+            year (int): Year of the report
+            pages (Dict[int, str]): Statement keyword of each page to search
+
+        Returns:
+            pd.DataFrame: One row per figure, with the `COLUMNS` columns
+        """
+        rows = []
+        with pymupdf.open(file_path) as pdf:
+            for page_number, statement in sorted(pages.items()):
+                self.stats["pages"] += 1
+                for figure in self.extract_page(pdf[page_number]):
+                    rows.append(
+                        {"company_name": company_name, "report_year": year, "statement": statement, "page": page_number, **figure}
+                    )
+        self.stats["rows"] += len(rows)
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def iter_reports(self) -> Iterator[tuple[str, int, pd.DataFrame]]:
+        """
+        Extract the tracked reports, each one once, and forget them.
+
+        Yields:
+            tuple[str, int, pd.DataFrame]: Company, year and line items of each report
+        """
+        while self.tagged_pages:
+            file_path, (company_name, year, pages) = self.tagged_pages.popitem()
+            try:
+                yield company_name, year, self.extract_report(file_path, company_name, year, pages)
+            except Exception as e:
+                logger.error(f"Failed to extract the tables of {file_path}: {e}")
+
+    def log_stats(self) -> None:
+        logger.info(
+            f"Extracted {self.stats['rows']} line items from {self.stats['tables']} tables on "
+            f"{self.stats['pages']} statement pages, {self.stats['skipped_tables']} tables without year columns skipped."
+        )
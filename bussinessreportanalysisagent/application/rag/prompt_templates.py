@@ -12,4 +12,84 @@ KEYWORD_EXTACTION_TEMPLATE = """
                     * {keywords}
                 3. **Important:** Do not assign tags outside of the provided keywords.
                 4. The chosen keywords should be the most relevant and effectively capture the essence of the text." \
-"""
\ No newline at end of file
+"""
+QUERY_EXPANSION_TEMPLATE = """
+                Instruction : {format_instructions}
+                **Task:** Query Rewriting for Document Retrieval
+
+                **Your Role:** Financial Research Assistant
+
+                **Objective:** Help retrieve the passages of company annual reports that answer a question.
+
+                **Instructions:**
+                1. Read the user question: {question}
+                2. Write {num_queries} different rephrasings of the question.
+                3. Each rephrasing must keep the company names, years and figures of the question, and may use
+                   the wording of annual reports (e.g. "revenue" as "turnover", "debt" as "borrowings").
+                4. Do not answer the question.
+"""
+
+SELF_QUERY_TEMPLATE = """
+                Instruction : {format_instructions}
+                **Task:** Metadata Extraction from a Question
+
+                **Your Role:** Financial Research Assistant
+
+                **Objective:** Find which annual reports a question is about.
+
+                **Instructions:**
+                1. Read the user question: {question}
+                2. Return the company the question is about, chosen from the following companies:
+                    * {company_names}
+                3. Return the report years the question is about, chosen from the following years:
+                    * {years}
+                4. Leave a field empty when the question does not mention it. Do not guess.
+"""
+
+QNA_TEMPLATE = """
+                **Task:** Question Answering over Annual Reports
+
+                **Your Role:** Financial Analyst
+
+                **Objective:** Answer the user question using only the report extracts below.
+
+                **Report extracts:**
+                {context}
+
+                **Instructions:**
+                1. Answer the question: {question}
+                2. Quote figures exactly as they appear in the extracts, with their year and unit.
+                3. If the extracts do not contain the answer, say that the reports do not cover it.
+"""
+
+SUMMARY_TEMPLATE = """
+                **Task:** Annual Report Summary
+
+                **Your Role:** Financial Analyst
+
+                **Objective:** Summarise what the report extracts below say about {keyword}.
+
+                **Report extracts:**
+                {context}
+
+                **Instructions:**
+                1. Focus the summary on the request: {question}
+                2. Use short bullet points with the key figures, targets and initiatives.
+                3. Only use information from the extracts.
+"""
+
+TRENDS_TEMPLATE = """
+                **Task:** Trend Analysis across Annual Reports
+
+                **Your Role:** Industry Analyst
+
+                **Objective:** Identify the trends about {keywords} across the companies of the report extracts below.
+
+                **Report extracts:**
+                {context}
+
+                **Instructions:**
+                1. Compare the companies and years the extracts come from.
+                2. List the common trends first, then the notable differences between companies.
+                3. Only use information from the extracts and name the company and year behind each point.
+"""
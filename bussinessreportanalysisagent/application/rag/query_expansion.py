@@ -0,0 +1,255 @@
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from langchain.output_parsers import PydanticOutputParser
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import PromptTemplate
+from loguru import logger
+from pydantic import BaseModel, Field
+from qdrant_client.http import models
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import Filter
+
+from bussinessreportanalysisagent.application.rag.prompt_templates import QUERY_EXPANSION_TEMPLATE
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.models.models import LLMModel
+
+
+class Paraphrases(BaseModel):
+    queries: list[str] = Field(description="Rephrasings of the user question")
+
+
+class QueryExpansion:
+    """
+    Multi-query retrieval: the question is rephrased by the LLM, every phrasing is
+    embedded in one batch and searched with a single Qdrant batch request, and the
+    result lists are fused with reciprocal rank fusion, deduplicated by point id.
+    The search of the original question runs while the LLM is still rephrasing, and
+    paraphrases are cached per normalized question so repeated questions cost no LLM call.
+    """
+
+    def __init__(
+        self,
+        retriever: BusinessReportRetriever,
+        model_name: str,
+        model_temperature: int = 0,
+        model_provider: str = "groq",
+        num_queries: int = 3,
+        cache_max_entries: int = 1000,
+        rrf_k: int = 60,
+        llm: BaseChatModel = None,
+    ) -> None:
+        """
+        Args:
+            retriever (BusinessReportRetriever): Retriever of the report chunks
+            model_name (str): Model id used to rephrase questions
+            model_temperature (int): Sampling temperature of the model
+            model_provider (str): "groq" or "gemini"
+            num_queries (int): Number of paraphrases generated per question
+            cache_max_entries (int): Maximum number of cached questions
+            rrf_k (int): Rank constant of reciprocal rank fusion
+            llm (BaseChatModel): Chat model to use instead of the configured provider,
+                e.g. a stub model for benchmarks
+        """
+        if llm is None:
+            if model_provider == "gemini":
+                llm = LLMModel.get_gemini_model(model_name=model_name, temperature=model_temperature)
+            else:
+                llm = LLMModel.get_groq_model(model_name=model_name, temperature=model_temperature)
+
+        parser = PydanticOutputParser(pydantic_object=Paraphrases)
+        prompt = PromptTemplate(
+            template=QUERY_EXPANSION_TEMPLATE,
+            input_variables=["question", "num_queries"],
+            partial_variables={"format_instructions": parser.get_format_instructions()},
+        )
+        self.chain = prompt | llm | parser
+        self.retriever = retriever
+        self.num_queries = num_queries
+        self.cache_max_entries = cache_max_entries
+        self.rrf_k = rrf_k
+        self.expansions = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """
+        Cache key of a question: lowercase, single spaces, without trailing punctuation.
+        """
+        return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?!. ")
+
+    def _cached_expansion(self, question: str) -> Optional[List[str]]:
+        key = self.normalize(question)
+        with self.lock:
+            paraphrases = self.expansions.get(key)
+            if paraphrases is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.expansions.move_to_end(key)
+            return paraphrases
+
+    def _generate(self, question: str) -> List[str]:
+        """
+        Ask the LLM for paraphrases and cache them. Failures are logged and give no
+        paraphrase, so retrieval falls back to the original question.
+        """
+        try:
+            result = self.chain.invoke({"question": question, "num_queries": self.num_queries})
+        except Exception as e:
+            logger.warning(f"Query expansion failed, searching the original question only: {e}")
+            return []
+
+        seen = {self.normalize(question)}
+        paraphrases = []
+        for paraphrase in result.queries:
+            if paraphrase.strip() and self.normalize(paraphrase) not in seen:
+                seen.add(self.normalize(paraphrase))
+                paraphrases.append(paraphrase.strip())
+        paraphrases = paraphrases[: self.num_queries]
+
+        with self.lock:
+            self.expansions[self.normalize(question)] = paraphrases
+            while len(self.expansions) > self.cache_max_entries:
+                self.expansions.popitem(last=False)
+        return paraphrases
+
+    def expand(self, question: str) -> List[str]:
+        """
+        Paraphrases of a question, from the cache when it was already expanded.
+
+        Args:
+            question (str): User question
+
+        Returns:
+            List[str]: Up to num_queries paraphrases, without the question itself
+        """
+        paraphrases = self._cached_expansion(question)
+        return paraphrases if paraphrases is not None else self._generate(question)
+
+    def _search_many(self, queries: List[str], limit: int, query_filter: Optional[Filter]) -> List[List[Document]]:
+        """
+        Embed the queries in one batch and search them with one Qdrant batch request.
+        """
+        if not queries:
+            return []
+        query_vectors = self.retriever.vector_store.doc_store.get_embeddings(queries)
+        try:
+            responses = self.retriever.vector_store.client.query_batch_points(
+                collection_name=self.retriever.vector_store.collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=vector.tolist(),
+                        filter=query_filter,
+                        params=self.retriever.vector_store.search_params(),
+                        limit=limit,
+                        with_payload=True,
+                    )
+                    for vector in query_vectors
+                ],
+            )
+        except UnexpectedResponse as e:
+            logger.error(f"Failed to search Qdrant: {e}")
+            raise
+        return [[self.retriever.to_document(point) for point in response.points] for response in responses]
+
+    def fuse(self, result_lists: List[List[Document]], limit: int) -> List[Document]:
+        """
+        Reciprocal rank fusion of several result lists, deduplicated by point id.
+
+        Args:
+            result_lists (List[List[Document]]): Results of each query, best first
+            limit (int): Maximum number of chunks to return
+
+        Returns:
+            List[Document]: Fused chunks, best first, with their score in metadata["fusion_score"]
+        """
+        fused_scores: Dict[str, float] = {}
+        documents: Dict[str, Document] = {}
+        for results in result_lists:
+            for rank, document in enumerate(results):
+                point_id = document.metadata["point_id"]
+                fused_scores[point_id] = fused_scores.get(point_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                documents.setdefault(point_id, document)
+
+        ranked = sorted(fused_scores, key=fused_scores.get, reverse=True)[:limit]
+        return [
+            Document(
+                page_content=documents[point_id].page_content,
+                metadata={**documents[point_id].metadata, "fusion_score": fused_scores[point_id]},
+            )
+            for point_id in ranked
+        ]
+
+    def retrieve(
+        self,
+        question: str,
+        limit: int = 10,
+        query_filter: Optional[Filter] = None,
+        hybrid: bool = False,
+        num_candidates: Optional[int] = None,
+        query_vector: Optional[List[float]] = None,
+    ) -> List[Document]:
+        """
+        Retrieve the chunks for a question and its paraphrases. The question itself is
+        searched like `BusinessReportRetriever.retrieve` does (hybrid when asked), the
+        paraphrases with one dense batch request, and the fused chunks are reranked by
+        the retriever's reranker when it has one.
+
+        Args:
+            question (str): User question
+            limit (int): Maximum number of chunks to return
+            query_filter (Optional[Filter]): Metadata filter, see `BusinessReportRetriever.build_filter`
+            hybrid (bool): Fuse dense and BM25 sparse results of the question
+            num_candidates (Optional[int]): Number of chunks taken from each query before
+                reranking, when the retriever has a reranker, defaults to the reranker's
+                `max_candidates`
+            query_vector (Optional[List[float]]): Embedded question, when the caller already embedded it
+
+        Returns:
+            List[Document]: Fused chunks, best first
+        """
+        vector_store = self.retriever.vector_store
+        if hybrid and vector_store.sparse_encoder is None:
+            raise ValueError("Hybrid retrieval needs a vector store with a sparse encoder.")
+        reranker = self.retriever.reranker
+        search_limit = self.retriever.search_limit(limit, num_candidates)
+
+        def search_question() -> List[Document]:
+            return self.retriever.search(
+                query_vector=query_vector or vector_store.doc_store.get_embedding(question),
+                limit=search_limit,
+                query_filter=query_filter,
+                sparse_query=vector_store.sparse_encoder.encode_query(question) if hybrid else None,
+            )
+
+        paraphrases = self._cached_expansion(question)
+        if paraphrases is not None:
+            result_lists = [search_question()]
+        else:
+            # Search the original question while the LLM rephrases it
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                expansion = executor.submit(self._generate, question)
+                result_lists = [search_question()]
+                paraphrases = expansion.result()
+        result_lists += self._search_many(paraphrases, search_limit, query_filter)
+
+        documents = self.fuse(result_lists, search_limit)
+        if reranker:
+            documents = reranker.rerank(question, documents, top_k=limit)
+        logger.info(f"Retrieved {len(documents)} chunks for {1 + len(paraphrases)} queries.")
+        return documents
+
+    def log_stats(self) -> None:
+        """
+        Log the hit/miss counters of the expansion cache.
+        """
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        logger.info(f"Query expansion cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1%} hit rate).")
@@ -0,0 +1,158 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.documents import Document
+from loguru import logger
+
+from bussinessreportanalysisagent.metrics import metrics
+from bussinessreportanalysisagent.models.models import LLMModel
+
+
+class CrossEncoderReranker:
+    """
+    Rerank retrieved chunks on CPU with a small cross-encoder, so only the few most
+    relevant chunks are sent to the LLM. (query, chunk) pairs are scored in batches and
+    the scores are kept in an in-memory LRU cache keyed by the hashes of the query and
+    the chunk text, shared by the concurrent requests. Keying on the text rather than
+    the point id keeps scores valid when a re-ingested report overwrites its points.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        top_k: int = 5,
+        batch_size: int = 32,
+        max_candidates: Optional[int] = None,
+        max_length: int = 512,
+        cache_max_entries: int = 10_000,
+        num_threads: Optional[int] = None,
+        local_files_only: bool = False,
+    ) -> None:
+        """
+        Args:
+            model_id (str): Cross-encoder model id or local path, e.g.
+                "cross-encoder/ms-marco-MiniLM-L-6-v2"
+            top_k (int): Number of chunks kept after reranking
+            batch_size (int): Number of pairs scored per model call
+            max_candidates (Optional[int]): Latency budget, only the first M retrieved
+                candidates are reranked (None reranks all of them)
+            max_length (int): Maximum number of tokens of a pair
+            cache_max_entries (int): Maximum number of cached scores
+            num_threads (Optional[int]): CPU threads used for inference
+            local_files_only (bool): Only load the model from the local cache
+        """
+        self.model = LLMModel.get_cross_encoder_model(
+            model_id, max_length=max_length, num_threads=num_threads, local_files_only=local_files_only
+        )
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.max_candidates = max_candidates
+        self.cache_max_entries = cache_max_entries
+        self.scores = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        """
+        Cache key part of a query or chunk text.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def score(self, query: str, documents: List[Document]) -> List[float]:
+        """
+        Relevance score of each chunk for the query, higher is more relevant.
+        Only the pairs missing from the cache are sent to the model.
+
+        Args:
+            query (str): User question
+            documents (List[Document]): Chunks to score
+
+        Returns:
+            List[float]: One score per chunk, in the same order as `documents`
+        """
+        query_hash = self._text_hash(query)
+        keys = [(query_hash, self._text_hash(document.page_content)) for document in documents]
+        with self.lock:
+            scores = [self.scores.get(key) for key in keys]
+            missing_indexes = [index for index, score in enumerate(scores) if score is None]
+            self.hits += len(keys) - len(missing_indexes)
+            self.misses += len(missing_indexes)
+            for index, key in enumerate(keys):
+                if scores[index] is not None:
+                    self.scores.move_to_end(key)
+
+        if missing_indexes:
+            with metrics.track("rerank", len(missing_indexes)):
+                predictions = self.model.predict(
+                    [(query, documents[index].page_content) for index in missing_indexes],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False,
+                    convert_to_numpy=True,
+                )
+            with self.lock:
+                for index, prediction in zip(missing_indexes, predictions.tolist()):
+                    scores[index] = prediction
+                    self.scores[keys[index]] = prediction
+                while len(self.scores) > self.cache_max_entries:
+                    self.scores.popitem(last=False)
+        return scores
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[Document],
+        top_k: Optional[int] = None,
+        max_candidates: Optional[int] = None,
+    ) -> List[Document]:
+        """
+        Reorder retrieved chunks by cross-encoder score and keep the best ones.
+        With a latency budget only the first M candidates (in retrieval order) are
+        scored; the rest only fill the result if fewer than top_k candidates were scored.
+
+        Args:
+            query (str): User question
+            documents (List[Document]): Retrieved chunks, best first
+            top_k (Optional[int]): Number of chunks to keep, defaults to the reranker's
+            max_candidates (Optional[int]): Number of candidates to rerank, defaults to the reranker's
+
+        Returns:
+            List[Document]: The top_k chunks, with their score in metadata["rerank_score"]
+        """
+        top_k = top_k or self.top_k
+        max_candidates = max_candidates or self.max_candidates or len(documents)
+        candidates, remaining = documents[:max_candidates], documents[max_candidates:]
+
+        try:
+            scores = self.score(query, candidates)
+        except Exception as e:
+            logger.error(f"Failed to rerank {len(candidates)} chunks, keeping retrieval order: {e}")
+            return documents[:top_k]
+
+        ranked = sorted(zip(scores, range(len(candidates))), key=lambda pair: pair[0], reverse=True)
+        reranked = [
+            Document(
+                page_content=candidates[index].page_content,
+                metadata={**candidates[index].metadata, "rerank_score": score},
+            )
+            for score, index in ranked
+        ]
+        return (reranked + remaining)[:top_k]
+
+    def clear(self) -> None:
+        """
+        Remove every cached score.
+        """
+        with self.lock:
+            self.scores.clear()
+
+    def log_stats(self) -> None:
+        """
+        Log the hit/miss counters of the score cache.
+        """
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        logger.info(f"Rerank score cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1%} hit rate).")
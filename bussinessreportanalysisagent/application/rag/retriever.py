@@ -0,0 +1,211 @@
+from typing import List, Optional, Union
+
+from langchain_core.documents import Document
+from loguru import logger
+from qdrant_client.http import models
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import FieldCondition, Filter
+
+from bussinessreportanalysisagent.application.rag.reranker import CrossEncoderReranker
+from bussinessreportanalysisagent.db.sparse_embeddings import SPARSE_VECTOR_NAME
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+from bussinessreportanalysisagent.metrics import metrics
+
+# Chunks retrieved for a reranker without a `max_candidates` budget
+DEFAULT_NUM_CANDIDATES = 50
+
+
+class BusinessReportRetriever:
+    """
+    Retrieve report chunks from Qdrant, scoped by the report metadata set in PdfLoader
+    (company, year, document type and keyword tags). The filtered fields are indexed
+    by `QdrantVectorStore.create_payload_indexes`.
+    """
+
+    def __init__(self, vector_store: QdrantVectorStore, reranker: Optional[CrossEncoderReranker] = None) -> None:
+        """
+        Args:
+            vector_store (QdrantVectorStore): Store holding the report chunks and the
+                embedding model used to embed queries.
+            reranker (Optional[CrossEncoderReranker]): Cross-encoder used by `retrieve`
+                to reorder the candidates and keep the best ones.
+        """
+        self.vector_store = vector_store
+        self.reranker = reranker
+
+    @staticmethod
+    def build_filter(
+        company_name: Optional[Union[str, List[str]]] = None,
+        year: Optional[Union[int, List[int]]] = None,
+        document_type: Optional[str] = None,
+        keywords: Optional[List[str]] = None,
+    ) -> Optional[Filter]:
+        """
+        Build a Qdrant filter from report metadata. Every given field must match.
+
+        Args:
+            company_name (Optional[Union[str, List[str]]]): Company the chunks must belong to,
+                or any of several companies
+            year (Optional[Union[int, List[int]]]): Report year, or any of several years
+            document_type (Optional[str]): Document type, e.g. "pdf"
+            keywords (Optional[List[str]]): Keyword tags, a chunk matches if it has any of them
+
+        Returns:
+            Optional[Filter]: The filter, None when no field is given
+        """
+        must = []
+        if isinstance(company_name, list):
+            must.append(FieldCondition(key="Company_Name", match=models.MatchAny(any=company_name)))
+        elif company_name:
+            must.append(FieldCondition(key="Company_Name", match=models.MatchValue(value=company_name)))
+        if isinstance(year, list):
+            must.append(FieldCondition(key="Year", match=models.MatchAny(any=year)))
+        elif year is not None:
+            must.append(FieldCondition(key="Year", match=models.MatchValue(value=year)))
+        if document_type:
+            must.append(FieldCondition(key="Document_Type", match=models.MatchValue(value=document_type)))
+        if keywords:
+            must.append(FieldCondition(key="keywords", match=models.MatchAny(any=keywords)))
+        return Filter(must=must) if must else None
+
+    def search_limit(self, limit: int, num_candidates: Optional[int] = None) -> int:
+        """
+        Number of chunks to search for: `limit` without a reranker, otherwise the
+        candidates it reranks, `num_candidates` or the reranker's `max_candidates`.
+
+        Args:
+            limit (int): Maximum number of chunks returned to the caller
+            num_candidates (Optional[int]): Number of chunks retrieved before reranking
+
+        Returns:
+            int: Number of chunks to search for
+        """
+        if self.reranker is None:
+            return limit
+        num_candidates = num_candidates or self.reranker.max_candidates or DEFAULT_NUM_CANDIDATES
+        return max(limit, num_candidates)
+
+    @staticmethod
+    def to_document(point: models.ScoredPoint) -> Document:
+        """
+        Convert a Qdrant point into a Document carrying its payload, point id and score.
+        """
+        payload = dict(point.payload or {})
+        page_content = payload.pop("page_content", "")
+        return Document(
+            page_content=page_content,
+            metadata={**payload, "point_id": str(point.id), "score": point.score},
+        )
+
+    def search(
+        self,
+        query_vector: List[float],
+        limit: int = 10,
+        query_filter: Optional[Filter] = None,
+        sparse_query: Optional[models.SparseVector] = None,
+        prefetch_limit: int = 50,
+        search_params: Optional[models.SearchParams] = None,
+    ) -> List[Document]:
+        """
+        Search the collection with an already embedded query. When a sparse query is
+        given, the dense and BM25 result lists are fused with reciprocal rank fusion.
+
+        Args:
+            query_vector (List[float]): Embedded query
+            limit (int): Maximum number of chunks to return
+            query_filter (Optional[Filter]): Metadata filter, see `build_filter`
+            sparse_query (Optional[models.SparseVector]): BM25 encoded query for hybrid search
+            prefetch_limit (int): Number of candidates taken from each list before fusion
+            search_params (Optional[models.SearchParams]): Dense search options, the ones
+                configured in the vector store when not given, e.g. `exact=True` for a
+                brute-force baseline
+
+        Returns:
+            List[Document]: Retrieved chunks, best first
+
+        Raises:
+            UnexpectedResponse: If Qdrant rejects the query, e.g. a missing collection
+        """
+        search_params = search_params or self.vector_store.search_params()
+        try:
+            with metrics.track("qdrant_query") as span:
+                if sparse_query is None:
+                    response = self.vector_store.client.query_points(
+                        collection_name=self.vector_store.collection_name,
+                        query=query_vector,
+                        query_filter=query_filter,
+                        search_params=search_params,
+                        limit=limit,
+                        with_payload=True,
+                    )
+                else:
+                    response = self.vector_store.client.query_points(
+                        collection_name=self.vector_store.collection_name,
+                        prefetch=[
+                            models.Prefetch(
+                                query=query_vector, filter=query_filter, params=search_params, limit=prefetch_limit
+                            ),
+                            models.Prefetch(
+                                query=sparse_query, using=SPARSE_VECTOR_NAME, filter=query_filter, limit=prefetch_limit
+                            ),
+                        ],
+                        query=models.FusionQuery(fusion=models.Fusion.RRF),
+                        limit=limit,
+                        with_payload=True,
+                    )
+                span.items = len(response.points)
+            return [self.to_document(point) for point in response.points]
+        except UnexpectedResponse as e:
+            logger.error(f"Failed to search Qdrant: {e}")
+            raise
+
+    def retrieve(
+        self,
+        query: str,
+        limit: int = 10,
+        company_name: Optional[Union[str, List[str]]] = None,
+        year: Optional[Union[int, List[int]]] = None,
+        document_type: Optional[str] = None,
+        keywords: Optional[List[str]] = None,
+        hybrid: bool = False,
+        num_candidates: Optional[int] = None,
+        query_vector: Optional[List[float]] = None,
+    ) -> List[Document]:
+        """
+        Retrieve the chunks most similar to a question, scoped by report metadata.
+        Hybrid retrieval also matches exact terms ("net debt", "EBITDA") through the BM25
+        sparse vectors and needs a store created with a sparse encoder.
+
+        Args:
+            query (str): User question
+            limit (int): Maximum number of chunks to return
+            company_name (Optional[Union[str, List[str]]]): Company the chunks must belong to,
+                or any of several companies
+            year (Optional[Union[int, List[int]]]): Report year, or any of several years
+            document_type (Optional[str]): Document type, e.g. "pdf"
+            keywords (Optional[List[str]]): Keyword tags, a chunk matches if it has any of them
+            hybrid (bool): Fuse dense and BM25 sparse results
+            num_candidates (Optional[int]): Number of chunks retrieved before reranking, when
+                the retriever has a reranker, defaults to the reranker's `max_candidates`
+            query_vector (Optional[List[float]]): Embedded query, when the caller already embedded it
+
+        Returns:
+            List[Document]: Retrieved chunks, best first
+        """
+        if hybrid and self.vector_store.sparse_encoder is None:
+            raise ValueError("Hybrid retrieval needs a vector store with a sparse encoder.")
+
+        logger.info(f"Retrieving chunks for company={company_name}, year={year}, keywords={keywords}")
+        query_filter = self.build_filter(
+            company_name=company_name, year=year, document_type=document_type, keywords=keywords
+        )
+        documents = self.search(
+            query_vector=query_vector or self.vector_store.doc_store.get_embedding(query),
+            limit=self.search_limit(limit, num_candidates),
+            query_filter=query_filter,
+            sparse_query=self.vector_store.sparse_encoder.encode_query(query) if hybrid else None,
+        )
+        if self.reranker:
+            documents = self.reranker.rerank(query, documents, top_k=limit)
+        logger.info(f"Retrieved {len(documents)} chunks.")
+        return documents
@@ -0,0 +1,234 @@
+import re
+import time
+from typing import Dict, List, Optional
+
+from langchain.output_parsers import PydanticOutputParser
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import PromptTemplate
+from loguru import logger
+from pydantic import BaseModel, Field
+from qdrant_client.models import Filter
+
+from bussinessreportanalysisagent.application.rag.prompt_templates import SELF_QUERY_TEMPLATE
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.db.report_index import ReportIndex
+from bussinessreportanalysisagent.models.models import LLMModel
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:&[a-z0-9]+)*")
+YEAR_RANGE_PATTERN = re.compile(
+    r"\b(?P<start>(?:19|20)\d{2})\s*(?:-|–|to|until|through)\s*(?P<stop>(?:19|20)\d{2})\b"
+    r"|\bbetween\s+(?P<between_start>(?:19|20)\d{2})\s+and\s+(?P<between_stop>(?:19|20)\d{2})\b"
+)
+# Marks the end of a company name in the trie
+END = ""
+
+
+class QueryMetadata(BaseModel):
+    company_names: list[str] = Field(default_factory=list, description="Companies the question is about")
+    years: list[int] = Field(default_factory=list, description="Report years the question is about")
+
+
+class SelfQuery:
+    """
+    Extract company and year filters from a question. A deterministic matcher runs
+    first: known company names (from the report index) are looked up with a token
+    trie in a single pass over the question, and four-digit tokens are matched against
+    the known years. The LLM is only asked when the matcher finds nothing.
+    """
+
+    def __init__(
+        self,
+        report_index: ReportIndex,
+        model_name: str = None,
+        model_temperature: int = 0,
+        model_provider: str = "groq",
+        use_llm: bool = True,
+        llm: BaseChatModel = None,
+    ) -> None:
+        """
+        Args:
+            report_index (ReportIndex): Companies and years stored in Qdrant
+            model_name (str): Model id of the LLM fallback
+            model_temperature (int): Sampling temperature of the LLM fallback
+            model_provider (str): "groq" or "gemini"
+            use_llm (bool): Ask the LLM when the matcher finds nothing
+            llm (BaseChatModel): Chat model to use instead of the configured provider,
+                e.g. a stub model for benchmarks
+        """
+        self.company_names = report_index.company_names
+        self.known_years = set(report_index.years)
+        self.trie = self._build_trie(self.company_names)
+        self.path_counts: Dict[str, int] = {"rules": 0, "llm": 0, "none": 0}
+        self.path_seconds: Dict[str, float] = {"rules": 0.0, "llm": 0.0, "none": 0.0}
+
+        self.chain = None
+        if use_llm:
+            if llm is None:
+                if model_provider == "gemini":
+                    llm = LLMModel.get_gemini_model(model_name=model_name, temperature=model_temperature)
+                else:
+                    llm = LLMModel.get_groq_model(model_name=model_name, temperature=model_temperature)
+            parser = PydanticOutputParser(pydantic_object=QueryMetadata)
+            prompt = PromptTemplate(
+                template=SELF_QUERY_TEMPLATE,
+                input_variables=["question", "company_names", "years"],
+                partial_variables={"format_instructions": parser.get_format_instructions()},
+            )
+            self.chain = prompt | llm | parser
+
+    @staticmethod
+    def _aliases(company_name: str) -> List[List[str]]:
+        """
+        Token sequences a company is recognised by: "Deutsche_Telekom" matches both
+        "deutsche telekom" and "deutschetelekom".
+        """
+        tokens = TOKEN_PATTERN.findall(company_name.lower().replace("_", " "))
+        aliases = [tokens]
+        if len(tokens) > 1:
+            aliases.append(["".join(tokens)])
+        return aliases
+
+    @classmethod
+    def _build_trie(cls, company_names: List[str]) -> dict:
+        trie = {}
+        for company_name in company_names:
+            cls._insert(trie, company_name)
+        return trie
+
+    @classmethod
+    def _insert(cls, trie: dict, company_name: str) -> None:
+        for alias in cls._aliases(company_name):
+            node = trie
+            for token in alias:
+                node = node.setdefault(token, {})
+            node[END] = company_name
+
+    def add_report(self, report: AnnualReportFile) -> None:
+        """
+        Make a newly ingested report known without reloading the index.
+        """
+        if report.company_name not in self.company_names:
+            self._insert(self.trie, report.company_name)
+            self.company_names = sorted(self.company_names + [report.company_name])
+        self.known_years.add(report.year)
+
+    def match(self, question: str) -> QueryMetadata:
+        """
+        Deterministic extraction: the longest known company name starting at each token,
+        and the known years mentioned, with ranges such as "2020-2022" expanded.
+
+        Args:
+            question (str): User question
+
+        Returns:
+            QueryMetadata: Companies and years found, empty lists when none
+        """
+        text = question.lower()
+        tokens = TOKEN_PATTERN.findall(text)
+        company_names, years = [], []
+        position = 0
+        while position < len(tokens):
+            node, matched, end = self.trie, None, position
+            for index in range(position, len(tokens)):
+                node = node.get(tokens[index])
+                if node is None:
+                    break
+                if END in node:
+                    matched, end = node[END], index + 1
+            if matched:
+                if matched not in company_names:
+                    company_names.append(matched)
+                position = end
+                continue
+            token = tokens[position]
+            if len(token) == 4 and token.isdigit() and int(token) in self.known_years and int(token) not in years:
+                years.append(int(token))
+            position += 1
+
+        for year_range in YEAR_RANGE_PATTERN.finditer(text):
+            start = year_range.group("start") or year_range.group("between_start")
+            stop = year_range.group("stop") or year_range.group("between_stop")
+            for year in range(int(start), int(stop) + 1):
+                if year in self.known_years and year not in years:
+                    years.append(year)
+        return QueryMetadata(company_names=company_names, years=sorted(years))
+
+    def _ask_llm(self, question: str) -> QueryMetadata:
+        """
+        LLM extraction, restricted to the companies and years of the index.
+        """
+        try:
+            result = self.chain.invoke(
+                {"question": question, "company_names": self.company_names, "years": sorted(self.known_years)}
+            )
+        except Exception as e:
+            logger.warning(f"Self-query LLM extraction failed: {e}")
+            return QueryMetadata()
+
+        # Map the answer back to indexed names, the model may change their spelling
+        company_names = []
+        for company_name in result.company_names:
+            for matched in self.match(company_name).company_names:
+                if matched not in company_names:
+                    company_names.append(matched)
+        years = sorted({year for year in result.years if year in self.known_years})
+        return QueryMetadata(company_names=company_names, years=years)
+
+    def extract(self, question: str) -> QueryMetadata:
+        """
+        Extract the companies and years of a question, rules first, then the LLM.
+
+        Args:
+            question (str): User question
+
+        Returns:
+            QueryMetadata: Companies and years the question is about
+        """
+        start = time.perf_counter()
+        metadata = self.match(question)
+        path = "rules"
+        if not (metadata.company_names or metadata.years):
+            path = "none"
+            if self.chain is not None:
+                metadata = self._ask_llm(question)
+                path = "llm"
+        self.path_counts[path] += 1
+        self.path_seconds[path] += time.perf_counter() - start
+        logger.debug(f"Self-query ({path}): companies={metadata.company_names}, years={metadata.years}")
+        return metadata
+
+    def get_filter(self, question: str) -> Optional[Filter]:
+        """
+        Qdrant filter on the companies and years of a question.
+
+        Args:
+            question (str): User question
+
+        Returns:
+            Optional[Filter]: The filter, None when the question names no company or year
+        """
+        metadata = self.extract(question)
+        return BusinessReportRetriever.build_filter(
+            company_name=metadata.company_names or None,
+            year=metadata.years or None,
+        )
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Number of questions handled by each path ("rules", "llm", "none") and their mean latency.
+        """
+        return {
+            path: {
+                "count": count,
+                "mean_ms": self.path_seconds[path] / count * 1000 if count else 0.0,
+            }
+            for path, count in self.path_counts.items()
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        logger.info(
+            "Self-query paths: "
+            + ", ".join(f"{path} {values['count']} ({values['mean_ms']:.2f} ms)" for path, values in stats.items())
+        )
@@ -0,0 +1,258 @@
+from typing import List, Union
+
+from loguru import logger
+from qdrant_client import QdrantClient
+
+from bussinessreportanalysisagent.application.preprocessing.chunking import Chunking, TokenChunking
+from bussinessreportanalysisagent.application.preprocessing.cleaning import RepeatedLineCleaner
+from bussinessreportanalysisagent.application.preprocessing.table_extraction import FinancialTableExtractor
+from bussinessreportanalysisagent.db.answer_cache import SemanticAnswerCache
+from bussinessreportanalysisagent.db.chunk_dedup import ChunkDeduplicator
+from bussinessreportanalysisagent.db.embedding_cache import EmbeddingCache
+from bussinessreportanalysisagent.db.embeddings import VectorEmbeddings
+from bussinessreportanalysisagent.db.financial_tables import FinancialTableStore
+from bussinessreportanalysisagent.db.ingest_versions import IngestVersions
+from bussinessreportanalysisagent.db.report_index import ReportIndex
+from bussinessreportanalysisagent.db.sparse_embeddings import BM25SparseEncoder
+from bussinessreportanalysisagent.db.tag_cache import KeywordTagCache
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+from bussinessreportanalysisagent.metrics import metrics
+from bussinessreportanalysisagent.services.embedding_keyword_tagger import EmbeddingKeywordTagger
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile
+
+
+def configure_metrics(config_data: dict) -> None:
+    """Turn the stage metrics on or off as configured in config.yml."""
+    metrics.enabled = config_data['configurations']["metrics_config"]["enabled"]
+
+
+def get_tag_cache(config_data: dict, use_tag_cache: bool, clear_tag_cache: bool) -> KeywordTagCache:
+    """Open the keyword tag cache configured in config.yml, clearing it if requested.
+
+    Returns:
+        KeywordTagCache: The cache, or None when it is bypassed.
+    """
+    if not (use_tag_cache or clear_tag_cache):
+        return None
+
+    tag_cache = KeywordTagCache(
+        cache_path=config_data['configurations']["keyword_tagging_config"]["cache_path"],
+        model_name=config_data['configurations']["llm_model_config"]["groq_model"]["model_id"],
+        model_temperature=config_data['configurations']["llm_model_config"]["groq_model"]["temperature"],
+        keywords_list=config_data['configurations']["content_keywords_list"],
+        max_entries=config_data['configurations']["keyword_tagging_config"]["cache_max_entries"],
+    )
+    if clear_tag_cache:
+        tag_cache.clear()
+    if not use_tag_cache:
+        tag_cache.close()
+        return None
+    return tag_cache
+
+
+def get_cleaner(config_data: dict) -> RepeatedLineCleaner:
+    """Create the repeated line cleaner configured in config.yml.
+
+    Returns:
+        RepeatedLineCleaner: The cleaner, or None when cleaning is disabled.
+    """
+    cleaning_config = config_data['configurations']["pdf_loading_config"]["cleaning"]
+    if not cleaning_config["enabled"]:
+        return None
+    return RepeatedLineCleaner(
+        min_page_ratio=cleaning_config["min_page_ratio"],
+        min_pages=cleaning_config["min_pages"],
+        edge_lines=cleaning_config["edge_lines"],
+        min_block_chars=cleaning_config["min_block_chars"],
+    )
+
+
+def get_embedding_tagger(config_data: dict) -> EmbeddingKeywordTagger:
+    """Create the embedding keyword tagger of the configured tagging mode.
+
+    Returns:
+        EmbeddingKeywordTagger: The tagger, or None in "llm" mode.
+    """
+    tagging_config = config_data['configurations']["keyword_tagging_config"]
+    if tagging_config["mode"] == "llm":
+        return None
+    if tagging_config["mode"] not in ("embedding", "hybrid"):
+        raise ValueError(f"Unsupported keyword tagging mode: {tagging_config['mode']}")
+    return EmbeddingKeywordTagger(
+        keywords_list=config_data['configurations']["content_keywords_list"],
+        embeddings=VectorEmbeddings(
+            model_id=config_data['configurations']["embedding_model_config"]["model_id"],
+            model_kwargs=config_data['configurations']["embedding_model_config"]["runtime"],
+        ),
+        top_k=tagging_config["embedding_tagger"]["top_k"],
+        min_similarity=tagging_config["embedding_tagger"]["min_similarity"],
+        min_margin=tagging_config["embedding_tagger"]["min_margin"],
+        escalate=tagging_config["mode"] == "hybrid",
+        batch_size=tagging_config["batch_size"],
+    )
+
+
+def get_embedding_cache(config_data: dict) -> EmbeddingCache:
+    """Open the embedding cache configured in config.yml.
+
+    Returns:
+        EmbeddingCache: The cache, or None when it is disabled.
+    """
+    cache_config = config_data['configurations']["embedding_model_config"]["cache"]
+    if not cache_config["enabled"]:
+        return None
+    runtime_config = config_data['configurations']["embedding_model_config"]["runtime"]
+    return EmbeddingCache(
+        cache_dir=cache_config["cache_dir"],
+        model_id=config_data['configurations']["embedding_model_config"]["model_id"],
+        max_entries=cache_config["max_entries"],
+        backend=runtime_config["backend"],
+        onnx_file_name=runtime_config["onnx_file_name"],
+    )
+
+
+def get_sparse_encoder(config_data: dict) -> BM25SparseEncoder:
+    """Build the BM25 sparse encoder configured in config.yml.
+
+    Returns:
+        BM25SparseEncoder: The encoder, or None when sparse vectors are disabled.
+    """
+    sparse_config = config_data['configurations']["vector_database_config"]["sparse_vectors"]
+    if not sparse_config["enabled"]:
+        return None
+    return BM25SparseEncoder(k1=sparse_config["k1"], b=sparse_config["b"], avg_doc_length=sparse_config["avg_doc_length"])
+
+
+def get_vector_store(
+    config_data: dict, client: QdrantClient = None, embedding_cache: EmbeddingCache = None
+) -> QdrantVectorStore:
+    """Create the vector store configured in config.yml, with its sparse encoder and index tuning."""
+    vector_database_config = config_data['configurations']["vector_database_config"]
+    return QdrantVectorStore(
+        collection_name=vector_database_config["collection_name"],
+        embedding_model_type=vector_database_config["embedding_model_type"],
+        embedding_model_id=config_data['configurations']["embedding_model_config"]["model_id"],
+        client=client,
+        embedding_model_kwargs=config_data['configurations']["embedding_model_config"]["runtime"],
+        embedding_cache=embedding_cache,
+        prefer_grpc=vector_database_config["prefer_grpc"],
+        sparse_encoder=get_sparse_encoder(config_data),
+        hnsw=vector_database_config["hnsw"],
+        quantization=vector_database_config["quantization"],
+        on_disk_vectors=vector_database_config["on_disk_vectors"],
+        on_disk_payload=vector_database_config["on_disk_payload"],
+    )
+
+
+def get_chunking(config_data: dict) -> Union[Chunking, TokenChunking]:
+    if config_data['configurations']["embedding_model_config"]["chunking_strategy"] == "token_offsets":
+        return TokenChunking(
+            model_id=config_data['configurations']["embedding_model_config"]["model_id"],
+            max_seq_length=config_data['configurations']["embedding_model_config"]["max_seq_length"],
+            chunk_overlap=config_data['configurations']["embedding_model_config"]["chunk_overlap"],
+            batch_size=config_data['configurations']["embedding_model_config"]["chunking_batch_size"],
+            model_kwargs=config_data['configurations']["embedding_model_config"]["runtime"],
+        )
+    return Chunking(
+        model_id=config_data['configurations']["embedding_model_config"]["model_id"],
+        chunk_size=config_data['configurations']["embedding_model_config"]["chunk_size"],
+        chunk_overlap=config_data['configurations']["embedding_model_config"]["chunk_overlap"],
+        max_seq_length=config_data['configurations']["embedding_model_config"]["max_seq_length"],
+        model_kwargs=config_data['configurations']["embedding_model_config"]["runtime"],
+    )
+
+
+def update_report_index(config_data: dict, added_files: List[str], removed_files: List[str]) -> None:
+    """Record the companies and years of the ingested reports for self-query."""
+    report_index = ReportIndex(config_data['configurations']["self_query_config"]["report_index_path"])
+    for file_name in removed_files:
+        report_index.remove(AnnualReportFile(filename=file_name))
+    for file_name in added_files:
+        try:
+            report_index.add(AnnualReportFile(filename=file_name))
+        except ValueError as e:
+            logger.error(f"Skipping {file_name} in the report index: {e}")
+    report_index.save()
+
+
+def bump_ingest_versions(config_data: dict, file_names: List[str]) -> None:
+    """Invalidate the cached answers about the companies of ingested or removed reports."""
+    company_names = []
+    for file_name in file_names:
+        try:
+            company_names.append(AnnualReportFile(filename=file_name).company_name)
+        except ValueError:
+            continue
+    if company_names:
+        versions = IngestVersions(config_data['configurations']["answer_cache_config"]["versions_path"])
+        versions.bump(company_names)
+        versions.close()
+
+
+def get_answer_cache(config_data: dict) -> SemanticAnswerCache:
+    """Create the semantic answer cache configured in config.yml.
+
+    Returns:
+        SemanticAnswerCache: The cache, or None when it is disabled.
+    """
+    cache_config = config_data['configurations']["answer_cache_config"]
+    if not cache_config["enabled"]:
+        return None
+    return SemanticAnswerCache(
+        versions=IngestVersions(cache_config["versions_path"]),
+        similarity_threshold=cache_config["similarity_threshold"],
+        ttl_seconds=cache_config["ttl_seconds"],
+        max_entries=cache_config["max_entries"],
+    )
+
+
+def get_deduplicator(config_data: dict, persistent: bool = True) -> ChunkDeduplicator:
+    """Open the near-duplicate chunk index configured in config.yml.
+
+    Args:
+        persistent (bool): Use the on-disk index of the stored chunks, else an index of
+            the current run only.
+
+    Returns:
+        ChunkDeduplicator: The deduplicator, or None when dedup is disabled.
+    """
+    dedup_config = config_data['configurations']["dedup_config"]
+    if not dedup_config["enabled"]:
+        return None
+    return ChunkDeduplicator(
+        index_path=dedup_config["index_path"] if persistent else ":memory:",
+        threshold=dedup_config["threshold"],
+        num_perm=dedup_config["num_perm"],
+        shingle_size=dedup_config["shingle_size"],
+    )
+
+
+def get_table_extractor(config_data: dict) -> FinancialTableExtractor:
+    """Create the financial table extractor configured in config.yml.
+
+    Returns:
+        FinancialTableExtractor: The extractor, or None when table extraction is disabled.
+    """
+    tables_config = config_data['configurations']["financial_tables_config"]
+    if not tables_config["enabled"]:
+        return None
+    return FinancialTableExtractor(keywords=tables_config["keywords"], strategies=tables_config["strategies"])
+
+
+def get_financial_table_store(config_data: dict) -> FinancialTableStore:
+    """Open the financial line item store configured in config.yml.
+
+    Returns:
+        FinancialTableStore: The store, or None when table extraction is disabled.
+    """
+    tables_config = config_data['configurations']["financial_tables_config"]
+    if not tables_config["enabled"]:
+        return None
+    return FinancialTableStore(store_dir=tables_config["store_dir"])
+
+
+def store_financial_tables(extractor: FinancialTableExtractor, table_store: FinancialTableStore) -> None:
+    """Extract the statement tables of the reports tracked by the extractor into the store."""
+    for company_name, year, line_items in extractor.iter_reports():
+        table_store.write_report(company_name, year, line_items)
+    extractor.log_stats()
@@ -1,55 +1,353 @@
-from services.loader import PdfLoader
+import time
+from typing import AsyncIterator, List, Optional, Union
+
+from fastapi.concurrency import run_in_threadpool
 from langchain_core.documents import Document
-from services.recursivesplitter import RecursiveSplitter
-from services.chromdb import ChromaDb
-from services.businessReportRetrieval import BusinessReportRetrieval
-from services.questionKeyword import QuestionKeywords
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+from loguru import logger
+from qdrant_client import QdrantClient
+
+from bussinessreportanalysisagent.application.rag.prompt_templates import (
+    QNA_TEMPLATE,
+    SUMMARY_TEMPLATE,
+    TRENDS_TEMPLATE,
+)
+from bussinessreportanalysisagent.application.rag.query_expansion import QueryExpansion
+from bussinessreportanalysisagent.application.rag.reranker import CrossEncoderReranker
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.application.rag.self_query import SelfQuery
+from bussinessreportanalysisagent.core.components import (
+    configure_metrics,
+    get_answer_cache,
+    get_financial_table_store,
+    get_vector_store,
+)
+from bussinessreportanalysisagent.db.answer_cache import CachedAnswer, SemanticAnswerCache
+from bussinessreportanalysisagent.db.financial_tables import FinancialTableStore
+from bussinessreportanalysisagent.db.report_index import ReportIndex
+from bussinessreportanalysisagent.models.models import LLMModel
 
 
 class BusinessAnalysisController:
+    """
+    Answer questions about the ingested annual reports. Retrieval (embedding, Qdrant,
+    reranking, self-query) is blocking and runs in the thread pool; the answer is
+    streamed token by token from the chat model.
+    """
+
+    def __init__(
+        self,
+        retriever: BusinessReportRetriever,
+        llm: BaseChatModel,
+        self_query: Optional[SelfQuery] = None,
+        top_k: int = 5,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        table_store: Optional[FinancialTableStore] = None,
+        query_expansion: Optional[QueryExpansion] = None,
+    ) -> None:
+        """
+        Args:
+            retriever (BusinessReportRetriever): Retriever of the report chunks
+            llm (BaseChatModel): Chat model writing the answers
+            self_query (Optional[SelfQuery]): Extracts company and year filters from
+                questions that do not give them
+            top_k (int): Number of chunks given to the model
+            answer_cache (Optional[SemanticAnswerCache]): Cache of the QnA and summary
+                answers of similar questions
+            table_store (Optional[FinancialTableStore]): Line items of the financial
+                statements, for numeric trend queries
+            query_expansion (Optional[QueryExpansion]): Retrieves the chunks of the question
+                and of its LLM paraphrases instead of the question only
+        """
+        self.retriever = retriever
+        self.query_expansion = query_expansion
+        self.answer_cache = answer_cache
+        self.table_store = table_store
+        self.self_query = self_query
+        self.top_k = top_k
+        self.qna_chain = PromptTemplate.from_template(QNA_TEMPLATE) | llm | StrOutputParser()
+        self.summary_chain = PromptTemplate.from_template(SUMMARY_TEMPLATE) | llm | StrOutputParser()
+        self.trends_chain = PromptTemplate.from_template(TRENDS_TEMPLATE) | llm | StrOutputParser()
+
+    @classmethod
+    def from_config(cls, config_data: dict, client: QdrantClient = None) -> "BusinessAnalysisController":
+        """
+        Create the controller and its clients (Qdrant, embedding model, reranker, LLM)
+        from config.yml.
+
+        Args:
+            config_data (dict): Configuration loaded from config.yml
+            client (QdrantClient, optional): Client to use instead of the configured Qdrant host
+
+        Returns:
+            BusinessAnalysisController: The controller
+        """
+        configurations = config_data['configurations']
+        configure_metrics(config_data)
+        vector_store = get_vector_store(config_data, client=client)
+        vector_store.check_sparse_vectors()
+
+        reranker_config = configurations["reranker_config"]
+        reranker = None
+        if reranker_config["enabled"]:
+            reranker = CrossEncoderReranker(
+                model_id=reranker_config["model_id"],
+                top_k=reranker_config["top_k"],
+                batch_size=reranker_config["batch_size"],
+                max_candidates=reranker_config["max_candidates"],
+                max_length=reranker_config["max_length"],
+                cache_max_entries=reranker_config["cache_max_entries"],
+            )
+
+        groq_config = configurations["llm_model_config"]["groq_model"]
+        self_query_config = configurations["self_query_config"]
+        self_query = SelfQuery(
+            report_index=ReportIndex(self_query_config["report_index_path"]),
+            model_name=groq_config["model_id"],
+            model_temperature=groq_config["temperature"],
+            model_provider=self_query_config["model_provider"],
+            use_llm=self_query_config["use_llm"],
+        )
+        llm = LLMModel.get_groq_model(model_name=groq_config["model_id"], temperature=groq_config["temperature"])
+        retriever = BusinessReportRetriever(vector_store, reranker=reranker)
+
+        expansion_config = configurations["query_expansion_config"]
+        query_expansion = None
+        if expansion_config["enabled"]:
+            query_expansion = QueryExpansion(
+                retriever=retriever,
+                model_name=groq_config["model_id"],
+                model_temperature=groq_config["temperature"],
+                model_provider=expansion_config["model_provider"],
+                num_queries=expansion_config["num_queries"],
+                cache_max_entries=expansion_config["cache_max_entries"],
+                rrf_k=expansion_config["rrf_k"],
+            )
+        return cls(
+            retriever=retriever,
+            llm=llm,
+            self_query=self_query,
+            top_k=reranker_config["top_k"],
+            answer_cache=get_answer_cache(config_data),
+            table_store=get_financial_table_store(config_data),
+            query_expansion=query_expansion,
+        )
+
+    @staticmethod
+    def format_context(documents: List[Document]) -> str:
+        """
+        Join the retrieved chunks, each one headed by its company, year and page.
+        """
+        return "\n\n".join(
+            f"[{document.metadata.get('Company_Name')} {document.metadata.get('Year')}, "
+            f"page {document.metadata.get('page')}]\n{document.page_content}"
+            for document in documents
+        )
+
+    def resolve_filters(
+        self,
+        question: str,
+        company_name: Optional[Union[str, List[str]]] = None,
+        year: Optional[Union[int, List[int]]] = None,
+    ) -> tuple[Optional[List[str]], Optional[List[int]]]:
+        """
+        Companies and years a question is scoped to. When neither is given they are
+        extracted from the question.
+        """
+        if self.self_query and company_name is None and year is None:
+            metadata = self.self_query.extract(question)
+            return metadata.company_names or None, metadata.years or None
+        company_names = [company_name] if isinstance(company_name, str) else company_name
+        years = [year] if isinstance(year, int) else year
+        return company_names, years
+
+    def _answer_context(
+        self,
+        endpoint: str,
+        question: str,
+        company_name: Optional[str],
+        year: Optional[int],
+        keyword: Optional[str] = None,
+    ) -> tuple[Optional[CachedAnswer], List[Document], dict]:
+        """
+        Blocking part of an answer: filters, answer cache lookup and retrieval.
+
+        Returns:
+            tuple[Optional[CachedAnswer], List[Document], dict]: The cached answer on a
+                cache hit, else the retrieved chunks and the arguments to cache the answer with
+        """
+        company_names, years = self.resolve_filters(question, company_name, year)
+        query_vector = self.retriever.vector_store.doc_store.get_embedding(question)
+        cache_kwargs = {}
+        if self.answer_cache and query_vector:
+            scope_key = self.answer_cache.scope_key(endpoint, company_names, years, keyword)
+            # Taken before retrieval: a report ingested meanwhile must invalidate this answer
+            versions = self.answer_cache.current_versions(company_names)
+            cached = self.answer_cache.get(scope_key, versions, query_vector)
+            if cached:
+                return cached, cached.documents, {}
+            cache_kwargs = {
+                "scope_key": scope_key,
+                "versions": versions,
+                "query_vector": query_vector,
+                "question": question,
+            }
+
+        hybrid = self.retriever.vector_store.sparse_encoder is not None
+        keywords = [keyword] if keyword else None
+        if self.query_expansion:
+            documents = self.query_expansion.retrieve(
+                question,
+                limit=self.top_k,
+                query_filter=self.retriever.build_filter(company_name=company_names, year=years, keywords=keywords),
+                hybrid=hybrid,
+                query_vector=query_vector,
+            )
+        else:
+            documents = self.retriever.retrieve(
+                query=question,
+                limit=self.top_k,
+                company_name=company_names,
+                year=years,
+                keywords=keywords,
+                hybrid=hybrid,
+                query_vector=query_vector,
+            )
+        return None, documents, cache_kwargs
+
+    @staticmethod
+    async def _replay(answer: str) -> AsyncIterator[str]:
+        yield answer
+
+    async def _cache_answer(
+        self, tokens: AsyncIterator[str], documents: List[Document], cache_kwargs: dict, start: float
+    ) -> AsyncIterator[str]:
+        """
+        Pass the answer tokens through and cache the answer once it is complete.
+        """
+        answer = []
+        async for token in tokens:
+            answer.append(token)
+            yield token
+        self.answer_cache.put(
+            answer="".join(answer),
+            documents=documents,
+            cost_seconds=time.perf_counter() - start,
+            **cache_kwargs,
+        )
+
+    async def _answer(
+        self,
+        endpoint: str,
+        chain: Runnable,
+        inputs: dict,
+        question: str,
+        company_name: Optional[str],
+        year: Optional[int],
+        keyword: Optional[str] = None,
+    ) -> tuple[List[Document], AsyncIterator[str]]:
+        start = time.perf_counter()
+        cached, documents, cache_kwargs = await run_in_threadpool(
+            self._answer_context, endpoint, question, company_name, year, keyword
+        )
+        if cached:
+            logger.info(f"Answer cache hit for '{question}' (cached question '{cached.question}')")
+            return documents, self._replay(cached.answer)
+
+        logger.info(f"Retrieved {len(documents)} chunks for {endpoint}")
+        tokens = chain.astream({**inputs, "context": self.format_context(documents)})
+        if cache_kwargs:
+            tokens = self._cache_answer(tokens, documents, cache_kwargs, start)
+        return documents, tokens
+
+    async def qnaResponse(
+        self, user_question: str, companyName: Optional[str] = None, year: Optional[int] = None
+    ) -> tuple[List[Document], AsyncIterator[str]]:
+        """
+        Retrieve the chunks of a question and start streaming the answer.
+
+        Returns:
+            tuple[List[Document], AsyncIterator[str]]: Retrieved chunks and the answer tokens
+        """
+        return await self._answer(
+            "qna", self.qna_chain, {"question": user_question}, user_question, companyName, year
+        )
+
+    async def summaryResponse(
+        self, user_question: str, companyName: Optional[str], keyword: str, year: Optional[int] = None
+    ) -> tuple[List[Document], AsyncIterator[str]]:
+        """
+        Retrieve the chunks tagged with a keyword and start streaming their summary.
+
+        Returns:
+            tuple[List[Document], AsyncIterator[str]]: Retrieved chunks and the summary tokens
+        """
+        return await self._answer(
+            "summary",
+            self.summary_chain,
+            {"question": user_question, "keyword": keyword},
+            user_question,
+            companyName,
+            year,
+            keyword,
+        )
+
+    async def trendAnalysis(
+        self, keyword: list[str], year: Optional[Union[int, List[int]]] = None
+    ) -> tuple[List[Document], AsyncIterator[str]]:
+        """
+        Retrieve the chunks of every company about the keywords and start streaming the trends.
+
+        Returns:
+            tuple[List[Document], AsyncIterator[str]]: Retrieved chunks and the analysis tokens
+        """
+        logger.info("Trends retrieval started")
+        question = ", ".join(keyword)
+        documents = await run_in_threadpool(
+            self.retriever.retrieve, query=question, limit=self.top_k, year=year, keywords=keyword
+        )
+        logger.info(f"Trends retrieval completed with {len(documents)} chunks")
+        tokens = self.trends_chain.astream({"context": self.format_context(documents), "keywords": question})
+        return documents, tokens
+
+    def figureTrend(
+        self,
+        query: str,
+        company_name: Optional[Union[str, List[str]]] = None,
+        year: Optional[Union[int, List[int]]] = None,
+    ) -> dict:
+        """
+        Figures of a statement line item over the years, e.g. "net debt 2019-2023", read
+        from the financial table store without retrieval or the LLM. Companies not given
+        are matched in the query by the self-query rules only.
+
+        Returns:
+            dict: The matched line item and one figure per company and fiscal year
+        """
+        company_names = [company_name] if isinstance(company_name, str) else company_name
+        if company_names is None and self.self_query:
+            company_names = self.self_query.match(query).company_names or None
+        years = [year] if isinstance(year, int) else year
+        line_item, figures = self.table_store.trend(query, company_names=company_names, years=years)
+        logger.info(f"Figure trend of '{query}': {len(figures)} figures of line item '{line_item}'")
+        return {
+            "line_item": line_item,
+            "figures": [
+                {
+                    "company_name": row.company_name,
+                    "year": int(row.fiscal_year),
+                    "value": float(row.value),
+                    "unit": row.unit,
+                    "label": row.label,
+                    "report_year": int(row.report_year),
+                    "page": int(row.page),
+                }
+                for row in figures.itertuples(index=False)
+            ],
+        }
 
-    def __init__(self):
-        self.pdfLoader = PdfLoader()
-        self.recursiveSplitter = RecursiveSplitter()
-        self.chromaDb = ChromaDb()
-        self.businessReportRetrieval = BusinessReportRetrieval()
-        self.questionKeyword = QuestionKeywords()
-
-    def qnaResponse(self, user_question: str, companyName: str):
-        print("Retrieve Summary started")
-        response = self.businessReportRetrieval.qnaResponse(user_question, companyName)
-        print("Retrieve Summary Completed")
-        return response
-
-    def summaryResponse(self, user_question: str, companyName: str, keyword: str):
-        print("Retrieve Summary started")
-        response = self.businessReportRetrieval.summaryResponse(user_question, companyName, keyword)
-        print("Retrieve Summary Completed")
-        return response
-
-    def trendAnalysis(self, keyword: list[str], trendTemplate: str) -> str:
-        try:
-            print("Trends retrieval started:")
-            responseTrends: str = self.businessReportRetrieval.trendAnalysis(keyword, trendTemplate)
-            print("Trends retrieval completed:")
-            return responseTrends
-        except Exception as e:
-            print("Something went wrong in trends retrieval:", e)
-
-    def telecomTrends(self, keyword: list[str]) -> str:
-        try:
-            print("Trends retrieval started:")
-            responseTrends: str = self.businessReportRetrieval.retrieveTelecomTrends(keyword)
-            print("Trends retrieval completed:")
-            return responseTrends
-        except Exception as e:
-            print("Something went wrong in trends retrieval:", e)
-
-    def loader(self, pdf: object) -> list[list[Document]]:
-        return self.pdfLoader.load_and_parse(pdf)
-
-    def chunking(self, allDocument: list[list[Document]]) -> list[Document]:
-        return self.recursiveSplitter.split(allDocument)
-
-    def saveEmbedding(self, allChunk: list[Document], collectionName: str) -> str:
-        return self.chromaDb.createEmbeddingAndStore(allChunk, collectionName)
+    def close(self) -> None:
+        self.retriever.vector_store.client.close()
@@ -0,0 +1,509 @@
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from loguru import logger
+from pydantic import BaseModel
+from qdrant_client import QdrantClient
+
+from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader
+from bussinessreportanalysisagent.core.components import (
+    bump_ingest_versions,
+    get_chunking,
+    get_cleaner,
+    get_deduplicator,
+    get_embedding_cache,
+    get_embedding_tagger,
+    get_financial_table_store,
+    get_table_extractor,
+    get_tag_cache,
+    get_vector_store,
+    store_financial_tables,
+    update_report_index,
+)
+from bussinessreportanalysisagent.db.chunk_dedup import ChunkDeduplicator
+from bussinessreportanalysisagent.db.ingest_manifest import IngestManifest
+from bussinessreportanalysisagent.settings import env_settings
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile
+
+ACTIVE_STATUSES = ("queued", "running")
+# Counters of a job reported by its ingestion process
+PROGRESS_FIELDS = {"pages_tagged", "chunks_produced", "chunks_dropped", "points_upserted"}
+# Minimum seconds between two progress reports of an ingestion process
+PROGRESS_INTERVAL = 0.5
+
+
+class IngestCancelled(Exception):
+    """
+    Raised inside a running ingestion job once it has been cancelled.
+    """
+
+
+class IngestConflictError(Exception):
+    """
+    Raised when a different version of a report is submitted while one is being ingested.
+    """
+
+
+class IngestJob(BaseModel):
+    job_id: str
+    file_name: str
+    file_hash: str
+    # queued, running, completed, failed or cancelled
+    status: str = "queued"
+    pages_tagged: int = 0
+    chunks_produced: int = 0
+    # Near-duplicates of stored chunks, not embedded
+    chunks_dropped: int = 0
+    points_upserted: int = 0
+    error: Optional[str] = None
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class IngestJobQueue:
+    """
+    Queue ingesting uploaded reports into Qdrant while the API keeps serving queries.
+    Each job runs in its own child process with a lower CPU priority (nice), inherited by
+    every thread and PDF worker process it starts, so the embedding model's intra-op
+    threads and the tokenizer threads of ingestion yield the CPU to queries. A bounded
+    pool of threads supervises the processes and relays their progress.
+
+    With `run_in_process` disabled jobs run on the worker threads instead, e.g. with an
+    in-memory Qdrant client that cannot be shared with a child process. Only the worker
+    thread and the threads it creates are then niced, thread pools shared with the API
+    keep their normal priority.
+
+    Submitting a file whose content is already queued, running or ingested returns the
+    existing job instead of a new one.
+    """
+
+    def __init__(
+        self,
+        config_data: dict,
+        client: QdrantClient = None,
+        llm: BaseChatModel = None,
+        on_ingested: Callable[[AnnualReportFile], None] = None,
+    ) -> None:
+        """
+        Args:
+            config_data (dict): Configuration loaded from config.yml
+            client (QdrantClient, optional): Client to use instead of the configured Qdrant
+                host, only when jobs run on threads (`run_in_process` disabled)
+            llm (BaseChatModel, optional): Chat model to tag pages with instead of Groq,
+                e.g. a stub model for benchmarks
+            on_ingested (Callable[[AnnualReportFile], None], optional): Called after a report
+                was ingested, e.g. to make it known to self-query
+        """
+        self.config_data = config_data
+        self.jobs_config = config_data['configurations']["ingest_jobs_config"]
+        self.run_in_process = self.jobs_config["run_in_process"]
+        self.context = multiprocessing.get_context(self.jobs_config["start_method"])
+        if self.run_in_process:
+            # Every process creates its own client
+            self.client = None
+        else:
+            self.client = client or QdrantClient(
+                url=env_settings.QDRANT_HOST_URL,
+                api_key=env_settings.QDRANT_API_KEY,
+                prefer_grpc=config_data['configurations']["vector_database_config"]["prefer_grpc"],
+            )
+        self.llm = llm
+        self.on_ingested = on_ingested
+        self.upload_dir = self.jobs_config["upload_dir"]
+        os.makedirs(self.upload_dir, exist_ok=True)
+
+        self.jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self.futures: Dict[str, Future] = {}
+        self.cancel_events: Dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+        self.report_index_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.jobs_config["max_workers"],
+            thread_name_prefix="ingest",
+            initializer=None if self.run_in_process else self._lower_priority,
+            initargs=() if self.run_in_process else (self.jobs_config["nice"],),
+        )
+
+    @staticmethod
+    def _lower_priority(nice: int) -> None:
+        """
+        Lower the scheduling priority of the calling thread (Linux schedules threads
+        individually), the threads and processes it starts afterwards inherit it.
+        """
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not lower the priority of the ingest worker: {e}")
+
+    def submit(self, file_name: str, content: bytes) -> IngestJob:
+        """
+        Queue an uploaded report for ingestion.
+
+        Args:
+            file_name (str): Name of the report, in the 'Company_Year.pdf' format
+            content (bytes): Content of the pdf file
+
+        Returns:
+            IngestJob: The new job, or the existing job of the same content
+
+        Raises:
+            ValueError: If the file name is not a valid report name
+            IngestConflictError: If another version of the report is queued or running
+        """
+        AnnualReportFile(filename=file_name)
+        file_name = os.path.basename(file_name)
+        file_hash = hashlib.sha256(content).hexdigest()
+
+        with self.lock:
+            # Only the latest job of a file counts, a later version replaced the points of older ones
+            latest_jobs = {}
+            for job in self.jobs.values():
+                latest_jobs[job.file_name] = job
+            for job in latest_jobs.values():
+                if job.file_hash == file_hash and job.status in ACTIVE_STATUSES + ("completed",):
+                    logger.info(f"{file_name} is already {job.status} as job {job.job_id}")
+                    return job
+                if job.file_name == file_name and job.status in ACTIVE_STATUSES:
+                    raise IngestConflictError(f"Another version of {file_name} is {job.status} as job {job.job_id}")
+
+            job = IngestJob(
+                job_id=uuid.uuid4().hex, file_name=file_name, file_hash=file_hash, submitted_at=time.time()
+            )
+            manifest = IngestManifest(self.jobs_config["manifest_path"])
+            ingested = manifest.find_by_hash(file_hash)
+            manifest.close()
+            if ingested:
+                job.status, job.points_upserted, job.finished_at = "completed", ingested[1], job.submitted_at
+                logger.info(f"{file_name} was already ingested as {ingested[0]}")
+            else:
+                temp_path = os.path.join(self.upload_dir, f".{job.job_id}.tmp")
+                with open(temp_path, "wb") as file:
+                    file.write(content)
+                os.replace(temp_path, os.path.join(self.upload_dir, file_name))
+                self.cancel_events[job.job_id] = self.context.Event() if self.run_in_process else threading.Event()
+                self.futures[job.job_id] = self.executor.submit(self._run, job)
+                logger.info(f"Queued {file_name} for ingestion as job {job.job_id}")
+
+            self.jobs[job.job_id] = job
+            self._prune()
+        return job
+
+    def _prune(self) -> None:
+        """
+        Forget the oldest finished jobs beyond max_jobs.
+        """
+        finished = [job_id for job_id, job in self.jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[: max(0, len(self.jobs) - self.jobs_config["max_jobs"])]:
+            del self.jobs[job_id]
+            self.futures.pop(job_id, None)
+            self.cancel_events.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """
+        Cancel a job. A queued job is dropped at once; a running job stops at the next
+        page and its points already stored are deleted.
+
+        Returns:
+            Optional[IngestJob]: The job, None when it does not exist
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return job
+            self.cancel_events[job_id].set()
+            if self.futures[job_id].cancel():
+                job.status, job.finished_at = "cancelled", time.time()
+            logger.info(f"Cancellation of job {job_id} requested")
+        return job
+
+    @staticmethod
+    def _track_pages(
+        job: IngestJob, pages: Iterator[Document], cancel_event: threading.Event, on_progress: Callable[[], None]
+    ) -> Iterator[Document]:
+        for page in pages:
+            if cancel_event.is_set():
+                raise IngestCancelled(job.job_id)
+            job.pages_tagged += 1
+            on_progress()
+            yield page
+
+    @staticmethod
+    def _track_chunks(job: IngestJob, chunks: Iterator[Document], on_progress: Callable[[], None]) -> Iterator[Document]:
+        for chunk in chunks:
+            job.chunks_produced += 1
+            on_progress()
+            yield chunk
+
+    @staticmethod
+    def _on_upserted(
+        job: IngestJob, on_progress: Callable[[], None], deduplicator: ChunkDeduplicator = None
+    ) -> Callable[[List[str]], None]:
+        def add(point_ids: List[str]) -> None:
+            job.points_upserted += len(point_ids)
+            if deduplicator:
+                deduplicator.confirm(point_ids)
+            on_progress()
+
+        return add
+
+    @staticmethod
+    def _ingest(
+        config_data: dict,
+        upload_dir: str,
+        job: IngestJob,
+        cancel_event: threading.Event,
+        client: Optional[QdrantClient] = None,
+        llm: Optional[BaseChatModel] = None,
+        on_progress: Callable[[], None] = lambda: None,
+    ) -> int:
+        """
+        Ingest one report: tag its pages, chunk, embed and upsert them, extract the
+        tables of its statement pages, then record it in the manifest. A cancelled job
+        deletes the points it already stored.
+
+        Args:
+            config_data (dict): Configuration loaded from config.yml
+            upload_dir (str): Directory of the uploaded reports
+            job (IngestJob): The job, its counters are updated as it progresses
+            cancel_event (threading.Event): Set when the job is cancelled
+            client (Optional[QdrantClient]): Qdrant client, the configured one when not given
+            llm (Optional[BaseChatModel]): Chat model to tag pages with instead of Groq
+            on_progress (Callable[[], None]): Called after the job counters changed
+
+        Returns:
+            int: Number of points stored for the report
+
+        Raises:
+            IngestCancelled: If the job was cancelled
+        """
+        configurations = config_data['configurations']
+        vector_database_config = configurations["vector_database_config"]
+        tagging_config = configurations["keyword_tagging_config"]
+        jobs_config = configurations["ingest_jobs_config"]
+        report = AnnualReportFile(filename=job.file_name)
+
+        tag_cache = embedding_cache = vector_store = deduplicator = table_store = pages = None
+        try:
+            # SQLite caches are opened in the worker that uses them
+            tag_cache = get_tag_cache(config_data, use_tag_cache=True, clear_tag_cache=False)
+            embedding_cache = get_embedding_cache(config_data)
+            vector_store = get_vector_store(config_data, client=client, embedding_cache=embedding_cache)
+            deduplicator = get_deduplicator(config_data)
+            table_extractor = get_table_extractor(config_data)
+            table_store = get_financial_table_store(config_data)
+            pages = PdfLoader.iter_documents(
+                pdfs_file_path=upload_dir,
+                keywords_list=configurations["content_keywords_list"],
+                model_name=configurations["llm_model_config"]["groq_model"]["model_id"],
+                model_temperature=configurations["llm_model_config"]["groq_model"]["temperature"],
+                batch_size=tagging_config["batch_size"],
+                max_concurrency=tagging_config["max_concurrency"],
+                max_retries=tagging_config["max_retries"],
+                tag_cache=tag_cache,
+                num_workers=jobs_config["pdf_workers"],
+                pages_per_task=configurations["pdf_loading_config"]["pages_per_task"],
+                llm=llm,
+                file_names=[job.file_name],
+                embedding_tagger=get_embedding_tagger(config_data),
+                cleaner=get_cleaner(config_data),
+            )
+
+            vector_store.create_collection(vector_size=vector_database_config["vector_size"])
+            # A new version of a report replaces the points of the previous one. The report
+            # is forgotten by the manifest first, so a failed or cancelled job never leaves
+            # the previous content recorded as ingested once its points are gone.
+            manifest = IngestManifest(jobs_config["manifest_path"])
+            manifest.remove(job.file_name)
+            manifest.close()
+            vector_store.delete_report_points(report.company_name, report.year)
+            tracked_pages = IngestJobQueue._track_pages(job, pages, cancel_event, on_progress)
+            if table_extractor:
+                table_store.remove_report(report.company_name, report.year)
+                tracked_pages = table_extractor.track_pages(tracked_pages)
+            chunks = IngestJobQueue._track_chunks(
+                job, get_chunking(config_data).iter_chunks(tracked_pages), on_progress
+            )
+            if deduplicator:
+                deduplicator.sync(vector_store)
+                deduplicator.remove_report(report.company_name, report.year)
+                chunks = deduplicator.iter_unique(chunks, vector_store.point_id)
+            vector_store.load_data_into_qdrant(
+                all_documents=chunks,
+                vector_size=vector_database_config["vector_size"],
+                batch_size=vector_database_config["upsert_batch_size"],
+                max_concurrent_upserts=vector_database_config["max_concurrent_upserts"],
+                max_request_bytes=vector_database_config["max_request_bytes"],
+                max_retries=vector_database_config["upsert_max_retries"],
+                on_upserted=IngestJobQueue._on_upserted(job, on_progress, deduplicator),
+                on_failed=deduplicator.discard if deduplicator else None,
+            )
+            if cancel_event.is_set():
+                raise IngestCancelled(job.job_id)
+            if deduplicator:
+                job.chunks_dropped = deduplicator.duplicates
+                on_progress()
+                deduplicator.apply_merges(vector_store)
+            if table_extractor:
+                store_financial_tables(table_extractor, table_store)
+
+            num_points = vector_store.count_report_points(report.company_name, report.year)
+            if not num_points:
+                raise RuntimeError("No points were stored for the report")
+            manifest = IngestManifest(jobs_config["manifest_path"])
+            manifest.record(upload_dir, job.file_name, num_points)
+            manifest.close()
+            return num_points
+        except IngestCancelled:
+            vector_store.delete_report_points(report.company_name, report.year)
+            if deduplicator:
+                deduplicator.remove_report(report.company_name, report.year)
+            if table_store:
+                table_store.remove_report(report.company_name, report.year)
+            raise
+        finally:
+            if pages is not None:
+                pages.close()
+            if tag_cache:
+                tag_cache.close()
+            if embedding_cache:
+                embedding_cache.close()
+            if deduplicator:
+                deduplicator.close()
+
+    @staticmethod
+    def _ingest_process(
+        config_data: dict,
+        upload_dir: str,
+        job: IngestJob,
+        cancel_event: threading.Event,
+        llm: Optional[BaseChatModel],
+        nice: int,
+        messages: "multiprocessing.Queue",
+    ) -> None:
+        """
+        Entry point of an ingestion process, see `IngestJobQueue._ingest`. The priority
+        is lowered before any thread is started, so all of them inherit it. The job
+        counters are sent as ("progress", counters) messages at most every
+        PROGRESS_INTERVAL seconds, the outcome as ("completed", num_points),
+        ("cancelled", None) or ("failed", error).
+        """
+        IngestJobQueue._lower_priority(nice)
+        last_report = 0.0
+
+        def report_progress(force: bool = False) -> None:
+            nonlocal last_report
+            if force or time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                messages.put(("progress", job.model_dump(include=PROGRESS_FIELDS)))
+                last_report = time.monotonic()
+
+        try:
+            num_points = IngestJobQueue._ingest(
+                config_data, upload_dir, job, cancel_event, llm=llm, on_progress=report_progress
+            )
+            outcome = ("completed", num_points)
+        except IngestCancelled:
+            outcome = ("cancelled", None)
+        except Exception as e:
+            outcome = ("failed", str(e))
+        report_progress(force=True)
+        messages.put(outcome)
+
+    def _ingest_in_process(self, job: IngestJob) -> int:
+        """
+        Run `IngestJobQueue._ingest` in a child process with a lower priority and relay
+        its progress to the job.
+        """
+        messages = self.context.Queue()
+        # Not a daemon, the PDF worker pool of the job starts processes of its own
+        process = self.context.Process(
+            target=self._ingest_process,
+            args=(
+                self.config_data,
+                self.upload_dir,
+                job,
+                self.cancel_events[job.job_id],
+                self.llm,
+                self.jobs_config["nice"],
+                messages,
+            ),
+            name=f"ingest-{job.job_id}",
+        )
+        process.start()
+        try:
+            while True:
+                try:
+                    kind, payload = messages.get(timeout=1.0)
+                except queue.Empty:
+                    if process.is_alive():
+                        continue
+                    # The outcome may still be in flight when the process exits
+                    try:
+                        kind, payload = messages.get(timeout=1.0)
+                    except queue.Empty:
+                        raise RuntimeError(f"Ingestion process exited with code {process.exitcode}")
+                if kind == "progress":
+                    for field, value in payload.items():
+                        setattr(job, field, value)
+                elif kind == "completed":
+                    return payload
+                elif kind == "cancelled":
+                    raise IngestCancelled(job.job_id)
+                else:
+                    raise RuntimeError(payload)
+        finally:
+            process.join()
+            messages.close()
+
+    def _run(self, job: IngestJob) -> None:
+        """
+        Run a job, in a child process unless `run_in_process` is disabled, then make the
+        report known to the report index and self-query and invalidate cached answers.
+        """
+        job.status, job.started_at = "running", time.time()
+        report = AnnualReportFile(filename=job.file_name)
+        try:
+            if self.run_in_process:
+                num_points = self._ingest_in_process(job)
+            else:
+                num_points = self._ingest(
+                    self.config_data, self.upload_dir, job, self.cancel_events[job.job_id], self.client, self.llm
+                )
+            with self.report_index_lock:
+                update_report_index(self.config_data, [job.file_name], [])
+            bump_ingest_versions(self.config_data, [job.file_name])
+            if self.on_ingested:
+                self.on_ingested(report)
+            job.status = "completed"
+            logger.info(f"Job {job.job_id} ingested {job.file_name}: {num_points} points")
+        except IngestCancelled:
+            bump_ingest_versions(self.config_data, [job.file_name])
+            job.status = "cancelled"
+            logger.info(f"Job {job.job_id} cancelled, its points were deleted")
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            logger.error(f"Job {job.job_id} failed to ingest {job.file_name}: {e}")
+            bump_ingest_versions(self.config_data, [job.file_name])
+        finally:
+            job.finished_at = time.time()
+
+    def shutdown(self) -> None:
+        """
+        Cancel every job and wait for the running ones to stop.
+        """
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+        self.executor.shutdown(wait=True, cancel_futures=True)
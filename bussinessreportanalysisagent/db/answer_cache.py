@@ -0,0 +1,203 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+from bussinessreportanalysisagent.db.ingest_versions import IngestVersions
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    documents: List[Document]
+    vector: np.ndarray
+    scope_key: str
+    versions: Tuple[int, ...]
+    # Seconds the original retrieval and generation took
+    cost_seconds: float
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of generated answers, matched by question embedding similarity.
+    An answer is only reused within the same scope (endpoint, companies, years,
+    keyword) and while the ingest versions of its companies are unchanged, so a newly
+    ingested report invalidates the answers about its company. Entries expire after a
+    TTL and the least recently used ones are evicted beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        versions: IngestVersions,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 86_400,
+        max_entries: int = 5_000,
+    ) -> None:
+        """
+        Args:
+            versions (IngestVersions): Ingest versions of the companies
+            similarity_threshold (float): Minimum cosine similarity between two questions
+                for the cached answer to be reused
+            ttl_seconds (float): Lifetime of an answer
+            max_entries (int): Maximum number of cached answers
+        """
+        self.versions = versions
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self.scopes: Dict[str, List[str]] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def scope_key(
+        endpoint: str,
+        company_names: Optional[List[str]] = None,
+        years: Optional[List[int]] = None,
+        keyword: Optional[str] = None,
+    ) -> str:
+        return json.dumps(
+            {
+                "endpoint": endpoint,
+                "company_names": sorted(company_names or []),
+                "years": sorted(years or []),
+                "keyword": keyword,
+            },
+            sort_keys=True,
+        )
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _remove(self, entry_id: str) -> None:
+        entry = self.entries.pop(entry_id)
+        self.scopes[entry.scope_key].remove(entry_id)
+        if not self.scopes[entry.scope_key]:
+            del self.scopes[entry.scope_key]
+
+    def current_versions(self, company_names: Optional[List[str]]) -> Tuple[int, ...]:
+        """
+        Ingest versions of the companies of a scope, taken before retrieval so an answer
+        is cached with the versions of the data it was generated from.
+
+        Args:
+            company_names (Optional[List[str]]): Companies of the scope
+
+        Returns:
+            Tuple[int, ...]: The versions to pass to `get` and `put`
+        """
+        return self.versions.get(company_names or [])
+
+    def get(self, scope_key: str, versions: Tuple[int, ...], query_vector: List[float]) -> Optional[CachedAnswer]:
+        """
+        Find the cached answer of the most similar question of the scope.
+
+        Args:
+            scope_key (str): Scope of the question, see `scope_key`
+            versions (Tuple[int, ...]): Current ingest versions of the companies of the
+                scope, see `current_versions`, they must match the cached ones
+            query_vector (List[float]): Embedded question
+
+        Returns:
+            Optional[CachedAnswer]: The answer, None when no question is similar enough
+        """
+        start = time.perf_counter()
+        vector = self._normalize(query_vector)
+        with self.lock:
+            now = time.time()
+            for entry_id in list(self.scopes.get(scope_key, [])):
+                entry = self.entries[entry_id]
+                if now - entry.created_at > self.ttl_seconds or entry.versions != versions:
+                    self._remove(entry_id)
+
+            entry_ids = self.scopes.get(scope_key, [])
+            if entry_ids:
+                similarities = np.stack([self.entries[entry_id].vector for entry_id in entry_ids]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry = self.entries[entry_ids[best]]
+                    self.entries.move_to_end(entry_ids[best])
+                    self.hits += 1
+                    self.saved_seconds += entry.cost_seconds - (time.perf_counter() - start)
+                    return entry
+            self.misses += 1
+        return None
+
+    def put(
+        self,
+        scope_key: str,
+        versions: Tuple[int, ...],
+        query_vector: List[float],
+        question: str,
+        answer: str,
+        documents: List[Document],
+        cost_seconds: float,
+    ) -> None:
+        """
+        Cache a generated answer.
+
+        Args:
+            scope_key (str): Scope of the question, see `scope_key`
+            versions (Tuple[int, ...]): Ingest versions of the companies of the scope
+                when the answer's chunks were retrieved, see `current_versions`
+            query_vector (List[float]): Embedded question
+            question (str): The question
+            answer (str): The generated answer
+            documents (List[Document]): Chunks the answer is based on
+            cost_seconds (float): Seconds the retrieval and generation took
+        """
+        entry = CachedAnswer(
+            question=question,
+            answer=answer,
+            documents=documents,
+            vector=self._normalize(query_vector),
+            scope_key=scope_key,
+            versions=versions,
+            cost_seconds=cost_seconds,
+            created_at=time.time(),
+        )
+        with self.lock:
+            entry_id = uuid.uuid4().hex
+            self.entries[entry_id] = entry
+            self.scopes.setdefault(scope_key, []).append(entry_id)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.scopes.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit rate of the cache and the retrieval and generation time it saved.
+        """
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        logger.info(
+            f"Answer cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate), "
+            f"{stats['saved_seconds']:.1f}s saved."
+        )
@@ -0,0 +1,356 @@
+import json
+import os
+import re
+import sqlite3
+import uuid
+import zlib
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class ChunkDeduplicator:
+    """
+    Persistent MinHash/LSH index of the chunks stored in Qdrant, used to drop near-duplicate
+    chunks before they are embedded. Annual reports repeat passages across sections and
+    across the years of a company, so chunks are compared with the other chunks of the
+    same company. A duplicate is not stored; its year and keywords are merged into the
+    point it duplicates, so year and keyword filters still find the passage.
+
+    The signatures of the kept chunks stay pending in memory until their upsert is
+    acknowledged (`confirm`), so a failed upsert (`discard`) never leaves later chunks
+    dropped as duplicates of a point that does not exist.
+
+    Signatures are MinHashes of the word shingles of a chunk, split into LSH bands; chunks
+    sharing a band are candidates, and a candidate whose estimated Jaccard similarity
+    reaches the threshold is a duplicate.
+    """
+
+    def __init__(
+        self,
+        index_path: str,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ) -> None:
+        """
+        Open (or create) the index. An index built with other MinHash parameters is cleared.
+
+        Args:
+            index_path (str): Path of the SQLite file, ":memory:" for a run-only index
+            threshold (float): Estimated Jaccard similarity from which a chunk is a duplicate
+            num_perm (int): Number of MinHash permutations
+            shingle_size (int): Number of words per shingle
+            seed (int): Seed of the permutations
+        """
+        index_dir = os.path.dirname(index_path)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = self._optimal_bands(threshold, num_perm)
+        # Multiply-shift hash functions: (a * x + b) >> 32 with odd a, in wrapping uint64
+        rng = np.random.default_rng(seed)
+        self.perm_a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.perm_b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.band_multipliers = rng.integers(0, 1 << 63, size=(self.bands, self.rows), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        # point id -> year and keywords of its duplicates, written to Qdrant by `apply_merges`
+        self.merges: Dict[str, Dict[str, set]] = {}
+        # point id -> company, years and signature of the kept chunks not yet acknowledged
+        self.pending: Dict[str, dict] = {}
+        # (company, bucket key) -> point ids of the pending chunks
+        self.pending_buckets: Dict[tuple[str, int], set] = {}
+        self.chunks = 0
+        self.duplicates = 0
+
+        self.connection = sqlite3.connect(index_path, timeout=30)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        fingerprint = json.dumps(
+            {"num_perm": num_perm, "shingle_size": shingle_size, "seed": seed, "bands": self.bands}, sort_keys=True
+        )
+        stored = self.connection.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if stored and stored[0] != fingerprint:
+            logger.warning("Dedup index was built with other MinHash parameters, clearing it.")
+            self.connection.execute("DROP TABLE IF EXISTS signatures")
+            self.connection.execute("DROP TABLE IF EXISTS buckets")
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            "point_id TEXT PRIMARY KEY, company_name TEXT NOT NULL, years TEXT NOT NULL, signature BLOB NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (company_name TEXT NOT NULL, bucket INTEGER NOT NULL, point_id TEXT NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (company_name, bucket)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS buckets_point ON buckets (point_id)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS signatures_company ON signatures (company_name)")
+        self.connection.commit()
+
+    @staticmethod
+    def _optimal_bands(threshold: float, num_perm: int) -> tuple[int, int]:
+        """
+        Number of bands and rows per band whose LSH threshold (1 / bands) ** (1 / rows)
+        is closest below the Jaccard threshold; candidates are verified afterwards, so
+        recall is preferred.
+        """
+        options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+        below = [option for option in options if (1 / option[0]) ** (1 / option[1]) <= threshold]
+        return max(below or options, key=lambda option: (1 / option[0]) ** (1 / option[1]))
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        """
+        32-bit hashes of the distinct word shingles of a text, rolled from the word hashes.
+        """
+        words = WORD_PATTERN.findall(text.lower()) or [""]
+        word_hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words))
+        size = min(self.shingle_size, len(words))
+        hashes = np.zeros(len(words) - size + 1, dtype=np.uint64)
+        for offset in range(size):
+            hashes = hashes * np.uint64(1_000_003) + word_hashes[offset : offset + len(hashes)]
+        return np.unique(hashes & np.uint64(0xFFFFFFFF))
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """
+        MinHash signatures of the word shingles of several texts, computed in one pass.
+
+        Returns:
+            np.ndarray: uint32 array of shape (len(texts), num_perm)
+        """
+        shingle_hashes = [self._shingle_hashes(text) for text in texts]
+        offsets = np.cumsum([0] + [len(hashes) for hashes in shingle_hashes[:-1]])
+        permuted = (np.outer(self.perm_a, np.concatenate(shingle_hashes)) + self.perm_b[:, None]) >> np.uint64(32)
+        return np.minimum.reduceat(permuted, offsets, axis=1).T.astype(np.uint32)
+
+    def _bucket_keys(self, signature: np.ndarray) -> List[int]:
+        """
+        One 64-bit key per LSH band, a random linear hash of the band's values.
+        """
+        band_values = signature.reshape(self.bands, self.rows).astype(np.uint64)
+        return (band_values * self.band_multipliers).sum(axis=1).view(np.int64).tolist()
+
+    def find_duplicate(self, company_name: str, signature: np.ndarray) -> Optional[str]:
+        """
+        Point id of the most similar indexed or pending chunk of the company, None when no
+        chunk reaches the threshold.
+        """
+        bucket_keys = self._bucket_keys(signature)
+        placeholders = ", ".join("?" * len(bucket_keys))
+        rows = self.connection.execute(
+            "SELECT point_id, signature FROM signatures WHERE point_id IN ("
+            f"SELECT point_id FROM buckets WHERE company_name = ? AND bucket IN ({placeholders}))",
+            (company_name, *bucket_keys),
+        ).fetchall()
+        pending_ids = set()
+        for bucket_key in bucket_keys:
+            pending_ids.update(self.pending_buckets.get((company_name, bucket_key), ()))
+        rows += [(point_id, self.pending[point_id]["signature"]) for point_id in pending_ids]
+        if not rows:
+            return None
+        candidates = np.stack([np.frombuffer(blob, dtype=np.uint32) for _, blob in rows])
+        similarities = (candidates == signature).mean(axis=1)
+        best = int(np.argmax(similarities))
+        return rows[best][0] if similarities[best] >= self.threshold else None
+
+    def _other_years(self, point_id: str, year: int) -> bool:
+        """
+        Whether a point id is owned by another year of the company, e.g. a chunk that
+        survived as the merged point of several years.
+        """
+        if point_id in self.pending:
+            years = self.pending[point_id]["years"]
+        else:
+            row = self.connection.execute("SELECT years FROM signatures WHERE point_id = ?", (point_id,)).fetchone()
+            years = json.loads(row[0]) if row else []
+        return any(stored_year != year for stored_year in years)
+
+    def add(self, point_id: str, company_name: str, years: List[int], signature: bytes) -> None:
+        self.connection.execute("DELETE FROM buckets WHERE point_id = ?", (point_id,))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?)",
+            (point_id, company_name, json.dumps(sorted(years)), signature),
+        )
+        self.connection.executemany(
+            "INSERT INTO buckets VALUES (?, ?, ?)",
+            [
+                (company_name, bucket_key, point_id)
+                for bucket_key in self._bucket_keys(np.frombuffer(signature, dtype=np.uint32))
+            ],
+        )
+
+    def _add_pending(self, point_id: str, company_name: str, year: int, signature: np.ndarray) -> None:
+        self.pending[point_id] = {"company_name": company_name, "years": [year], "signature": signature.tobytes()}
+        for bucket_key in self._bucket_keys(signature):
+            self.pending_buckets.setdefault((company_name, bucket_key), set()).add(point_id)
+
+    def _drop_pending(self, point_id: str) -> Optional[dict]:
+        entry = self.pending.pop(point_id, None)
+        if entry:
+            for bucket_key in self._bucket_keys(np.frombuffer(entry["signature"], dtype=np.uint32)):
+                bucket = self.pending_buckets.get((entry["company_name"], bucket_key))
+                if bucket:
+                    bucket.discard(point_id)
+                    if not bucket:
+                        del self.pending_buckets[(entry["company_name"], bucket_key)]
+        return entry
+
+    def confirm(self, point_ids: List[str]) -> None:
+        """
+        Index the pending chunks of acknowledged points, e.g. as the `on_upserted`
+        callback of `QdrantVectorStore.bulk_insert_documents`.
+        """
+        for point_id in point_ids:
+            entry = self._drop_pending(str(point_id))
+            if entry:
+                self.add(str(point_id), entry["company_name"], entry["years"], entry["signature"])
+        self.connection.commit()
+
+    def discard(self, point_ids: List[str]) -> None:
+        """
+        Forget the pending chunks of points that could not be stored, e.g. as the
+        `on_failed` callback of `QdrantVectorStore.bulk_insert_documents`. The duplicates
+        merged into them are lost with them.
+        """
+        merged = 0
+        for point_id in map(str, point_ids):
+            if self._drop_pending(point_id) and self.merges.pop(point_id, None):
+                merged += 1
+        if merged:
+            logger.warning(f"Dedup: the duplicates merged into {merged} failed points were not stored.")
+
+    def _merge(self, point_id: str, year: int, keywords: List[str]) -> None:
+        if point_id in self.pending:
+            years = self.pending[point_id]["years"]
+            if year not in years:
+                years.append(year)
+        else:
+            years = json.loads(
+                self.connection.execute("SELECT years FROM signatures WHERE point_id = ?", (point_id,)).fetchone()[0]
+            )
+            if year not in years:
+                self.connection.execute(
+                    "UPDATE signatures SET years = ? WHERE point_id = ?", (json.dumps(sorted(years + [year])), point_id)
+                )
+        merge = self.merges.setdefault(point_id, {"years": set(), "keywords": set()})
+        merge["years"].add(year)
+        merge["keywords"].update(keywords)
+
+    def iter_unique(
+        self, chunks: Iterable[Document], point_id: Callable[[dict], str], batch_size: int = 64
+    ) -> Iterator[Document]:
+        """
+        Lazily drop the near-duplicate chunks of a stream. The others get their point id
+        set and are kept pending until `confirm` indexes them. A point id already owned by
+        another year (a merged point) is replaced by a random one, so the chunk does not
+        overwrite the passage of that year.
+
+        Args:
+            chunks (Iterable[Document]): Chunks carrying the report metadata
+            point_id (Callable[[dict], str]): Point id of a chunk from its metadata, e.g. `QdrantVectorStore.point_id`
+            batch_size (int): Number of chunks whose signatures are computed together
+
+        Yields:
+            Document: The chunks that are not near-duplicates of a stored or earlier chunk,
+                with their `id` set
+        """
+        chunks = iter(chunks)
+        while batch := list(islice(chunks, batch_size)):
+            for chunk, signature in zip(batch, self.signatures([chunk.page_content for chunk in batch])):
+                self.chunks += 1
+                company_name, year = chunk.metadata.get("Company_Name"), chunk.metadata.get("Year")
+                if company_name is None or year is None:
+                    yield chunk
+                    continue
+                duplicate_of = self.find_duplicate(company_name, signature)
+                if duplicate_of is None:
+                    chunk_id = chunk.id or point_id(chunk.metadata)
+                    if self._other_years(chunk_id, year):
+                        chunk_id = str(uuid.uuid4())
+                    chunk.id = chunk_id
+                    self._add_pending(chunk_id, company_name, year, signature)
+                    yield chunk
+                    continue
+                self.duplicates += 1
+                self._merge(duplicate_of, year, chunk.metadata.get("keywords", []))
+        self.connection.commit()
+
+    def apply_merges(self, vector_store) -> None:
+        """
+        Add the years and keywords of the dropped duplicates to the payload of the points
+        they duplicate, once those points are stored.
+
+        Args:
+            vector_store (QdrantVectorStore): Store holding the points
+        """
+        if not self.merges:
+            return
+        point_ids = list(self.merges)
+        for start in range(0, len(point_ids), 256):
+            points = vector_store.client.retrieve(
+                collection_name=vector_store.collection_name,
+                ids=point_ids[start : start + 256],
+                with_payload=["Year", "keywords"],
+            )
+            for point in points:
+                merge = self.merges[str(point.id)]
+                stored_years = point.payload.get("Year")
+                stored_years = stored_years if isinstance(stored_years, list) else [stored_years]
+                years = sorted(set(stored_years) | merge["years"])
+                keywords = sorted(set(point.payload.get("keywords") or []) | merge["keywords"])
+                vector_store.client.set_payload(
+                    collection_name=vector_store.collection_name,
+                    payload={"Year": years if len(years) > 1 else years[0], "keywords": keywords},
+                    points=[point.id],
+                )
+        logger.info(f"Merged the metadata of {self.duplicates} duplicate chunks into {len(self.merges)} points.")
+        self.merges.clear()
+
+    def sync(self, vector_store) -> None:
+        """
+        Clear the index when the collection it describes is missing or empty, e.g. after
+        it was recreated, so chunks are not dropped as duplicates of deleted points.
+        """
+        if vector_store.client.collection_exists(vector_store.collection_name) and vector_store.client.count(
+            collection_name=vector_store.collection_name, exact=False
+        ).count:
+            return
+        if self.connection.execute("SELECT 1 FROM signatures LIMIT 1").fetchone():
+            logger.warning(f"Collection '{vector_store.collection_name}' is empty, clearing the dedup index.")
+            self.connection.execute("DELETE FROM signatures")
+            self.connection.execute("DELETE FROM buckets")
+            self.connection.commit()
+
+    def remove_report(self, company_name: str, year: int) -> None:
+        """
+        Forget a report whose points were deleted: its year is removed from the merged
+        chunks, and the chunks of no other year are dropped from the index.
+        """
+        rows = self.connection.execute(
+            "SELECT point_id, years FROM signatures WHERE company_name = ?", (company_name,)
+        ).fetchall()
+        for point_id, years in rows:
+            years = json.loads(years)
+            if year not in years:
+                continue
+            years.remove(year)
+            if years:
+                self.connection.execute("UPDATE signatures SET years = ? WHERE point_id = ?", (json.dumps(years), point_id))
+            else:
+                self.connection.execute("DELETE FROM signatures WHERE point_id = ?", (point_id,))
+                self.connection.execute("DELETE FROM buckets WHERE point_id = ?", (point_id,))
+        self.connection.commit()
+
+    def log_stats(self) -> None:
+        share = self.duplicates / self.chunks if self.chunks else 0.0
+        logger.info(f"Dedup: {self.duplicates} of {self.chunks} chunks dropped as near-duplicates ({share:.1%}).")
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import sqlite3
+import time
+from typing import List
+
+import numpy as np
+from loguru import logger
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of chunk embeddings keyed by (model, runtime, sha256(chunk_text)), so
+    the vectors of a torch and an ONNX (e.g. int8 quantized) runtime are never mixed.
+    Vectors live in a memory-mapped float32 matrix with one row per slot, and a SQLite
+    index maps each text hash to its slot. When every slot is taken, the least recently
+    used entries are evicted and their slots reused.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_id: str,
+        max_entries: int = 200_000,
+        backend: str = "torch",
+        onnx_file_name: str = None,
+    ) -> None:
+        """
+        Open (or create) the cache of a model. A cache created with another max_entries
+        is grown in place, or cleared when it has more slots than max_entries.
+
+        Args:
+            cache_dir (str): Directory holding the caches of every model.
+            model_id (str): Embedding model id, each model gets its own matrix.
+            max_entries (int, optional): Maximum number of cached vectors. Defaults to 200_000.
+            backend (str, optional): Runtime of the model, "torch" or "onnx". Defaults to "torch".
+            onnx_file_name (str, optional): ONNX file of the model, e.g. a quantized one.
+                Defaults to None.
+        """
+        # The torch runtime keeps the key of the caches created before runtimes were keyed
+        cache_key = model_id if backend == "torch" and not onnx_file_name else f"{model_id}|{backend}|{onnx_file_name}"
+        model_hash = hashlib.sha256(cache_key.encode("utf-8")).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir, model_hash)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.matrix = None
+
+        self.connection = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite"))
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "text_hash TEXT PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, last_access REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self.connection.commit()
+
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'vector_size'").fetchone()
+        if row is not None:
+            self._open_matrix(vector_size=row[0])
+
+    def _open_matrix(self, vector_size: int) -> None:
+        """
+        Map the vector matrix, resized to max_entries rows when the cache was created with
+        another capacity.
+        """
+        matrix_path = os.path.join(self.cache_dir, "vectors.f32")
+        if os.path.exists(matrix_path):
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'capacity'").fetchone()
+            capacity = row[0] if row else os.path.getsize(matrix_path) // (4 * vector_size)
+            if capacity > self.max_entries:
+                logger.warning(
+                    f"Embedding cache '{self.cache_dir}' has {capacity} slots, more than max_entries "
+                    f"{self.max_entries}, clearing it."
+                )
+                self.connection.execute("DELETE FROM embeddings")
+                os.remove(matrix_path)
+            elif capacity < self.max_entries:
+                # Used slots are kept, the new ones are appended
+                os.truncate(matrix_path, 4 * vector_size * self.max_entries)
+                logger.info(f"Embedding cache '{self.cache_dir}' grown from {capacity} to {self.max_entries} slots.")
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('capacity', ?)", (self.max_entries,))
+        self.connection.commit()
+        self.matrix = np.memmap(
+            matrix_path,
+            dtype=np.float32,
+            mode="r+" if os.path.exists(matrix_path) else "w+",
+            shape=(self.max_entries, vector_size),
+        )
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> tuple[list[int], np.ndarray]:
+        """
+        Look up cached vectors.
+
+        Args:
+            texts (List[str]): Texts to look up.
+
+        Returns:
+            tuple[list[int], np.ndarray]: Indexes of the texts found in the cache and their
+                vectors, in the same order.
+        """
+        hit_indexes, slots = [], []
+        if self.matrix is not None:
+            for index, text in enumerate(texts):
+                row = self.connection.execute(
+                    "SELECT slot FROM embeddings WHERE text_hash = ?", (self._text_hash(text),)
+                ).fetchone()
+                if row is not None:
+                    hit_indexes.append(index)
+                    slots.append(row[0])
+
+        self.hits += len(hit_indexes)
+        self.misses += len(texts) - len(hit_indexes)
+        if not slots:
+            return [], np.empty((0, 0), dtype=np.float32)
+
+        self.connection.executemany(
+            "UPDATE embeddings SET last_access = ? WHERE slot = ?",
+            [(time.time(), slot) for slot in slots],
+        )
+        self.connection.commit()
+        return hit_indexes, np.asarray(self.matrix[slots])
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        Store vectors, evicting the least recently used entries when the cache is full.
+
+        Args:
+            texts (List[str]): Texts that were embedded.
+            vectors (np.ndarray): Their vectors, one row per text.
+        """
+        if not texts:
+            return
+        if self.matrix is None:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('vector_size', ?)", (vectors.shape[1],)
+            )
+            self._open_matrix(vector_size=vectors.shape[1])
+
+        # Deduplicate and skip texts that are already cached
+        new_entries = {}
+        for text, vector in zip(texts, vectors):
+            text_hash = self._text_hash(text)
+            if text_hash not in new_entries and self.connection.execute(
+                "SELECT 1 FROM embeddings WHERE text_hash = ?", (text_hash,)
+            ).fetchone() is None:
+                new_entries[text_hash] = vector
+        new_entries = list(new_entries.items())[-self.max_entries :]
+        if not new_entries:
+            return
+
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        free_slots = list(range(count, min(count + len(new_entries), self.max_entries)))
+        overflow = len(new_entries) - len(free_slots)
+        if overflow > 0:
+            evicted = self.connection.execute(
+                "SELECT text_hash, slot FROM embeddings ORDER BY last_access ASC LIMIT ?", (overflow,)
+            ).fetchall()
+            self.connection.executemany(
+                "DELETE FROM embeddings WHERE text_hash = ?", [(text_hash,) for text_hash, _ in evicted]
+            )
+            free_slots.extend(slot for _, slot in evicted)
+            logger.debug(f"Evicted {overflow} entries from embedding cache.")
+
+        now = time.time()
+        self.matrix[free_slots] = np.stack([vector for _, vector in new_entries])
+        self.matrix.flush()
+        self.connection.executemany(
+            "INSERT INTO embeddings (text_hash, slot, last_access) VALUES (?, ?, ?)",
+            [(text_hash, slot, now) for (text_hash, _), slot in zip(new_entries, free_slots)],
+        )
+        self.connection.commit()
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        self.connection.execute("DELETE FROM embeddings")
+        self.connection.commit()
+        logger.info(f"Embedding cache '{self.cache_dir}' cleared.")
+
+    def log_stats(self) -> None:
+        """
+        Log the hit/miss counters of the cache.
+        """
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        logger.info(
+            f"Embedding cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1%} hit rate)."
+        )
+
+    def close(self) -> None:
+        if self.matrix is not None:
+            self.matrix.flush()
+        self.connection.close()
@@ -1,9 +1,28 @@
 import os
-from typing import List
+from typing import Dict, List, Optional
 
 import google.generativeai as gemini_client
+import numpy as np
 from google.generativeai.embedding import embed_content
-# from sentence_transformers import SentenceTransformer
+from loguru import logger
+
+from bussinessreportanalysisagent.db.embedding_cache import EmbeddingCache
+from bussinessreportanalysisagent.metrics import metrics, text_bytes
+from bussinessreportanalysisagent.models.models import LLMModel
+
+
+class EmbeddingError(Exception):
+    """
+    Raised when some texts of a batch could not be embedded.
+    `failures` maps the index of each failed text to its error, and `embeddings` holds
+    the vectors of the texts that succeeded (failed rows are NaN, None if all failed).
+    """
+
+    def __init__(self, failures: Dict[int, str], embeddings: Optional[np.ndarray]) -> None:
+        self.failures = failures
+        self.embeddings = embeddings
+        details = "; ".join(f"text {index}: {error}" for index, error in list(failures.items())[:5])
+        super().__init__(f"Failed to embed {len(failures)} text(s): {details}")
 
 
 class VectorEmbeddings:
@@ -12,28 +31,132 @@ class VectorEmbeddings:
     Currently supports Gemini and SentenceTransformers.
     """
 
-    def __init__(self, model_id: str) -> None:
+    def __init__(self, model_id: str, model_kwargs: dict = None, cache: EmbeddingCache = None) -> None:
+        """
+        Args:
+            model_id: Gemini model id ("models/...") or SentenceTransformers model id
+            model_kwargs: Runtime options of the local model (backend, onnx_file_name,
+                num_threads, local_files_only), see `LLMModel.get_sentence_transformer_model`
+            cache: On-disk embedding cache consulted by `get_embeddings` before calling the model
+        """
         gemini_client.configure(api_key=os.getenv("GEMINI_API_KEY"))
         self.model_id = model_id
-        # Initialize sentence transformer model if needed
-        # if not model_id.startswith("models/"):
-        #     self.sentence_model = SentenceTransformer(model_id)
+        self.cache = cache
+        # Initialize sentence transformer model if needed, shared with the chunker
+        if not model_id.startswith("models/"):
+            self.sentence_model = LLMModel.get_sentence_transformer_model(model_id, **(model_kwargs or {}))
 
     def get_embedding(self, text: str) -> List[float]:
         """
         Generate embeddings using either Gemini or SentenceTransformers based on model_id.
-        
+
         Args:
             text: Text to embed
-            
+
+        Returns:
+            Embedding vector of the text
+
+        Raises:
+            EmbeddingError: If the text could not be embedded
+        """
+        with metrics.track("query_embedding", 1, text_bytes([text])):
+            # Determine which API to use based on model_id prefix
+            if self.model_id.startswith("models/"):
+                return self._gemini_embedding(text)
+            return self._sentence_transformer_embedding(text)
+
+    def get_embeddings(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Generate embeddings for many texts, one model call per batch.
+
+        Args:
+            texts: Texts to embed
+            batch_size: Number of texts sent to the model per call (Gemini accepts at most 100)
+
         Returns:
-            List of embedding vectors or empty list if error occurs
+            Contiguous float32 array of shape (len(texts), vector_size)
+
+        Raises:
+            EmbeddingError: If some texts could not be embedded, with the error of each one
         """
-        # Determine which API to use based on model_id prefix
-        if self.model_id.startswith("models/"):
-            return self._gemini_embedding(text)
-        # else:
-        #     return self._sentence_transformer_embedding(text)
+        if self.cache is None:
+            return self._embed_texts(texts, batch_size)
+
+        hit_indexes, cached_vectors = self.cache.get_many(texts)
+        hits = set(hit_indexes)
+        miss_indexes = [index for index in range(len(texts)) if index not in hits]
+        if not miss_indexes:
+            return np.ascontiguousarray(cached_vectors)
+
+        failures = {}
+        try:
+            computed_vectors = self._embed_texts([texts[index] for index in miss_indexes], batch_size)
+        except EmbeddingError as e:
+            computed_vectors = e.embeddings
+            failures = {miss_indexes[index]: error for index, error in e.failures.items()}
+        if computed_vectors is None and not hit_indexes:
+            raise EmbeddingError(failures, None)
+
+        vector_size = cached_vectors.shape[1] if hit_indexes else computed_vectors.shape[1]
+        embeddings = np.full((len(texts), vector_size), np.nan, dtype=np.float32)
+        if hit_indexes:
+            embeddings[hit_indexes] = cached_vectors
+        if computed_vectors is not None:
+            embeddings[miss_indexes] = computed_vectors
+            embedded = [position for position, index in enumerate(miss_indexes) if index not in failures]
+            self.cache.put_many([texts[miss_indexes[position]] for position in embedded], computed_vectors[embedded])
+
+        if failures:
+            raise EmbeddingError(failures, embeddings)
+        return embeddings
+
+    def _embed_texts(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Embed texts with the model, see `get_embeddings`.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        with metrics.track("embedding", len(texts), text_bytes(texts)) as span:
+            embeddings, failures = self._embed_batches(texts, batch_size)
+            span.errors = len(failures)
+        if failures:
+            raise EmbeddingError(failures, embeddings)
+        return embeddings
+
+    def _embed_batches(self, texts: List[str], batch_size: int) -> tuple[Optional[np.ndarray], Dict[int, str]]:
+        """
+        Embed texts batch by batch, retrying the texts of a failed batch one by one.
+
+        Returns:
+            tuple[Optional[np.ndarray], Dict[int, str]]: The embeddings (NaN rows for the
+                failed texts, None when all failed) and the error of each failed text
+        """
+        embed_batch = (
+            self._gemini_embeddings
+            if self.model_id.startswith("models/")
+            else self._sentence_transformer_embeddings
+        )
+        embeddings = None
+        failures = {}
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start : start + batch_size]
+            try:
+                rows = [(start, embed_batch(batch))]
+            except Exception:
+                # Retry the texts one by one to find out which ones fail
+                rows = []
+                for index, text in enumerate(batch, start):
+                    try:
+                        rows.append((index, embed_batch([text])))
+                    except Exception as e:
+                        failures[index] = f"{type(e).__name__}: {e}"
+
+            for index, vectors in rows:
+                if embeddings is None:
+                    embeddings = np.full((len(texts), vectors.shape[1]), np.nan, dtype=np.float32)
+                embeddings[index : index + len(vectors)] = vectors
+        return embeddings, failures
 
     def _gemini_embedding(self, text: str) -> List[float]:
         """
@@ -44,17 +167,32 @@ class VectorEmbeddings:
             return response["embedding"]
 
         except Exception as e:
-            print(f"Error generating Gemini embedding: {e}")
-            return []
-
-    # def _sentence_transformer_embedding(self, text: str) -> List[float]:
-    #     """
-    #     Generate embeddings using SentenceTransformers.
-    #     """
-    #     try:
-    #         embedding = self.sentence_model.encode(text)
-    #         return embedding.tolist()
-
-    #     except Exception as e:
-    #         print(f"Error generating SentenceTransformer embedding: {e}")
-    #         return []
+            logger.error(f"Error generating Gemini embedding: {e}")
+            raise EmbeddingError({0: f"{type(e).__name__}: {e}"}, None) from e
+
+    def _gemini_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a batch of texts with a single Gemini batch request.
+        """
+        response = embed_content(content=texts, model=self.model_id)
+        return np.asarray(response["embedding"], dtype=np.float32)
+
+    def _sentence_transformer_embedding(self, text: str) -> List[float]:
+        """
+        Generate embeddings using SentenceTransformers.
+        """
+        try:
+            embedding = self.sentence_model.encode(text)
+            return embedding.tolist()
+
+        except Exception as e:
+            logger.error(f"Error generating SentenceTransformer embedding: {e}")
+            raise EmbeddingError({0: f"{type(e).__name__}: {e}"}, None) from e
+
+    def _sentence_transformer_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a batch of texts with a single SentenceTransformers encode call.
+        """
+        return self.sentence_model.encode(
+            texts, batch_size=len(texts), convert_to_numpy=True
+        ).astype(np.float32, copy=False)
@@ -0,0 +1,131 @@
+import os
+import re
+from typing import List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from bussinessreportanalysisagent.application.preprocessing.table_extraction import COLUMNS, FinancialTableExtractor
+
+YEAR_TOKEN_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+YEAR_RANGE_PATTERN = re.compile(
+    r"\b(?P<start>(?:19|20)\d{2})\s*(?:-|–|—|to|until|through)\s*(?P<stop>(?:19|20)\d{2})\b"
+    r"|\bbetween\s+(?P<between_start>(?:19|20)\d{2})\s+and\s+(?P<between_stop>(?:19|20)\d{2})\b"
+)
+
+
+class FinancialTableStore:
+    """
+    Columnar store of the financial statement line items, one Parquet file per report
+    (`<company>_<year>.parquet`) so a re-ingested report only rewrites its own file.
+    Readers load every file into a single DataFrame with categorical company and line
+    item columns, reloaded only when a file changed, and answer trend queries with
+    vectorized filters instead of retrieval and the LLM.
+
+    Annual reports restate the previous years, so a fiscal year is usually found in
+    several reports; the figure of the latest report wins.
+    """
+
+    def __init__(self, store_dir: str) -> None:
+        """
+        Args:
+            store_dir (str): Directory of the Parquet files
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self.signature = None
+        self.frame = pd.DataFrame(columns=COLUMNS)
+
+    def _report_path(self, company_name: str, year: int) -> str:
+        return os.path.join(self.store_dir, f"{company_name}_{year}.parquet")
+
+    def write_report(self, company_name: str, year: int, line_items: pd.DataFrame) -> None:
+        """
+        Replace the line items of a report, atomically so a concurrent reader never sees
+        a partial file. A report without line items removes its file.
+        """
+        if line_items.empty:
+            self.remove_report(company_name, year)
+            return
+        path = self._report_path(company_name, year)
+        line_items.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+        logger.info(f"Stored {len(line_items)} line items of {company_name} {year}")
+
+    def remove_report(self, company_name: str, year: int) -> None:
+        try:
+            os.remove(self._report_path(company_name, year))
+        except FileNotFoundError:
+            pass
+
+    def load(self) -> pd.DataFrame:
+        """
+        Line items of every report, read again only when a Parquet file was added,
+        replaced or removed since the last call.
+        """
+        entries = sorted(
+            (entry.name, entry.stat().st_mtime_ns)
+            for entry in os.scandir(self.store_dir)
+            if entry.name.endswith(".parquet")
+        )
+        if entries != self.signature:
+            frames = [pd.read_parquet(os.path.join(self.store_dir, name)) for name, _ in entries]
+            frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+            frame = frame.astype({"company_name": "category", "line_item": "category", "statement": "category"})
+            self.frame, self.signature = frame, entries
+        return self.frame
+
+    @staticmethod
+    def parse_years(query: str) -> List[int]:
+        """
+        Years of a query, with ranges such as "2019-2023" expanded.
+        """
+        years = {int(token) for token in YEAR_TOKEN_PATTERN.findall(query)}
+        for year_range in YEAR_RANGE_PATTERN.finditer(query):
+            start = year_range.group("start") or year_range.group("between_start")
+            stop = year_range.group("stop") or year_range.group("between_stop")
+            years.update(range(int(start), int(stop) + 1))
+        return sorted(years)
+
+    def match_line_item(self, query: str) -> Optional[str]:
+        """
+        Longest known line item contained in the query, e.g. "net debt" in
+        "net debt 2019-2023".
+        """
+        text = f" {FinancialTableExtractor.normalize_line_item(query)} "
+        matches = [line_item for line_item in self.load()["line_item"].cat.categories if f" {line_item} " in text]
+        return max(matches, key=len) if matches else None
+
+    def trend(
+        self,
+        query: str,
+        company_names: Optional[List[str]] = None,
+        years: Optional[List[int]] = None,
+    ) -> tuple[Optional[str], pd.DataFrame]:
+        """
+        Figures of a line item over the years, e.g. "net debt 2019-2023".
+
+        Args:
+            query (str): Line item, with the years when `years` is not given
+            company_names (Optional[List[str]]): Only these companies, defaults to all
+            years (Optional[List[int]]): Fiscal years, defaults to the years of the query
+                and to every year when it has none
+
+        Returns:
+            tuple[Optional[str], pd.DataFrame]: The matched line item (None when no line
+                item matches) and one row per company and fiscal year, sorted by both
+        """
+        frame = self.load()
+        line_item = self.match_line_item(query)
+        if line_item is None:
+            return None, frame.iloc[:0]
+        years = years or self.parse_years(query)
+
+        mask = (frame["line_item"] == line_item).to_numpy()
+        if company_names:
+            mask = mask & frame["company_name"].isin(company_names).to_numpy()
+        if years:
+            mask = mask & frame["fiscal_year"].isin(years).to_numpy()
+        figures = frame[mask].sort_values(["report_year", "page"], ascending=[False, True], kind="stable")
+        figures = figures.drop_duplicates(["company_name", "fiscal_year"]).sort_values(["company_name", "fiscal_year"])
+        return line_item, figures.reset_index(drop=True)
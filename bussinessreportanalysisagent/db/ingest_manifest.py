@@ -0,0 +1,127 @@
+import hashlib
+import os
+import sqlite3
+from typing import Optional
+
+from loguru import logger
+
+
+class IngestManifest:
+    """
+    SQLite manifest of the reports already ingested into Qdrant, with the file size,
+    modification time and content hash of each one, so incremental runs only process
+    new or changed reports.
+    """
+
+    def __init__(self, manifest_path: str) -> None:
+        """
+        Open (or create) the manifest.
+
+        Args:
+            manifest_path (str): Path of the SQLite file.
+        """
+        manifest_dir = os.path.dirname(manifest_path)
+        if manifest_dir:
+            os.makedirs(manifest_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(manifest_path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS ingested_files ("
+            "file_name TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+            "content_hash TEXT NOT NULL, num_points INTEGER NOT NULL)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                sha256.update(block)
+        return sha256.hexdigest()
+
+    def diff(self, pdfs_file_path: str) -> tuple[list[str], list[str]]:
+        """
+        Compare a directory against the manifest. Files whose size and modification time
+        are unchanged are skipped without being read; the others are hashed so a touched
+        but identical file is not reprocessed.
+
+        Args:
+            pdfs_file_path (str): Path to the directory containing the pdf files.
+
+        Returns:
+            tuple[list[str], list[str]]: Names of the new or changed files, and names of the
+                files in the manifest that are no longer in the directory.
+        """
+        known_files = {
+            file_name: (size, mtime, content_hash)
+            for file_name, size, mtime, content_hash in self.connection.execute(
+                "SELECT file_name, size, mtime, content_hash FROM ingested_files"
+            )
+        }
+        changed = []
+        present = set()
+        for file_name in sorted(os.listdir(pdfs_file_path)):
+            if not file_name.endswith(".pdf"):
+                continue
+            present.add(file_name)
+            file_path = os.path.join(pdfs_file_path, file_name)
+            stat = os.stat(file_path)
+            known = known_files.get(file_name)
+            if known and known[:2] == (stat.st_size, stat.st_mtime):
+                continue
+            if known and known[2] == self.file_hash(file_path):
+                self.connection.execute(
+                    "UPDATE ingested_files SET size = ?, mtime = ? WHERE file_name = ?",
+                    (stat.st_size, stat.st_mtime, file_name),
+                )
+                continue
+            changed.append(file_name)
+        self.connection.commit()
+
+        removed = sorted(set(known_files) - present)
+        logger.info(
+            f"Ingest manifest: {len(changed)} new or changed, {len(removed)} removed, "
+            f"{len(present) - len(changed)} unchanged reports."
+        )
+        return changed, removed
+
+    def record(self, pdfs_file_path: str, file_name: str, num_points: int) -> None:
+        """
+        Record a report as ingested.
+
+        Args:
+            pdfs_file_path (str): Path to the directory containing the pdf file.
+            file_name (str): Name of the pdf file.
+            num_points (int): Number of points stored in Qdrant for the report.
+        """
+        file_path = os.path.join(pdfs_file_path, file_name)
+        stat = os.stat(file_path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO ingested_files (file_name, size, mtime, content_hash, num_points) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (file_name, stat.st_size, stat.st_mtime, self.file_hash(file_path), num_points),
+        )
+        self.connection.commit()
+
+    def find_by_hash(self, content_hash: str) -> Optional[tuple[str, int]]:
+        """
+        Look up an ingested file by content hash.
+
+        Returns:
+            Optional[tuple[str, int]]: Name of the file and its number of points, None when
+                no ingested file has this content.
+        """
+        return self.connection.execute(
+            "SELECT file_name, num_points FROM ingested_files WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+
+    def remove(self, file_name: str) -> None:
+        """
+        Forget a report, e.g. after its points were deleted from Qdrant.
+        """
+        self.connection.execute("DELETE FROM ingested_files WHERE file_name = ?", (file_name,))
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,65 @@
+import os
+import sqlite3
+import threading
+from typing import Iterable, Tuple
+
+# Counter bumped by every ingestion, whatever the company
+ALL_COMPANIES = "*"
+
+
+class IngestVersions:
+    """
+    SQLite counters of the report ingestions of each company, shared by the ETL pipeline
+    and the API processes. A cached answer remembers the versions it was generated with
+    and is stale once one of them moved.
+    """
+
+    def __init__(self, versions_path: str) -> None:
+        """
+        Open (or create) the counters.
+
+        Args:
+            versions_path (str): Path of the SQLite file.
+        """
+        versions_dir = os.path.dirname(versions_path)
+        if versions_dir:
+            os.makedirs(versions_dir, exist_ok=True)
+
+        # Used from the API thread pool, access is serialized by the lock
+        self.connection = sqlite3.connect(versions_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS ingest_versions (company_name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            self.connection.commit()
+
+    def bump(self, company_names: Iterable[str]) -> None:
+        """
+        Record that reports of these companies were ingested or removed.
+        """
+        with self.lock:
+            self.connection.executemany(
+                "INSERT INTO ingest_versions (company_name, version) VALUES (?, 1) "
+                "ON CONFLICT(company_name) DO UPDATE SET version = version + 1",
+                [(company_name,) for company_name in sorted(set(company_names)) + [ALL_COMPANIES]],
+            )
+            self.connection.commit()
+
+    def get(self, company_names: Iterable[str] = ()) -> Tuple[int, ...]:
+        """
+        Current versions of some companies, or of the whole collection when none is given.
+        """
+        company_names = sorted(set(company_names)) or [ALL_COMPANIES]
+        with self.lock:
+            versions = dict(
+                self.connection.execute(
+                    f"SELECT company_name, version FROM ingest_versions "
+                    f"WHERE company_name IN ({', '.join('?' * len(company_names))})",
+                    company_names,
+                ).fetchall()
+            )
+        return tuple(versions.get(company_name, 0) for company_name in company_names)
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,61 @@
+import json
+import os
+from typing import Dict, List
+
+from loguru import logger
+
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile
+
+
+class ReportIndex:
+    """
+    JSON index of the companies and report years stored in Qdrant, harvested from the
+    `AnnualReportFile` metadata of the ingested files. Self-query loads it to recognise
+    company names and years in questions without asking the LLM.
+    """
+
+    def __init__(self, index_path: str) -> None:
+        """
+        Load the index, empty when the file does not exist yet.
+
+        Args:
+            index_path (str): Path of the JSON file.
+        """
+        self.index_path = index_path
+        self.reports: Dict[str, List[int]] = {}
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as file:
+                self.reports = json.load(file)
+
+    @property
+    def company_names(self) -> List[str]:
+        return sorted(self.reports)
+
+    @property
+    def years(self) -> List[int]:
+        return sorted({year for years in self.reports.values() for year in years})
+
+    def add(self, report: AnnualReportFile) -> None:
+        years = set(self.reports.get(report.company_name, []))
+        years.add(report.year)
+        self.reports[report.company_name] = sorted(years)
+
+    def remove(self, report: AnnualReportFile) -> None:
+        years = [year for year in self.reports.get(report.company_name, []) if year != report.year]
+        if years:
+            self.reports[report.company_name] = years
+        else:
+            self.reports.pop(report.company_name, None)
+
+    def save(self) -> None:
+        """
+        Write the index atomically, so a concurrent reader never sees a partial file.
+        """
+        index_dir = os.path.dirname(self.index_path)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.reports, file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+        logger.info(f"Report index saved with {len(self.reports)} companies.")
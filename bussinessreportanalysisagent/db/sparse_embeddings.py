@@ -0,0 +1,106 @@
+import re
+from functools import lru_cache
+from hashlib import blake2b
+from typing import List
+
+import numpy as np
+from qdrant_client.http import models
+from scipy import sparse
+
+# Name of the sparse vector stored next to the dense one in Qdrant
+SPARSE_VECTOR_NAME = "bm25"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,'&-][a-z0-9]+)*")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or our that the their "
+    "this to was we were which will with".split()
+)
+
+
+@lru_cache(maxsize=1_000_000)
+def _token_index(token: str) -> int:
+    """
+    Stable 31-bit index of a token (hashing trick), so no vocabulary has to be stored.
+    """
+    return int.from_bytes(blake2b(token.encode("utf-8"), digest_size=4).digest(), "little") & 0x7FFFFFFF
+
+
+class BM25SparseEncoder:
+    """
+    Encode chunks as BM25 sparse vectors for Qdrant.
+    Documents carry the BM25 term-frequency weight of each token; the IDF part is applied
+    by Qdrant at query time through the IDF modifier of the sparse vector, so the weights
+    never need recomputing as the corpus grows. Bigrams are included so phrases such as
+    "net debt" match as a unit.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 200.0) -> None:
+        """
+        Args:
+            k1 (float): Term frequency saturation. Defaults to 1.2.
+            b (float): Document length normalization. Defaults to 0.75.
+            avg_doc_length (float): Expected number of tokens of a chunk. Defaults to 200.
+        """
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """
+        Lowercase word tokens without stop words, followed by their bigrams.
+        """
+        words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+        return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    def _term_matrix(self, texts: List[str]) -> tuple[sparse.csr_matrix, np.ndarray]:
+        """
+        Term frequency matrix of the texts (one row per text) and the token count of each text.
+        """
+        token_lists = [self.tokenize(text) for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(texts))
+        columns = np.fromiter(
+            (_token_index(token) for tokens in token_lists for token in tokens),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        term_frequencies = sparse.csr_matrix(
+            (np.ones(len(columns), dtype=np.float32), (rows, columns)),
+            shape=(len(texts), 0x80000000),
+        )
+        term_frequencies.sum_duplicates()
+        return term_frequencies, lengths
+
+    def encode_documents(self, texts: List[str]) -> List[models.SparseVector]:
+        """
+        Encode a batch of chunks, with the BM25 weights computed for the whole batch at once.
+
+        Args:
+            texts (List[str]): Chunks to encode
+
+        Returns:
+            List[models.SparseVector]: One sparse vector per chunk
+        """
+        term_frequencies, lengths = self._term_matrix(texts)
+        row_lengths = np.repeat(lengths, np.diff(term_frequencies.indptr)).astype(np.float32)
+        tf = term_frequencies.data
+        term_frequencies.data = tf * (self.k1 + 1) / (
+            tf + self.k1 * (1 - self.b + self.b * row_lengths / self.avg_doc_length)
+        )
+
+        indptr = term_frequencies.indptr
+        return [
+            models.SparseVector(
+                indices=term_frequencies.indices[indptr[row] : indptr[row + 1]].tolist(),
+                values=term_frequencies.data[indptr[row] : indptr[row + 1]].tolist(),
+            )
+            for row in range(len(texts))
+        ]
+
+    def encode_query(self, text: str) -> models.SparseVector:
+        """
+        Encode a question, each distinct token with weight 1 (Qdrant applies the IDF).
+        """
+        indices = sorted({_token_index(token) for token in self.tokenize(text)})
+        return models.SparseVector(indices=indices, values=[1.0] * len(indices))
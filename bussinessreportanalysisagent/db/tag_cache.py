@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from loguru import logger
+
+from bussinessreportanalysisagent.application.rag.prompt_templates import KEYWORD_EXTACTION_TEMPLATE
+
+
+class KeywordTagCache:
+    """
+    Persistent SQLite cache of page keyword tags.
+    Entries are keyed by the page text hash together with everything that can change
+    the model answer: keyword list, model id, temperature and prompt template.
+    """
+
+    def __init__(
+        self,
+        cache_path: str,
+        model_name: str,
+        model_temperature: int,
+        keywords_list: List[str],
+        max_entries: int = 100_000,
+    ) -> None:
+        """
+        Open (or create) the cache database.
+
+        Args:
+            cache_path (str): Path of the SQLite file.
+            model_name (str): Model id used for tagging.
+            model_temperature (int): Sampling temperature used for tagging.
+            keywords_list (List[str]): Allowed keywords from config.yml.
+            max_entries (int, optional): Maximum number of cached pages, least recently
+                used entries are evicted beyond it. Defaults to 100_000.
+        """
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.fingerprint = hashlib.sha256(
+            json.dumps(
+                {
+                    "model_name": model_name,
+                    "temperature": model_temperature,
+                    "keywords": keywords_list,
+                    "template": KEYWORD_EXTACTION_TEMPLATE,
+                },
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()
+
+        self.connection = sqlite3.connect(cache_path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS keyword_tags ("
+            "cache_key TEXT PRIMARY KEY, keywords TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS keyword_tags_last_access ON keyword_tags (last_access)"
+        )
+        self.connection.commit()
+
+    def _cache_key(self, content: str) -> str:
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{self.fingerprint}:{content_hash}".encode("utf-8")).hexdigest()
+
+    def get_many(self, contents: List[str]) -> List[Optional[List[str]]]:
+        """
+        Look up cached keywords for each content.
+
+        Args:
+            contents (List[str]): Page contents to look up.
+
+        Returns:
+            List[Optional[List[str]]]: Cached keywords per content, None on a miss.
+        """
+        results = []
+        hit_keys = []
+        for content in contents:
+            cache_key = self._cache_key(content)
+            row = self.connection.execute(
+                "SELECT keywords FROM keyword_tags WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                hit_keys.append(cache_key)
+                results.append(json.loads(row[0]))
+
+        if hit_keys:
+            now = time.time()
+            self.connection.executemany(
+                "UPDATE keyword_tags SET last_access = ? WHERE cache_key = ?",
+                [(now, cache_key) for cache_key in hit_keys],
+            )
+            self.connection.commit()
+        return results
+
+    def put_many(self, contents: List[str], keywords: List[List[str]]) -> None:
+        """
+        Store keywords for each content and evict the least recently used entries
+        when the cache grows beyond `max_entries`.
+
+        Args:
+            contents (List[str]): Page contents that were tagged.
+            keywords (List[List[str]]): Keywords returned by the model for each content.
+        """
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO keyword_tags (cache_key, keywords, last_access) VALUES (?, ?, ?)",
+            [
+                (self._cache_key(content), json.dumps(content_keywords), now)
+                for content, content_keywords in zip(contents, keywords)
+            ],
+        )
+        self._evict()
+        self.connection.commit()
+
+    def _evict(self) -> None:
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM keyword_tags").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self.connection.execute(
+                "DELETE FROM keyword_tags WHERE cache_key IN ("
+                "SELECT cache_key FROM keyword_tags ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            logger.debug(f"Evicted {overflow} entries from keyword tag cache.")
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        self.connection.execute("DELETE FROM keyword_tags")
+        self.connection.commit()
+        logger.info(f"Keyword tag cache '{self.cache_path}' cleared.")
+
+    def log_stats(self) -> None:
+        """
+        Log the hit/miss counters of the cache.
+        """
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        logger.info(
+            f"Keyword tag cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1%} hit rate)."
+        )
+
+    def close(self) -> None:
+        self.connection.close()
@@ -1,18 +1,30 @@
+import json
 import logging
 import os
-from typing import List
-
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, List, Optional
+
+import grpc
+import httpx
 import loguru
+from langchain_core.documents import Document
 from loguru import logger
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
 from qdrant_client.http.models import Distance, PointStruct, VectorParams
 from qdrant_client.models import FieldCondition, Filter
 from tqdm import tqdm
 
 from bussinessreportanalysisagent.settings import env_settings
-from bussinessreportanalysisagent.db.embeddings import VectorEmbeddings
+from bussinessreportanalysisagent.db.embedding_cache import EmbeddingCache
+from bussinessreportanalysisagent.db.embeddings import EmbeddingError, VectorEmbeddings
+from bussinessreportanalysisagent.db.sparse_embeddings import SPARSE_VECTOR_NAME, BM25SparseEncoder
+from bussinessreportanalysisagent.metrics import metrics
 
 
 # Set higher log level for qdrant_client to suppress its logs
@@ -25,6 +37,22 @@ loguru.logger.configure(
     handlers=[{"sink": lambda _: None, "level": logging.ERROR, "filter": "httpx"}]
 )
 
+# Report metadata set by PdfLoader that retrieval filters on
+PAYLOAD_INDEXES = {
+    "Company_Name": models.PayloadSchemaType.KEYWORD,
+    "Year": models.PayloadSchemaType.INTEGER,
+    "Document_Type": models.PayloadSchemaType.KEYWORD,
+    "keywords": models.PayloadSchemaType.KEYWORD,
+}
+
+# Responses worth retrying: rate limited or Qdrant temporarily unavailable
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+TRANSIENT_GRPC_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+)
+
 
 class QdrantVectorStore:
     """
@@ -33,27 +61,64 @@ class QdrantVectorStore:
     """
 
     def __init__(
-        self, collection_name: str, embedding_model_type: str, embedding_model_id: str
+        self,
+        collection_name: str,
+        embedding_model_type: str,
+        embedding_model_id: str,
+        client: QdrantClient = None,
+        embedding_model_kwargs: dict = None,
+        embedding_cache: EmbeddingCache = None,
+        prefer_grpc: bool = False,
+        sparse_encoder: BM25SparseEncoder = None,
+        hnsw: dict = None,
+        quantization: dict = None,
+        on_disk_vectors: bool = False,
+        on_disk_payload: bool = False,
     ) -> None:
         """
         Initialize the QdrantVectorStore with the collection name.
         This method sets up the Qdrant client with the provided URL and API key.
         Args:
             collection_name (str): Name of the collection to be created or used in Qdrant
+            client (QdrantClient, optional): Client to use instead of the configured
+                Qdrant host, e.g. QdrantClient(":memory:") for local runs
+            embedding_model_kwargs (dict, optional): Runtime options of the local
+                sentence transformers model
+            embedding_cache (EmbeddingCache, optional): On-disk cache of chunk embeddings
+            prefer_grpc (bool, optional): Talk to Qdrant over gRPC instead of REST
+            sparse_encoder (BM25SparseEncoder, optional): Encoder of the BM25 sparse vectors
+                stored next to the dense ones for hybrid retrieval
+            hnsw (dict, optional): HNSW index options `m`, `ef_construct` and the
+                search-time `search_ef`, Qdrant defaults when not given
+            quantization (dict, optional): Quantization options `type` ("scalar" or
+                "binary"), `always_ram`, `rescore` and `oversampling`
+            on_disk_vectors (bool, optional): Keep the original vectors on disk (memmap)
+            on_disk_payload (bool, optional): Keep the payloads on disk
         """
 
-        self.client: QdrantClient = QdrantClient(
-            url=env_settings.QDRANT_HOST_URL, api_key=env_settings.QDRANT_API_KEY
+        self.client: QdrantClient = client or QdrantClient(
+            url=env_settings.QDRANT_HOST_URL,
+            api_key=env_settings.QDRANT_API_KEY,
+            prefer_grpc=prefer_grpc,
         )
         self.collection_name: str = collection_name
+        self.sparse_encoder = sparse_encoder
+        self.hnsw = hnsw or {}
+        self.quantization = quantization or {}
+        self.on_disk_vectors = on_disk_vectors
+        self.on_disk_payload = on_disk_payload
         self.qdrant_url: str = os.getenv("QDRANT_HOST_URL")
         self.qdrant_api_key: str = os.getenv("QDRANT_API_KEY")
         
         # loading embedding model
         if embedding_model_type == "gemini":
-            self.doc_store = VectorEmbeddings(model_id=embedding_model_id)
+            self.doc_store = VectorEmbeddings(model_id=embedding_model_id, cache=embedding_cache)
         elif embedding_model_type == "sentence_transformers":
-            self.doc_store = VectorEmbeddings(model_id=embedding_model_id)
+            self.doc_store = VectorEmbeddings(
+                model_id=embedding_model_id,
+                model_kwargs=embedding_model_kwargs,
+                cache=embedding_cache,
+            )
         else:
             raise ValueError("Unsupported embedding model.")
 
@@ -73,6 +138,8 @@ class QdrantVectorStore:
                 logger.info(
                     f"Collection '{self.collection_name}' already exists. Returning without creating a new one."
                 )
+                self.check_sparse_vectors()
+                self.create_payload_indexes()
                 return
 
             # Create collection with specified parameters
@@ -83,13 +150,97 @@ class QdrantVectorStore:
                     distance=Distance.COSINE
                     if distance == "Cosine"
                     else Distance.EUCLID,
+                    on_disk=self.on_disk_vectors,
                 ),
+                sparse_vectors_config={
+                    SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)
+                }
+                if self.sparse_encoder
+                else None,
+                hnsw_config=self.hnsw_config(),
+                quantization_config=self.quantization_config(),
+                on_disk_payload=self.on_disk_payload,
             )
 
+            self.create_payload_indexes()
+
             logger.info(f"Collection '{self.collection_name}' created successfully.")
         except UnexpectedResponse as e:
             logger.error(f"Failed to create collection: {e}")
 
+    def check_sparse_vectors(self) -> None:
+        """
+        Fall back to dense-only upserts and retrieval when the existing collection was
+        created without the BM25 sparse vectors, which can only be added by recreating it.
+        """
+        if self.sparse_encoder is None or not self.client.collection_exists(collection_name=self.collection_name):
+            return
+        sparse_vectors = self.client.get_collection(collection_name=self.collection_name).config.params.sparse_vectors
+        if SPARSE_VECTOR_NAME not in (sparse_vectors or {}):
+            logger.warning(
+                f"Collection '{self.collection_name}' has no '{SPARSE_VECTOR_NAME}' sparse vectors, "
+                "hybrid retrieval is disabled until the collection is recreated."
+            )
+            self.sparse_encoder = None
+
+    def hnsw_config(self) -> Optional[models.HnswConfigDiff]:
+        """
+        HNSW index options of the collection: `m` edges per node and `ef_construct`
+        candidates explored while building, higher values trade memory and indexing
+        time for recall.
+        """
+        if not (self.hnsw.get("m") or self.hnsw.get("ef_construct")):
+            return None
+        return models.HnswConfigDiff(m=self.hnsw.get("m"), ef_construct=self.hnsw.get("ef_construct"))
+
+    def quantization_config(self) -> Optional[models.QuantizationConfig]:
+        """
+        Quantization of the dense vectors: int8 scalar quantization (4x smaller) or
+        binary quantization (32x smaller), kept in RAM when `always_ram` is set.
+        """
+        quantization_type = self.quantization.get("type")
+        always_ram = self.quantization.get("always_ram", True)
+        if quantization_type == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8, quantile=0.99, always_ram=always_ram
+                )
+            )
+        if quantization_type == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=always_ram))
+        if quantization_type:
+            raise ValueError(f"Unsupported quantization type: {quantization_type}")
+        return None
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        """
+        Search-time options of dense queries: the HNSW `search_ef` and, for a quantized
+        collection, rescoring of `oversampling` times more candidates with the original
+        vectors.
+        """
+        quantization = None
+        if self.quantization.get("type"):
+            quantization = models.QuantizationSearchParams(
+                rescore=self.quantization.get("rescore", True),
+                oversampling=self.quantization.get("oversampling"),
+            )
+        if self.hnsw.get("search_ef") is None and quantization is None:
+            return None
+        return models.SearchParams(hnsw_ef=self.hnsw.get("search_ef"), quantization=quantization)
+
+    def create_payload_indexes(self) -> None:
+        """
+        Index the report metadata fields used by retrieval filters, so filtered search
+        stays fast as the corpus grows. Creating an existing index is a no-op.
+        """
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+                wait=True,
+            )
+
     def delete_collection(self) -> None:
         """
         Delete the collection from Qdrant.
@@ -101,108 +252,283 @@ class QdrantVectorStore:
         except UnexpectedResponse as e:
             logger.error(f"Failed to delete collection: {e}")
 
-    def create_filter_condition(self, relevant_keywords: List[str]) -> Filter:
+    @staticmethod
+    def point_id(metadata: dict) -> str:
         """
-        Create a filter condition for Qdrant based on relevant keywords.
+        Deterministic point id of a chunk, derived from its company, year, page and chunk
+        index, so re-ingesting a report overwrites its points instead of duplicating them.
 
         Args:
-            relevant_keywords (List[str]): List of relevant keywords for filtering
+            metadata (dict): Chunk metadata set by `PdfLoader` and `Chunking.iter_chunks`
 
         Returns:
-            Filter: Filter condition for Qdrant
+            str: UUID of the point, random when the metadata is incomplete
         """
         try:
-            # one of the skills should be present in the profile
-            should_conditions = [
-                FieldCondition(key="skills", match=models.MatchValue(value=keyword))
-                for keyword in relevant_keywords
-                if keyword
-            ]
-            # search only for the that job title to narrow down the search
-            must_conditions = [
-                FieldCondition(
-                    key="job_title",
-                    match=models.MatchValue(value=self.searched_job_title),
-                )
+            key = f"{metadata['Company_Name']}:{metadata['Year']}:{metadata['page']}:{metadata['chunk_index']}"
+        except KeyError:
+            return str(uuid.uuid4())
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+    @staticmethod
+    def report_filter(company_name: str, year: int) -> Filter:
+        """
+        Filter matching every point of one annual report.
+        """
+        return Filter(
+            must=[
+                FieldCondition(key="Company_Name", match=models.MatchValue(value=company_name)),
+                FieldCondition(key="Year", match=models.MatchValue(value=year)),
             ]
+        )
 
-            return Filter(should=should_conditions, must=must_conditions)
-        except Exception as e:
-            logger.error(f"Failed to create filter condition: {e}")
-            return None
+    def count_report_points(self, company_name: str, year: int) -> int:
+        """
+        Count the points stored for one annual report.
+        """
+        return self.client.count(
+            collection_name=self.collection_name,
+            count_filter=self.report_filter(company_name, year),
+            exact=True,
+        ).count
 
-    def find_similar_profiles(
-        self, query_vector: List[float], relevant_keywords: list, limit: int = 10
-    ) -> None:
+    def delete_report_points(self, company_name: str, year: int) -> None:
+        """
+        Delete every point of one annual report, e.g. before re-ingesting a changed
+        report or after it was removed from the corpus. Points shared with other years
+        of the company (merged near-duplicates) only lose this year.
+        """
+        try:
+            logger.info(f"Deleting points of {company_name} {year} from Qdrant.")
+            with metrics.track("qdrant_delete"):
+                self._remove_year_from_merged_points(company_name, year)
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.FilterSelector(filter=self.report_filter(company_name, year)),
+                    wait=True,
+                )
+        except UnexpectedResponse as e:
+            logger.error(f"Failed to delete points of {company_name} {year}: {e}")
+
+    def _remove_year_from_merged_points(self, company_name: str, year: int) -> None:
         """
-        Find similar profiles in the Qdrant collection.
-        This method is a placeholder and should be implemented based on specific requirements.
+        Remove a year from the points carrying several years, see `ChunkDeduplicator`.
         """
-        logger.info("Finding similar profiles in Qdrant collection.")
-        filter_condition = self.create_filter_condition(relevant_keywords)
-        if filter_condition:
-            closest_profiles = self.client.search(
+        shared_filter = self.report_filter(company_name, year)
+        shared_filter.must.append(FieldCondition(key="Year", values_count=models.ValuesCount(gt=1)))
+        remaining_years = {}
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
                 collection_name=self.collection_name,
-                query_vector=query_vector,
-                limit=limit,
-                query_filter=filter_condition,
+                scroll_filter=shared_filter,
+                limit=256,
+                offset=offset,
+                with_payload=["Year"],
+            )
+            for point in points:
+                years = tuple(stored_year for stored_year in point.payload["Year"] if stored_year != year)
+                remaining_years.setdefault(years, []).append(point.id)
+            if offset is None:
+                break
+        for years, point_ids in remaining_years.items():
+            self.client.set_payload(
+                collection_name=self.collection_name,
+                payload={"Year": list(years) if len(years) > 1 else years[0]},
+                points=point_ids,
+                wait=True,
             )
-            logger.info(f"Found {len(closest_profiles)} similar chunks.")
-            return closest_profiles
-        else:
-            return None
 
-    def bulk_insert_documents(self, documents: List[dict]) -> None:
+    def _embed_points(self, batch: List[Document], batch_size: int) -> List[PointStruct]:
         """
-        Bulk insert documents into Qdrant collection.
-
-        Args:
-            documents (List[dict]): List of documents to be inserted
-
-        Returns:
-            None
+        Embed a batch of documents into points, skipping the documents that could not be embedded.
         """
         try:
-            logger.info("Inserting documents into Qdrant.")
-            doc_points = [
-                PointStruct(
-                    id=doc.id,
-                    vector=self.doc_store.get_embedding(doc.page_content),
-                    payload={
-                        "profile_details": doc.page_content,
-                        "skills": doc.metadata["skills"],
-                        "job_title": doc.metadata["job_title"],
-                        "profile_id": doc.metadata.get("profile_id", str(doc.id)),
-                    },
+            vectors = self.doc_store.get_embeddings(
+                [doc.page_content for doc in batch], batch_size=batch_size
+            )
+            failed = set()
+        except EmbeddingError as e:
+            for index, error in e.failures.items():
+                logger.error(
+                    f"Skipping chunk {batch[index].metadata.get('chunk_index')} of page "
+                    f"{batch[index].metadata.get('page')} in {batch[index].metadata.get('source')}: {error}"
                 )
-                for doc in tqdm(documents)
+            if e.embeddings is None:
+                return []
+            vectors, failed = e.embeddings, set(e.failures)
+
+        if self.sparse_encoder:
+            sparse_vectors = self.sparse_encoder.encode_documents([doc.page_content for doc in batch])
+            point_vectors = [
+                {"": vector.tolist(), SPARSE_VECTOR_NAME: sparse_vector}
+                for vector, sparse_vector in zip(vectors, sparse_vectors)
             ]
+        else:
+            point_vectors = [vector.tolist() for vector in vectors]
 
-            # Insert in batches of 100 documents
-            batch_size = 100
-            for i in range(0, len(doc_points), batch_size):
-                batch = doc_points[i : i + batch_size]
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch,
-                    wait=False,  # Use async operation
+        return [
+            PointStruct(
+                id=doc.id or self.point_id(doc.metadata),
+                vector=vector,
+                payload={"page_content": doc.page_content, **doc.metadata},
+            )
+            for index, (doc, vector) in enumerate(zip(batch, point_vectors))
+            if index not in failed
+        ]
+
+    @staticmethod
+    def _split_by_bytes(points: List[PointStruct], max_request_bytes: int) -> List[List[PointStruct]]:
+        """
+        Split points into upsert requests whose estimated size stays under `max_request_bytes`.
+        """
+        requests, request, request_bytes = [], [], 0
+        for point in points:
+            # ~12 bytes per serialized number plus the JSON payload
+            if isinstance(point.vector, dict):
+                numbers = sum(
+                    2 * len(vector.indices) if isinstance(vector, models.SparseVector) else len(vector)
+                    for vector in point.vector.values()
                 )
+            else:
+                numbers = len(point.vector)
+            point_bytes = 12 * numbers + len(json.dumps(point.payload, default=str))
+            if request and request_bytes + point_bytes > max_request_bytes:
+                requests.append(request)
+                request, request_bytes = [], 0
+            request.append(point)
+            request_bytes += point_bytes
+        if request:
+            requests.append(request)
+        return requests
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """
+        Whether a failed request is worth retrying: a 429 or 5xx response, a connection
+        error or a timeout, over REST or gRPC.
+        """
+        if isinstance(error, UnexpectedResponse):
+            return error.status_code in TRANSIENT_STATUS_CODES
+        if isinstance(error, ResponseHandlingException):
+            # The REST client wraps the httpx transport errors
+            error = error.source
+        if isinstance(error, grpc.RpcError):
+            return error.code() in TRANSIENT_GRPC_CODES
+        return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+    def _upsert_with_retry(self, points: List[PointStruct], max_retries: int) -> int:
+        """
+        Upsert points and wait until Qdrant has persisted them, retrying transient failures
+        with exponential backoff.
+        """
+        for attempt in range(1, max_retries + 1):
+            try:
+                with metrics.track("qdrant_upsert", len(points)):
+                    self.client.upsert(collection_name=self.collection_name, points=points, wait=True)
+                return len(points)
+            except Exception as e:
+                if not self._is_transient(e) or attempt == max_retries:
+                    raise
+                delay = 2 ** (attempt - 1)
+                logger.warning(f"Upsert of {len(points)} points failed ({e}), retrying in {delay}s.")
+                time.sleep(delay)
+
+    def bulk_insert_documents(
+        self,
+        documents: Iterable[Document],
+        batch_size: int = 100,
+        max_concurrent_upserts: int = 2,
+        max_request_bytes: int = 8_000_000,
+        max_retries: int = 3,
+        on_upserted: Callable[[List[str]], None] = None,
+        on_failed: Callable[[List[str]], None] = None,
+    ) -> int:
+        """
+        Bulk insert documents into Qdrant collection.
+        Documents are consumed lazily and embedded one batch at a time. Upserts run in a
+        thread pool, so the next batch is embedded while the previous ones are in flight,
+        and embedding blocks once `max_concurrent_upserts` requests are pending.
 
-            logger.info(f"Inserted {len(documents)} documents into Qdrant.")
-        except UnexpectedResponse as e:
-            logger.error(f"Failed to insert documents: {e}")
+        Args:
+            documents (Iterable[Document]): Documents to be inserted, a list or a generator
+            batch_size (int): Number of documents embedded per call
+            max_concurrent_upserts (int): Maximum number of upsert requests in flight
+            max_request_bytes (int): Estimated size above which a batch is split into
+                several upsert requests
+            max_retries (int): Attempts per upsert request on transient failures, at least 1
+            on_upserted (Callable[[List[str]], None]): Called with the point ids of each
+                acknowledged upsert request, e.g. to report progress
+            on_failed (Callable[[List[str]], None]): Called with the ids of the documents
+                that were not stored, failed upserts and embeddings (documents with an id only)
+
+        Returns:
+            int: Number of documents persisted in Qdrant
+
+        Raises:
+            ValueError: If `max_retries` is lower than 1
+        """
+        if max_retries < 1:
+            raise ValueError(f"max_retries must be at least 1, got {max_retries}")
+        inserted = 0
+        failed = 0
+        logger.info("Inserting documents into Qdrant.")
+        documents = iter(documents)
+        in_flight = deque()
+
+        def wait_oldest() -> None:
+            nonlocal inserted, failed
+            points, future = in_flight.popleft()
+            try:
+                inserted += future.result()
+                if on_upserted:
+                    on_upserted([str(point.id) for point in points])
+            except Exception as e:
+                failed += len(points)
+                logger.error(f"Failed to insert {len(points)} documents: {e}")
+                if on_failed:
+                    on_failed([str(point.id) for point in points])
+
+        with ThreadPoolExecutor(max_workers=max_concurrent_upserts) as executor, tqdm(unit="doc") as progress:
+            while batch := list(islice(documents, batch_size)):
+                doc_points = self._embed_points(batch, batch_size)
+                if on_failed and len(doc_points) < len(batch):
+                    embedded = {str(point.id) for point in doc_points}
+                    on_failed([doc.id for doc in batch if doc.id and doc.id not in embedded])
+                for request in self._split_by_bytes(doc_points, max_request_bytes):
+                    # Backpressure: wait for the oldest upsert before queueing another one
+                    if len(in_flight) >= max_concurrent_upserts:
+                        wait_oldest()
+                    in_flight.append((request, executor.submit(self._upsert_with_retry, request, max_retries)))
+                progress.update(len(batch))
+
+            # Barrier: every upsert is acknowledged with wait=True once persisted
+            while in_flight:
+                wait_oldest()
+
+        logger.info(f"Inserted {inserted} documents into Qdrant, {failed} failed.")
+        if self.doc_store.cache:
+            self.doc_store.cache.log_stats()
+        return inserted
 
     def load_data_into_qdrant(
         self,
-        all_documents: List,
+        all_documents: Iterable[Document],
         vector_size: int,
-    ) -> None:
+        batch_size: int = 100,
+        **insert_kwargs,
+    ) -> int:
         """
         Load data into Qdrant collection.
 
         Args:
-            all_documents (List): List of documents to be inserted
+            all_documents (Iterable[Document]): Documents to be inserted, a list or a generator
             vector_size (int): Size of the vector for the collection
+            batch_size (int): Number of documents embedded per call
+            insert_kwargs: Upsert tuning options of `bulk_insert_documents`
+
+        Returns:
+            int: Number of inserted documents
         """
         try:
             logger.info("Loading data into Qdrant.")
@@ -210,53 +536,11 @@ class QdrantVectorStore:
             # Create collection if it doesn't exist
             self.create_collection(vector_size=vector_size)
 
-            # Bulk insert profiles into Qdrant
-            self.bulk_insert_documents(all_documents)
+            # Bulk insert documents into Qdrant
+            return self.bulk_insert_documents(all_documents, batch_size=batch_size, **insert_kwargs)
 
         except UnexpectedResponse as e:
             logger.error(f"Failed to load data into Qdrant: {e}")
         except ValueError as v:
             logger.error(f"Value error: {v}")
-
-    def load_data_from_qdrant(
-        self,
-        job_description: str,
-        relevant_keywords: List[str],
-        limit: int,
-        searched_job_title: str,
-        top_k: int = 3,
-    ) -> List[dict]:
-        """
-        Retrieve relevant documents from Qdrant Cloud based on job description and keywords.
-
-        Args:
-            job_description (str): The job description to search for
-            relevant_keywords (List[str]): List of relevant keywords for filtering
-            limit (int): Maximum number of results to return for initial search
-            searched_job_title (str): Job title to search for
-            top_k (int): Number of top profiles to return
-
-        Returns:
-            List[dict]: List of the top_k most relevant profiles
-        """
-        try:
-            logger.info("Loading data from Qdrant.")
-            self.searched_job_title = searched_job_title.lower().replace(" ", "_")
-
-            # Get chunks from Qdrant
-            retrieved_chunks = self.find_similar_profiles(
-                query_vector=self.doc_store.get_embedding(job_description),
-                relevant_keywords=relevant_keywords,
-                limit=limit,
-            )
-
-            if not retrieved_chunks:
-                logger.warning("No chunks retrieved from Qdrant.")
-                return []
-
-            # Return top profiles with their chunks for downstream processing
-            return retrieved_chunks
-
-        except UnexpectedResponse as e:
-            logger.error(f"Failed to load data from Qdrant: {e}")
-            return []
+        return 0
@@ -1,8 +1,11 @@
+from functools import lru_cache
 from loguru import logger
 import os
 from langchain_google_genai.chat_models import ChatGoogleGenerativeAI
 from langchain_groq.chat_models import ChatGroq
+from sentence_transformers import CrossEncoder, SentenceTransformer
 import logging
+import torch
 
 # Only set external loggers to WARNING level to avoid too much output
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -40,3 +43,79 @@ class LLMModel:
             f"Successfully get {model_name} groq model with temperature: {temperature}"
         )
         return groq_model
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_sentence_transformer_model(
+        model_id: str,
+        backend: str = "torch",
+        onnx_file_name: str = None,
+        num_threads: int = None,
+        local_files_only: bool = False,
+    ) -> SentenceTransformer:
+        """
+        Load a SentenceTransformers model once per process. Later calls with the same
+        arguments return the already loaded model, so the embedder and the chunker's
+        tokenizer share one instance.
+
+        Args:
+            model_id (str): Hugging Face model id or local path.
+            backend (str): "torch" or "onnx" inference backend.
+            onnx_file_name (str): ONNX file of the model repo to load, e.g.
+                "onnx/model_qint8_avx2.onnx" for int8 quantized CPU inference.
+            num_threads (int): Number of CPU threads used for inference, defaults to
+                the runtime's own choice.
+            local_files_only (bool): Only load the model from the local cache, never
+                from the network.
+        """
+        logger.debug(f"Loading {model_id} sentence transformer model with {backend} backend")
+        model_kwargs = {}
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        if backend == "onnx":
+            import onnxruntime
+
+            if onnx_file_name:
+                model_kwargs["file_name"] = onnx_file_name
+            if num_threads:
+                session_options = onnxruntime.SessionOptions()
+                session_options.intra_op_num_threads = num_threads
+                model_kwargs["session_options"] = session_options
+
+        sentence_model = SentenceTransformer(
+            model_id,
+            backend=backend,
+            model_kwargs=model_kwargs or None,
+            local_files_only=local_files_only,
+        )
+        logger.debug(f"Successfully loaded {model_id} sentence transformer model")
+        return sentence_model
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_cross_encoder_model(
+        model_id: str,
+        max_length: int = 512,
+        num_threads: int = None,
+        local_files_only: bool = False,
+    ) -> CrossEncoder:
+        """
+        Load a SentenceTransformers cross-encoder once per process.
+
+        Args:
+            model_id (str): Hugging Face model id or local path.
+            max_length (int): Maximum number of tokens of a (query, chunk) pair, longer
+                pairs are truncated.
+            num_threads (int): Number of CPU threads used for inference, defaults to
+                the runtime's own choice.
+            local_files_only (bool): Only load the model from the local cache, never
+                from the network.
+        """
+        logger.debug(f"Loading {model_id} cross-encoder model")
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        cross_encoder = CrossEncoder(
+            model_id, max_length=max_length, device="cpu", local_files_only=local_files_only
+        )
+        logger.debug(f"Successfully loaded {model_id} cross-encoder model")
+        return cross_encoder
@@ -1,7 +1,12 @@
 from langchain.output_parsers import PydanticOutputParser
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+from loguru import logger
 from pydantic import BaseModel, Field
 from bussinessreportanalysisagent.application.rag.prompt_templates import KEYWORD_EXTACTION_TEMPLATE
+from bussinessreportanalysisagent.db.tag_cache import KeywordTagCache
+from bussinessreportanalysisagent.metrics import metrics, text_bytes
 from bussinessreportanalysisagent.models.models import LLMModel
 
 
@@ -12,16 +17,97 @@ class Keyword(BaseModel):
 class ContentKeyword:
 
     @staticmethod
-    def get_content_keyword(keywords_list: list[str], content: str, model_name: str, model_temperature: int) -> list[str]:
+    def build_chain(
+        model_name: str,
+        model_temperature: int,
+        max_retries: int = 1,
+        llm: BaseChatModel = None,
+    ) -> Runnable:
+        """
+        Build the keyword extraction chain (prompt | llm | parser) once so it can be
+        reused for every page of a run.
+
+        Args:
+            model_name (str): Groq model id used for tagging.
+            model_temperature (int): Sampling temperature of the model.
+            max_retries (int, optional): Total attempts per page, with exponential
+                backoff and jitter between attempts (covers rate limits). Defaults to 1.
+            llm (BaseChatModel, optional): Chat model to use instead of Groq, e.g. a
+                stub model for benchmarks. Defaults to None.
 
-        keywords = keywords_list
+        Returns:
+            Runnable: The keyword extraction chain.
+        """
         parser = PydanticOutputParser(pydantic_object=Keyword)
         prompt = PromptTemplate(
-
             template=KEYWORD_EXTACTION_TEMPLATE,
             input_variables=["keywords", "content"],
             partial_variables={"format_instructions": parser.get_format_instructions()}
         )
-        chain = prompt | LLMModel().get_groq_model(model_name=model_name, temperature=model_temperature)  | parser
-        result = chain.invoke({"keywords": keywords, "content": content})
+        if llm is None:
+            llm = LLMModel().get_groq_model(model_name=model_name, temperature=model_temperature)
+
+        chain = prompt | llm | parser
+        if max_retries > 1:
+            chain = chain.with_retry(stop_after_attempt=max_retries, wait_exponential_jitter=True)
+        return chain
+
+    @staticmethod
+    def get_content_keyword(keywords_list: list[str], content: str, model_name: str, model_temperature: int) -> list[str]:
+
+        chain = ContentKeyword.build_chain(model_name=model_name, model_temperature=model_temperature)
+        result = chain.invoke({"keywords": keywords_list, "content": content})
         return result.newKeyword
+
+    @staticmethod
+    def get_content_keywords_batch(
+        keywords_list: list[str],
+        contents: list[str],
+        chain: Runnable,
+        max_concurrency: int = 8,
+        cache: KeywordTagCache = None,
+    ) -> list[list[str]]:
+        """
+        Tag a batch of page contents concurrently with a prebuilt chain.
+        When a cache is given, only the contents missing from it are sent to the model.
+
+        Args:
+            keywords_list (list[str]): Allowed keywords to tag the content with.
+            contents (list[str]): Page contents to be tagged.
+            chain (Runnable): Chain returned by `ContentKeyword.build_chain`.
+            max_concurrency (int, optional): Maximum number of in-flight model calls.
+                Defaults to 8.
+            cache (KeywordTagCache, optional): Tag cache consulted before calling the
+                model. Defaults to None.
+
+        Returns:
+            list[list[str]]: Keywords for each content, in the same order as `contents`.
+                A page whose tagging failed after all retries gets an empty list.
+        """
+        all_keywords = cache.get_many(contents) if cache else [None] * len(contents)
+        missing_indexes = [index for index, keywords in enumerate(all_keywords) if keywords is None]
+        if not missing_indexes:
+            return all_keywords
+
+        missing_contents = [contents[index] for index in missing_indexes]
+        with metrics.track("keyword_tagging", len(missing_contents), text_bytes(missing_contents)) as span:
+            results = chain.batch(
+                [{"keywords": keywords_list, "content": content} for content in missing_contents],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True,
+            )
+            span.errors = sum(isinstance(result, Exception) for result in results)
+
+        tagged_contents, tagged_keywords = [], []
+        for index, result in zip(missing_indexes, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Keyword tagging failed for content {index}: {result}")
+                all_keywords[index] = []
+            else:
+                all_keywords[index] = result.newKeyword
+                tagged_contents.append(contents[index])
+                tagged_keywords.append(result.newKeyword)
+
+        if cache and tagged_contents:
+            cache.put_many(tagged_contents, tagged_keywords)
+        return all_keywords
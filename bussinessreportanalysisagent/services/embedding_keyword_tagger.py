@@ -0,0 +1,161 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.runnables import Runnable
+from loguru import logger
+
+from bussinessreportanalysisagent.db.embeddings import EmbeddingError, VectorEmbeddings
+from bussinessreportanalysisagent.db.tag_cache import KeywordTagCache
+from bussinessreportanalysisagent.services.content_keyword_generation import ContentKeyword
+
+# Text embedded for each keyword label, a bare label is a weak zero-shot target
+LABEL_TEMPLATE = "Annual report section about {keyword}"
+
+
+class EmbeddingKeywordTagger:
+    """
+    Zero-shot page tagger: the keyword labels are embedded once, each page is tagged
+    with the labels closest to its embedding. Pages whose best labels do not stand out
+    (low similarity or low margin over the next label) are escalated to the LLM tagger.
+    Pages longer than the model's max_seq_length are embedded from their beginning.
+    """
+
+    def __init__(
+        self,
+        keywords_list: List[str],
+        embeddings: VectorEmbeddings,
+        top_k: int = 3,
+        min_similarity: float = 0.25,
+        min_margin: float = 0.02,
+        escalate: bool = True,
+        batch_size: int = 32,
+    ) -> None:
+        """
+        Args:
+            keywords_list (List[str]): Allowed keywords from config.yml
+            embeddings (VectorEmbeddings): Embedding model of the pages and labels
+            top_k (int): Maximum number of tags per page
+            min_similarity (float): Minimum cosine similarity of a tag
+            min_margin (float): Minimum gap between the best label and the first label
+                not kept, below it the page is escalated
+            escalate (bool): Tag the low-margin pages with the LLM, else keep the
+                embedding tags
+            batch_size (int): Number of pages embedded per call
+        """
+        self.keywords_list = keywords_list
+        self.embeddings = embeddings
+        self.top_k = min(top_k, len(keywords_list))
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.escalate = escalate
+        self.batch_size = batch_size
+        self.label_vectors = self._normalize(
+            embeddings.get_embeddings([LABEL_TEMPLATE.format(keyword=keyword) for keyword in keywords_list])
+        )
+        self.pages = 0
+        self.escalated = 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def similarities(self, contents: List[str]) -> np.ndarray:
+        """
+        Cosine similarity of each page to each label.
+
+        Returns:
+            np.ndarray: Array of shape (len(contents), len(keywords_list)), rows of the
+                pages that could not be embedded are NaN
+        """
+        try:
+            page_vectors = self.embeddings.get_embeddings(contents, batch_size=self.batch_size)
+        except EmbeddingError as e:
+            logger.warning(f"Embedding tagger could not embed {len(e.failures)} pages: {e}")
+            if e.embeddings is None:
+                return np.full((len(contents), len(self.keywords_list)), np.nan, dtype=np.float32)
+            page_vectors = e.embeddings
+        return self._normalize(page_vectors) @ self.label_vectors.T
+
+    def predict(self, contents: List[str]) -> tuple[List[List[str]], np.ndarray]:
+        """
+        Tag pages from their embeddings alone.
+
+        Args:
+            contents (List[str]): Page contents
+
+        Returns:
+            tuple[List[List[str]], np.ndarray]: Keywords of each page, best first, and
+                the mask of the low-confidence pages
+        """
+        similarities = self.similarities(contents)
+        failed = np.isnan(similarities).any(axis=1)
+        similarities = np.nan_to_num(similarities, nan=-1.0)
+
+        # Top k + 1 labels of every page at once, the extra one gives the margin
+        kth = min(self.top_k, similarities.shape[1] - 1)
+        candidates = np.argpartition(-similarities, kth, axis=1)[:, : kth + 1]
+        rows = np.arange(len(contents))[:, None]
+        ranked = np.take_along_axis(candidates, np.argsort(-similarities[rows, candidates], axis=1), axis=1)
+        scores = similarities[rows, ranked]
+
+        margins = scores[:, 0] - scores[:, kth] if kth == self.top_k else scores[:, 0]
+        low_confidence = failed | (scores[:, 0] < self.min_similarity) | (margins < self.min_margin)
+        keep = scores[:, : self.top_k] >= self.min_similarity
+        all_keywords = [
+            [self.keywords_list[label] for label, kept in zip(labels, kept_labels) if kept]
+            for labels, kept_labels in zip(ranked[:, : self.top_k], keep)
+        ]
+        return all_keywords, low_confidence
+
+    def tag(
+        self,
+        contents: List[str],
+        chain: Optional[Runnable] = None,
+        max_concurrency: int = 8,
+        cache: KeywordTagCache = None,
+    ) -> List[List[str]]:
+        """
+        Tag a batch of pages, escalating the low-confidence ones to the LLM chain.
+
+        Args:
+            contents (List[str]): Page contents
+            chain (Optional[Runnable]): Chain returned by `ContentKeyword.build_chain`,
+                None to keep the embedding tags of every page
+            max_concurrency (int): Maximum number of in-flight model calls
+            cache (KeywordTagCache, optional): Tag cache of the LLM answers
+
+        Returns:
+            List[List[str]]: Keywords for each content, in the same order as `contents`
+        """
+        all_keywords, low_confidence = self.predict(contents)
+        escalated = np.flatnonzero(low_confidence).tolist() if self.escalate and chain is not None else []
+        if escalated:
+            llm_keywords = ContentKeyword.get_content_keywords_batch(
+                keywords_list=self.keywords_list,
+                contents=[contents[index] for index in escalated],
+                chain=chain,
+                max_concurrency=max_concurrency,
+                cache=cache,
+            )
+            for index, keywords in zip(escalated, llm_keywords):
+                # Keep the embedding tags when the LLM call failed
+                all_keywords[index] = keywords or all_keywords[index]
+        self.pages += len(contents)
+        self.escalated += len(escalated)
+        return all_keywords
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "pages": self.pages,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / self.pages if self.pages else 0.0,
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        logger.info(
+            f"Embedding tagger: {stats['pages']} pages, {stats['escalated']} escalated to the LLM "
+            f"({stats['escalation_rate']:.1%})."
+        )
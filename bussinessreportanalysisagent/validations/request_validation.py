@@ -0,0 +1,27 @@
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+
+class QnaRequest(BaseModel):
+    question: str = Field(min_length=1)
+    company_name: Optional[str] = None
+    year: Optional[int] = None
+
+
+class SummaryRequest(BaseModel):
+    question: str = Field(min_length=1)
+    keyword: str = Field(min_length=1)
+    company_name: Optional[str] = None
+    year: Optional[int] = None
+
+
+class TrendsRequest(BaseModel):
+    keywords: List[str] = Field(min_length=1)
+    year: Optional[Union[int, List[int]]] = None
+
+
+class FigureTrendRequest(BaseModel):
+    query: str = Field(min_length=1)
+    company_name: Optional[Union[str, List[str]]] = None
+    year: Optional[Union[int, List[int]]] = None
@@ -1,7 +1,7 @@
 from loguru import logger
 from zenml import pipeline
 
-from steps.etl import load_data_from_dir, parse_and_chunk_data
+from steps.etl import load_data_from_dir, parse_and_chunk_data, stream_ingest_data
 from steps.utils import load_config_data
 
 
@@ -9,17 +9,43 @@ from steps.utils import load_config_data
 def data_etl_pipeline(
     dir_path: str,
     config_file_path: str,
+    use_tag_cache: bool = True,
+    clear_tag_cache: bool = False,
+    streaming: bool = False,
+    incremental: bool = False,
 ) -> None:
     """Pipeline to load data from a directory and parse it.
 
     Args:
         dir_path (str): Path to the directory containing the pdf files.
         config_file_path (str): Path to the configuration file.
+        use_tag_cache (bool): Reuse cached keyword tags of unchanged pages.
+        clear_tag_cache (bool): Empty the keyword tag cache before loading.
+        streaming (bool): Stream pages, chunks and vectors straight into Qdrant in a
+            single step instead of materializing every stage.
+        incremental (bool): Only ingest new or changed reports and remove the points of
+            deleted ones. Implies streaming, the only mode that stores points.
     """
     logger.info("Starting data ETL pipeline")
     # Load configuration data
     config_data = load_config_data(config_file_path)
 
-    docs = load_data_from_dir(dir_path=dir_path, config_data=config_data)
+    if streaming or incremental:
+        stream_ingest_data(
+            dir_path=dir_path,
+            config_data=config_data,
+            use_tag_cache=use_tag_cache,
+            clear_tag_cache=clear_tag_cache,
+            incremental=incremental,
+        )
+        logger.info("Data ETL pipeline completed successfully")
+        return
+
+    docs = load_data_from_dir(
+        dir_path=dir_path,
+        config_data=config_data,
+        use_tag_cache=use_tag_cache,
+        clear_tag_cache=clear_tag_cache,
+    )
     parse_and_chunk_data(loaded_documents=docs, config_data=config_data)
     logger.info("Data ETL pipeline completed successfully")
@@ -33,6 +33,27 @@ def main():
         required=True,
     )
 
+    parser.add_argument(
+        "--no-tag-cache",
+        action="store_true",
+        help="Bypass the keyword tag cache and tag every page with the LLM",
+    )
+    parser.add_argument(
+        "--clear-tag-cache",
+        action="store_true",
+        help="Clear the keyword tag cache before running the pipeline",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Stream pages, chunks and vectors into Qdrant with bounded memory",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only ingest new or changed reports since the last run (implies --streaming)",
+    )
+
     args = parser.parse_args()
 
     dir_path = args.dir_path
@@ -45,6 +66,10 @@ def main():
     data_etl_pipeline(
         dir_path=dir_path,
         config_file_path=config_file_path,
+        use_tag_cache=not args.no_tag_cache,
+        clear_tag_cache=args.clear_tag_cache,
+        streaming=args.streaming,
+        incremental=args.incremental,
     )
     logger.info("ETL pipeline completed successfully")
 
@@ -1,36 +1,85 @@
+import os
+
 from langchain_core.documents import Document
 from loguru import logger
 from typing_extensions import Annotated
 from zenml import get_step_context, step
 
-from bussinessreportanalysisagent.application.preprocessing.chunking import Chunking
 from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader
+from bussinessreportanalysisagent.core.components import (
+    bump_ingest_versions,
+    configure_metrics,
+    get_chunking,
+    get_cleaner,
+    get_deduplicator,
+    get_embedding_cache,
+    get_embedding_tagger,
+    get_financial_table_store,
+    get_table_extractor,
+    get_tag_cache,
+    get_vector_store,
+    store_financial_tables,
+    update_report_index,
+)
+from bussinessreportanalysisagent.db.ingest_manifest import IngestManifest
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+from bussinessreportanalysisagent.metrics import metrics
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile
 
 
 @step()
-def load_data_from_dir(dir_path: str, config_data: dict) -> Annotated[list[list[Document]], "loaded_documents"]:
+def load_data_from_dir(
+    dir_path: str,
+    config_data: dict,
+    use_tag_cache: bool = True,
+    clear_tag_cache: bool = False,
+) -> Annotated[list[list[Document]], "loaded_documents"]:
     """Load data from a directory.
 
     Args:
         dir_path (str): Path to the directory containing the pdf files.
+        use_tag_cache (bool): Reuse keyword tags of unchanged pages from the tag cache.
+        clear_tag_cache (bool): Empty the tag cache before loading.
 
     Returns:
         list[str]: List of file paths.
     """
 
     logger.info(f"Loading data from directory: {dir_path}")
+    configure_metrics(config_data)
+    since = metrics.snapshot()
 
     try:
+        tagging_config = config_data['configurations']["keyword_tagging_config"]
+        tag_cache = get_tag_cache(config_data, use_tag_cache, clear_tag_cache)
 
         docs = PdfLoader().load_and_parse(
             pdfs_file_path=dir_path,
             keywords_list=config_data['configurations']["content_keywords_list"],
             model_name=config_data['configurations']["llm_model_config"]["groq_model"]["model_id"],
-            model_temperature=config_data['configurations']["llm_model_config"]["groq_model"]["temperature"]
+            model_temperature=config_data['configurations']["llm_model_config"]["groq_model"]["temperature"],
+            batch_size=tagging_config["batch_size"],
+            max_concurrency=tagging_config["max_concurrency"],
+            max_retries=tagging_config["max_retries"],
+            tag_cache=tag_cache,
+            num_workers=config_data['configurations']["pdf_loading_config"]["num_workers"],
+            pages_per_task=config_data['configurations']["pdf_loading_config"]["pages_per_task"],
+            embedding_tagger=get_embedding_tagger(config_data),
+            cleaner=get_cleaner(config_data),
         )
+        if tag_cache:
+            tag_cache.close()
+        table_extractor = get_table_extractor(config_data)
+        if table_extractor and docs:
+            for doc in (doc for report_docs in docs for doc in report_docs):
+                table_extractor.record_page(doc)
+            store_financial_tables(table_extractor, get_financial_table_store(config_data))
         logger.info("Data loaded successfully")
+        metrics.log_summary(since)
         step_context = get_step_context()
-        step_context.add_output_metadata(output_name="loaded_documents", metadata={"dir_path": dir_path})
+        step_context.add_output_metadata(
+            output_name="loaded_documents", metadata={"dir_path": dir_path, "stage_metrics": metrics.summary(since)}
+        )
 
         return docs
     
@@ -52,25 +101,178 @@ def parse_and_chunk_data(
     Returns:
         list[str]: List of parsed text.
     """
+    configure_metrics(config_data)
+    since = metrics.snapshot()
     try:
         logger.info("Parsing data")
-        chunking = Chunking(
-            model_id=config_data['configurations']["embedding_model_config"]["model_id"],
-            chunk_size=config_data['configurations']["embedding_model_config"]["chunk_size"],
-            chunk_overlap=config_data['configurations']["embedding_model_config"]["chunk_overlap"],
-            max_seq_length=config_data['configurations']["embedding_model_config"]["max_seq_length"]
-        )
+        chunking = get_chunking(config_data)
+        # Nothing is stored by this step, so duplicates are only looked up within the run
+        deduplicator = get_deduplicator(config_data, persistent=False)
 
-        chunked_documents = []
-        for doc in loaded_documents:
-            for page in doc:
-                chunked_documents.extend(chunking.chunk_text(page.page_content))
+        chunks = (chunk for doc in loaded_documents for chunk in chunking.iter_chunks(doc))
+        if deduplicator:
+            chunks = deduplicator.iter_unique(chunks, QdrantVectorStore.point_id)
+        chunked_documents = [chunk.page_content for chunk in chunks]
+        if deduplicator:
+            deduplicator.log_stats()
+            deduplicator.close()
 
         logger.info("Data parsed successfully")
+        metrics.log_summary(since)
         step_context = get_step_context()
-        step_context.add_output_metadata(output_name="parsed_chunk_documents", metadata={"chunked_documents": chunked_documents})
+        step_context.add_output_metadata(
+            output_name="parsed_chunk_documents",
+            metadata={"chunked_documents": chunked_documents, "stage_metrics": metrics.summary(since)},
+        )
         return chunked_documents
     except Exception as e:
         logger.error(f"Error parsing data: {e}")
         return []
-    
\ No newline at end of file
+
+
+@step()
+def stream_ingest_data(
+    dir_path: str,
+    config_data: dict,
+    use_tag_cache: bool = True,
+    clear_tag_cache: bool = False,
+    incremental: bool = False,
+) -> Annotated[int, "ingested_points"]:
+    """Stream pdf pages through tagging, chunking, embedding and Qdrant upserts.
+
+    Pages, chunks and vectors flow through generators, so memory stays bounded by the
+    page ranges and batches in flight instead of growing with the corpus. The tables of
+    the statement pages are then extracted into the financial table store.
+
+    Args:
+        dir_path (str): Path to the directory containing the pdf files.
+        use_tag_cache (bool): Reuse keyword tags of unchanged pages from the tag cache.
+        clear_tag_cache (bool): Empty the tag cache before loading.
+        incremental (bool): Only ingest reports that are new or changed since the last
+            run according to the ingest manifest, and delete the points of removed reports.
+            Either way the previous points of every ingested report are deleted first.
+
+    Returns:
+        int: Number of points upserted into Qdrant.
+    """
+    logger.info(f"Streaming ingestion from directory: {dir_path}")
+    configure_metrics(config_data)
+    since = metrics.snapshot()
+
+    try:
+        tagging_config = config_data['configurations']["keyword_tagging_config"]
+        vector_database_config = config_data['configurations']["vector_database_config"]
+        embedding_cache = get_embedding_cache(config_data)
+        vector_store = get_vector_store(config_data, embedding_cache=embedding_cache)
+        deduplicator = get_deduplicator(config_data)
+        if deduplicator:
+            deduplicator.sync(vector_store)
+        table_extractor = get_table_extractor(config_data)
+        table_store = get_financial_table_store(config_data)
+
+        manifest, removed_files = None, []
+        if incremental:
+            manifest = IngestManifest(config_data['configurations']["pdf_loading_config"]["manifest_path"])
+            candidate_files, removed_files = manifest.diff(dir_path)
+        else:
+            candidate_files = [file_name for file_name in sorted(os.listdir(dir_path)) if file_name.endswith(".pdf")]
+        file_names = []
+        for file_name in candidate_files:
+            try:
+                AnnualReportFile(filename=file_name)
+                file_names.append(file_name)
+            except ValueError as e:
+                logger.error(f"Skipping {file_name}: {e}")
+
+        # A re-ingested report replaces all of its points, so the chunks of a longer
+        # previous version do not stay searchable
+        vector_store.create_collection(vector_size=vector_database_config["vector_size"])
+        for file_name in removed_files + file_names:
+            report = AnnualReportFile(filename=file_name)
+            vector_store.delete_report_points(report.company_name, report.year)
+            if deduplicator:
+                deduplicator.remove_report(report.company_name, report.year)
+            if table_store:
+                table_store.remove_report(report.company_name, report.year)
+        for file_name in removed_files:
+            manifest.remove(file_name)
+
+        ingested_points = 0
+        if file_names:
+            tag_cache = get_tag_cache(config_data, use_tag_cache, clear_tag_cache)
+            pages = PdfLoader.iter_documents(
+                pdfs_file_path=dir_path,
+                keywords_list=config_data['configurations']["content_keywords_list"],
+                model_name=config_data['configurations']["llm_model_config"]["groq_model"]["model_id"],
+                model_temperature=config_data['configurations']["llm_model_config"]["groq_model"]["temperature"],
+                batch_size=tagging_config["batch_size"],
+                max_concurrency=tagging_config["max_concurrency"],
+                max_retries=tagging_config["max_retries"],
+                tag_cache=tag_cache,
+                num_workers=config_data['configurations']["pdf_loading_config"]["num_workers"],
+                pages_per_task=config_data['configurations']["pdf_loading_config"]["pages_per_task"],
+                file_names=file_names,
+                embedding_tagger=get_embedding_tagger(config_data),
+                cleaner=get_cleaner(config_data),
+            )
+            if table_extractor:
+                pages = table_extractor.track_pages(pages)
+            chunks = get_chunking(config_data).iter_chunks(pages)
+            if deduplicator:
+                chunks = deduplicator.iter_unique(chunks, vector_store.point_id)
+            ingested_points = vector_store.load_data_into_qdrant(
+                all_documents=chunks,
+                vector_size=vector_database_config["vector_size"],
+                batch_size=vector_database_config["upsert_batch_size"],
+                max_concurrent_upserts=vector_database_config["max_concurrent_upserts"],
+                max_request_bytes=vector_database_config["max_request_bytes"],
+                max_retries=vector_database_config["upsert_max_retries"],
+                on_upserted=deduplicator.confirm if deduplicator else None,
+                on_failed=deduplicator.discard if deduplicator else None,
+            )
+            if tag_cache:
+                tag_cache.close()
+            if deduplicator:
+                deduplicator.apply_merges(vector_store)
+                deduplicator.log_stats()
+            if table_extractor:
+                store_financial_tables(table_extractor, table_store)
+
+        if manifest:
+            # Only record reports whose points actually landed, failed ones are retried next run
+            ingested_files = []
+            for file_name in file_names:
+                report = AnnualReportFile(filename=file_name)
+                num_points = vector_store.count_report_points(report.company_name, report.year)
+                if num_points:
+                    manifest.record(dir_path, file_name, num_points)
+                    ingested_files.append(file_name)
+                else:
+                    logger.warning(f"No points stored for {file_name}, it will be retried on the next run")
+            manifest.close()
+            update_report_index(config_data, ingested_files, removed_files)
+            bump_ingest_versions(config_data, ingested_files + removed_files)
+        else:
+            update_report_index(config_data, file_names, [])
+            bump_ingest_versions(config_data, file_names)
+        if embedding_cache:
+            embedding_cache.close()
+        if deduplicator:
+            deduplicator.close()
+
+        logger.info(f"Streaming ingestion completed, {ingested_points} points upserted")
+        metrics.log_summary(since)
+        step_context = get_step_context()
+        step_context.add_output_metadata(
+            output_name="ingested_points",
+            metadata={
+                "dir_path": dir_path,
+                "ingested_points": ingested_points,
+                "stage_metrics": metrics.summary(since),
+            },
+        )
+        return ingested_points
+
+    except Exception as e:
+        logger.error(f"Error in streaming ingestion: {e}")
+        return 0
@@ -0,0 +1,36 @@
+import copy
+import os
+
+import pytest
+
+from benchmarks.stubs import configure_offline_environment
+
+# The tests never call a provider, the settings only need placeholder values
+configure_offline_environment()
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+from steps.utils import load_config_data  # noqa: E402
+
+CONFIG_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "steps", "config.yml")
+
+
+@pytest.fixture
+def config_data(tmp_path) -> dict:
+    """
+    The repository configuration with every cache, index and upload path in a temporary
+    directory, and the providers that need a network or a model download disabled.
+    """
+    config_data = copy.deepcopy(load_config_data(CONFIG_FILE_PATH))
+    config = config_data["configurations"]
+    config["pdf_loading_config"]["manifest_path"] = str(tmp_path / "ingest_manifest.sqlite")
+    config["keyword_tagging_config"]["cache_path"] = str(tmp_path / "keyword_tags.sqlite")
+    config["embedding_model_config"]["cache"]["enabled"] = False
+    config["embedding_model_config"]["cache"]["cache_dir"] = str(tmp_path / "embeddings")
+    config["self_query_config"]["report_index_path"] = str(tmp_path / "report_index.json")
+    config["ingest_jobs_config"]["upload_dir"] = str(tmp_path / "uploads")
+    config["ingest_jobs_config"]["manifest_path"] = str(tmp_path / "api_ingest_manifest.sqlite")
+    config["answer_cache_config"]["versions_path"] = str(tmp_path / "ingest_versions.sqlite")
+    config["dedup_config"]["index_path"] = str(tmp_path / "dedup_index.sqlite")
+    config["financial_tables_config"]["enabled"] = False
+    config["financial_tables_config"]["store_dir"] = str(tmp_path / "financial_tables")
+    return config_data
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.core.controller import BusinessAnalysisController
+from bussinessreportanalysisagent.db.answer_cache import SemanticAnswerCache
+from bussinessreportanalysisagent.db.ingest_versions import IngestVersions
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+
+
+@pytest.fixture
+def versions_path(tmp_path) -> str:
+    return str(tmp_path / "ingest_versions.sqlite")
+
+
+@pytest.fixture
+def answer_cache(versions_path):
+    versions = IngestVersions(versions_path)
+    yield SemanticAnswerCache(versions, similarity_threshold=0.95)
+    versions.close()
+
+
+def put(answer_cache: SemanticAnswerCache, scope_key: str, company_names, vector) -> None:
+    versions = answer_cache.current_versions(company_names)
+    answer_cache.put(scope_key, versions, vector, "What is the net debt?", "EUR 1bn", [], cost_seconds=2.0)
+
+
+def get(answer_cache: SemanticAnswerCache, scope_key: str, company_names, vector):
+    return answer_cache.get(scope_key, answer_cache.current_versions(company_names), vector)
+
+
+def test_similar_question_of_the_same_scope_hits(answer_cache):
+    scope_key = SemanticAnswerCache.scope_key("qna", ["VGS"], [2022])
+    put(answer_cache, scope_key, ["VGS"], [1.0, 0.0, 0.0])
+
+    assert get(answer_cache, scope_key, ["VGS"], [0.99, 0.05, 0.0]).answer == "EUR 1bn"
+    assert get(answer_cache, scope_key, ["VGS"], [0.0, 1.0, 0.0]) is None
+    assert get(answer_cache, SemanticAnswerCache.scope_key("qna", ["VGS"], [2021]), ["VGS"], [1.0, 0.0, 0.0]) is None
+    assert answer_cache.stats()["hits"] == 1
+
+
+def test_ingesting_a_report_of_the_company_invalidates_its_answers(answer_cache, versions_path):
+    vgs_scope = SemanticAnswerCache.scope_key("qna", ["VGS"])
+    other_scope = SemanticAnswerCache.scope_key("qna", ["Other"])
+    put(answer_cache, vgs_scope, ["VGS"], [1.0, 0.0])
+    put(answer_cache, other_scope, ["Other"], [1.0, 0.0])
+
+    # Bumped by another process, e.g. the ETL pipeline, through the shared SQLite file
+    pipeline_versions = IngestVersions(versions_path)
+    pipeline_versions.bump(["VGS"])
+    pipeline_versions.close()
+
+    assert get(answer_cache, vgs_scope, ["VGS"], [1.0, 0.0]) is None
+    assert get(answer_cache, other_scope, ["Other"], [1.0, 0.0]) is not None
+    assert len(answer_cache.entries) == 1
+
+
+def test_any_ingestion_invalidates_the_answers_without_a_company(answer_cache):
+    scope_key = SemanticAnswerCache.scope_key("summary")
+    put(answer_cache, scope_key, None, [1.0, 0.0])
+    assert get(answer_cache, scope_key, None, [1.0, 0.0]) is not None
+
+    answer_cache.versions.bump(["Other"])
+    assert get(answer_cache, scope_key, None, [1.0, 0.0]) is None
+
+
+def test_expired_and_evicted_answers_are_not_returned(versions_path):
+    versions = IngestVersions(versions_path)
+    expiring = SemanticAnswerCache(versions, ttl_seconds=-1)
+    put(expiring, "scope", ["VGS"], [1.0, 0.0])
+    assert get(expiring, "scope", ["VGS"], [1.0, 0.0]) is None
+
+    small = SemanticAnswerCache(versions, max_entries=1)
+    put(small, "first", ["VGS"], [1.0, 0.0])
+    put(small, "second", ["VGS"], [1.0, 0.0])
+    assert get(small, "first", ["VGS"], [1.0, 0.0]) is None
+    assert get(small, "second", ["VGS"], [1.0, 0.0]) is not None
+    versions.close()
+
+
+def test_answer_generated_while_a_report_was_ingested_is_stale(answer_cache):
+    scope_key = SemanticAnswerCache.scope_key("qna", ["VGS"])
+    versions = answer_cache.current_versions(["VGS"])
+    # A VGS report is ingested after retrieval, while the answer is generated
+    answer_cache.versions.bump(["VGS"])
+    answer_cache.put(scope_key, versions, [1.0, 0.0], "What is the net debt?", "EUR 1bn", [], cost_seconds=2.0)
+
+    assert get(answer_cache, scope_key, ["VGS"], [1.0, 0.0]) is None
+
+
+def controller_with_cache(answer_cache: SemanticAnswerCache) -> BusinessAnalysisController:
+    vector_store = QdrantVectorStore("reports", "gemini", "models/stub", client=QdrantClient(":memory:"))
+    vector_store.doc_store = StubEmbeddings(8)
+    vector_store.create_collection(vector_size=8)
+    vector_store.bulk_insert_documents(
+        [
+            Document(
+                page_content="Net debt fell to EUR 1bn",
+                metadata={"Company_Name": "VGS", "Year": 2022, "page": 1, "chunk_index": 0},
+            )
+        ]
+    )
+    return BusinessAnalysisController(
+        retriever=BusinessReportRetriever(vector_store),
+        llm=StubChatModel(latency=0.0, response="EUR 1bn"),
+        answer_cache=answer_cache,
+    )
+
+
+async def ask(controller: BusinessAnalysisController, on_token=lambda: None) -> str:
+    _, tokens = await controller.qnaResponse("What is the net debt?", "VGS", 2022)
+    answer = []
+    async for token in tokens:
+        on_token()
+        answer.append(token)
+    return "".join(answer)
+
+
+def test_controller_does_not_serve_an_answer_outdated_during_generation(answer_cache):
+    controller = controller_with_cache(answer_cache)
+
+    assert asyncio.run(ask(controller, on_token=lambda: answer_cache.versions.bump(["VGS"]))) == "EUR 1bn"
+    assert asyncio.run(ask(controller)) == "EUR 1bn"
+    assert answer_cache.stats()["hits"] == 0
+    assert asyncio.run(ask(controller)) == "EUR 1bn"
+    assert answer_cache.stats()["hits"] == 1
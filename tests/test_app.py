@@ -0,0 +1,134 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+from app import create_app
+from benchmarks.stubs import StubChatModel, StubEmbeddings
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.application.rag.self_query import SelfQuery
+from bussinessreportanalysisagent.core.controller import BusinessAnalysisController
+from bussinessreportanalysisagent.db.report_index import ReportIndex
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile
+
+ANSWER = "Net debt fell to 1.2 billion euros."
+CHUNKS = [
+    ("VGS", 2021, ["Net Debt"], "Net debt was 1.5 billion euros"),
+    ("VGS", 2022, ["Net Debt"], "Net debt fell to 1.2 billion euros"),
+    ("VGS", 2022, ["Risks"], "Interest rate risk increased"),
+    ("Acme", 2022, ["Net Debt"], "Acme repaid its bonds"),
+]
+
+
+class FailingChatModel(StubChatModel):
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield await anext(super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs))
+        raise RuntimeError("connection reset")
+
+
+class FakeIngestQueue:
+    def shutdown(self) -> None:
+        pass
+
+
+def stub_controller(llm: StubChatModel, index_dir) -> BusinessAnalysisController:
+    vector_store = QdrantVectorStore("reports", "gemini", "models/stub", client=QdrantClient(":memory:"))
+    vector_store.doc_store = StubEmbeddings(8)
+    vector_store.create_collection(vector_size=8)
+    vector_store.bulk_insert_documents(
+        [
+            Document(
+                page_content=text,
+                metadata={"Company_Name": company, "Year": year, "keywords": keywords, "page": index, "chunk_index": 0},
+            )
+            for index, (company, year, keywords, text) in enumerate(CHUNKS)
+        ]
+    )
+    report_index = ReportIndex(str(index_dir / "report_index.json"))
+    for company, year, _, _ in CHUNKS:
+        report_index.add(AnnualReportFile(filename=f"{company}_{year}.pdf"))
+    return BusinessAnalysisController(
+        retriever=BusinessReportRetriever(vector_store),
+        llm=llm,
+        self_query=SelfQuery(report_index, use_llm=False),
+    )
+
+
+@pytest.fixture
+def make_client(tmp_path):
+    def make_client(llm: StubChatModel = None) -> TestClient:
+        llm = llm or StubChatModel(latency=0.0, response=ANSWER)
+        app = create_app(lambda: stub_controller(llm, tmp_path), lambda controller: FakeIngestQueue())
+        return TestClient(app)
+
+    return make_client
+
+
+def events(response) -> list[tuple[str, object]]:
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        parsed.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return parsed
+
+
+def answer_and_sources(response) -> tuple[str, list]:
+    parsed = events(response)
+    assert [event for event, _ in parsed[-2:]] == ["sources", "done"]
+    assert all(event == "token" for event, _ in parsed[:-2])
+    return "".join(data["token"] for _, data in parsed[:-2]), parsed[-2][1]
+
+
+def test_qna_streams_the_answer_tokens_then_the_sources(make_client):
+    with make_client() as client:
+        response = client.post("/qna", json={"question": "What was the net debt?", "company_name": "VGS", "year": 2022})
+
+    answer, sources = answer_and_sources(response)
+    assert answer == ANSWER
+    assert len(events(response)) > 3
+    assert {(source["company_name"], source["year"]) for source in sources} == {("VGS", 2022)}
+    assert all(source["point_id"] for source in sources)
+
+
+def test_qna_scopes_retrieval_with_the_filters_in_the_question(make_client):
+    with make_client() as client:
+        response = client.post("/qna", json={"question": "What was the net debt of Acme in 2022?"})
+
+    _, sources = answer_and_sources(response)
+    assert [(source["company_name"], source["year"]) for source in sources] == [("Acme", 2022)]
+
+
+def test_summary_and_trends_retrieve_the_keyword_chunks(make_client):
+    with make_client() as client:
+        summary = client.post(
+            "/summary", json={"question": "Summarise the risks", "keyword": "Risks", "company_name": "VGS"}
+        )
+        trends = client.post("/trends", json={"keywords": ["Net Debt"], "year": 2022})
+
+    answer, sources = answer_and_sources(summary)
+    assert answer == ANSWER
+    assert [source["page"] for source in sources] == [2]
+    _, sources = answer_and_sources(trends)
+    assert sorted(source["company_name"] for source in sources) == ["Acme", "VGS"]
+
+
+def test_streaming_failure_ends_with_an_error_event(make_client):
+    with make_client(FailingChatModel(latency=0.0, response=ANSWER)) as client:
+        response = client.post("/qna", json={"question": "What was the net debt?", "company_name": "VGS"})
+
+    parsed = events(response)
+    assert parsed[0] == ("token", {"token": "Net"})
+    assert parsed[-1] == ("error", {"detail": "connection reset"})
+
+
+def test_invalid_requests_are_rejected(make_client):
+    with make_client() as client:
+        assert client.post("/qna", json={"question": ""}).status_code == 422
+        assert client.post("/summary", json={"question": "Summarise"}).status_code == 422
+        assert client.post("/trends", json={"keywords": []}).status_code == 422
+        assert client.get("/cache/answers").json() == {"enabled": False}
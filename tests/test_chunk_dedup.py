@@ -0,0 +1,122 @@
+import json
+import random
+
+import pytest
+from langchain_core.documents import Document
+
+from bussinessreportanalysisagent.db.chunk_dedup import ChunkDeduplicator
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+
+WORDS = "revenue growth margin debt equity capital market customer network strategy risk cash".split()
+
+
+def passage(seed: int, length: int = 80) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(length))
+
+
+def chunk(text: str, year: int, page: int, company_name: str = "VGS", keywords=None) -> Document:
+    return Document(
+        page_content=text,
+        metadata={
+            "Company_Name": company_name,
+            "Year": year,
+            "page": page,
+            "chunk_index": 0,
+            "keywords": keywords or [],
+        },
+    )
+
+
+@pytest.fixture
+def deduplicator():
+    deduplicator = ChunkDeduplicator(":memory:")
+    yield deduplicator
+    deduplicator.close()
+
+
+def unique(deduplicator: ChunkDeduplicator, chunks) -> list:
+    return list(deduplicator.iter_unique(chunks, QdrantVectorStore.point_id))
+
+
+def stored_years(deduplicator: ChunkDeduplicator, point_id: str):
+    row = deduplicator.connection.execute("SELECT years FROM signatures WHERE point_id = ?", (point_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def test_drops_near_duplicates_of_the_same_company_only(deduplicator):
+    text = passage(0)
+    near_duplicate = text.replace("revenue", "turnover", 1)
+    kept = unique(
+        deduplicator,
+        [
+            chunk(text, 2021, page=1),
+            chunk(near_duplicate, 2021, page=2),
+            chunk(passage(1), 2021, page=3),
+            chunk(text, 2021, page=1, company_name="Other"),
+        ],
+    )
+
+    assert [document.metadata["page"] for document in kept] == [1, 3, 1]
+    assert all(document.id for document in kept)
+    assert deduplicator.duplicates == 1
+
+
+def test_merges_the_year_and_keywords_of_a_duplicate(deduplicator):
+    first = unique(deduplicator, [chunk(passage(0), 2021, page=1, keywords=["Net Debt"])])
+    deduplicator.confirm([document.id for document in first])
+
+    assert unique(deduplicator, [chunk(passage(0), 2022, page=5, keywords=["Risks"])]) == []
+    assert stored_years(deduplicator, first[0].id) == [2021, 2022]
+    assert deduplicator.merges[first[0].id] == {"years": {2022}, "keywords": {"Risks"}}
+
+
+def test_remove_report_drops_its_year_then_its_chunks(deduplicator):
+    first = unique(deduplicator, [chunk(passage(0), 2021, page=1)])
+    deduplicator.confirm([document.id for document in first])
+    unique(deduplicator, [chunk(passage(0), 2022, page=1)])
+
+    deduplicator.remove_report("VGS", 2021)
+    assert stored_years(deduplicator, first[0].id) == [2022]
+    deduplicator.remove_report("VGS", 2022)
+    assert stored_years(deduplicator, first[0].id) is None
+    assert len(unique(deduplicator, [chunk(passage(0), 2023, page=1)])) == 1
+
+
+def test_pending_chunks_are_indexed_on_confirm_and_forgotten_on_discard(deduplicator):
+    kept = unique(deduplicator, [chunk(passage(0), 2021, page=1), chunk(passage(1), 2021, page=2)])
+    # Duplicates of pending chunks are dropped before the upsert is acknowledged
+    assert unique(deduplicator, [chunk(passage(1), 2022, page=2)]) == []
+
+    deduplicator.confirm([kept[0].id])
+    deduplicator.discard([kept[1].id])
+    assert stored_years(deduplicator, kept[0].id) == [2021]
+    assert stored_years(deduplicator, kept[1].id) is None
+    assert kept[1].id not in deduplicator.merges
+    assert deduplicator.pending == {} and deduplicator.pending_buckets == {}
+    # The failed point no longer hides its passage
+    assert len(unique(deduplicator, [chunk(passage(1), 2023, page=2)])) == 1
+
+
+def test_a_point_id_owned_by_another_year_is_not_reused(deduplicator):
+    # The 2022 chunk survives as the point of both years, then 2022 is re-ingested
+    first = unique(deduplicator, [chunk(passage(0), 2022, page=1)])
+    deduplicator.confirm([document.id for document in first])
+    unique(deduplicator, [chunk(passage(0), 2021, page=1)])
+    deduplicator.remove_report("VGS", 2022)
+
+    replaced = unique(deduplicator, [chunk(passage(2), 2022, page=1)])
+    assert len(replaced) == 1
+    assert replaced[0].id != first[0].id
+    assert stored_years(deduplicator, first[0].id) == [2021]
+
+
+def test_index_is_cleared_when_the_minhash_parameters_change(tmp_path):
+    index_path = str(tmp_path / "dedup.sqlite")
+    deduplicator = ChunkDeduplicator(index_path)
+    deduplicator.confirm([document.id for document in unique(deduplicator, [chunk(passage(0), 2021, page=1)])])
+    deduplicator.close()
+
+    deduplicator = ChunkDeduplicator(index_path, num_perm=64)
+    assert deduplicator.connection.execute("SELECT COUNT(*) FROM signatures").fetchone()[0] == 0
+    deduplicator.close()
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+from langchain_core.documents import Document
+
+from benchmarks.stubs import stub_tokenizer
+from benchmarks.synthetic_corpus import WORDS
+from bussinessreportanalysisagent.application.preprocessing.chunking import TokenChunking
+
+MAX_SEQ_LENGTH = 32
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return stub_tokenizer()
+
+
+def page_text(seed: int, num_words: int = 200) -> str:
+    words = random.Random(seed).choices(WORDS, k=num_words)
+    return "\n".join(" ".join(words[start : start + 10]).capitalize() for start in range(0, num_words, 10))
+
+
+def tokens(tokenizer, text: str) -> list[str]:
+    return tokenizer.tokenize(text)
+
+
+def test_chunks_fit_the_sequence_length_and_cover_the_page(tokenizer):
+    chunker = TokenChunking("stub", max_seq_length=MAX_SEQ_LENGTH, tokenizer=tokenizer)
+    text = page_text(0)
+
+    chunks = chunker.chunk_text(text)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(tokenizer(chunk)["input_ids"]) <= MAX_SEQ_LENGTH
+        # Chunks are cut from the original text, casing and line breaks included
+        assert chunk in text
+    assert [token for chunk in chunks for token in tokens(tokenizer, chunk)] == tokens(tokenizer, text)
+
+
+def test_consecutive_chunks_share_the_overlap(tokenizer):
+    overlap = 5
+    chunker = TokenChunking("stub", max_seq_length=MAX_SEQ_LENGTH, chunk_overlap=overlap, tokenizer=tokenizer)
+
+    chunks = chunker.chunk_text(page_text(1))
+
+    assert len(chunks) > 2
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert tokens(tokenizer, previous)[-overlap:] == tokens(tokenizer, chunk)[:overlap]
+
+
+def test_batched_chunking_matches_single_pages(tokenizer):
+    chunker = TokenChunking("stub", max_seq_length=MAX_SEQ_LENGTH, chunk_overlap=4, tokenizer=tokenizer)
+    texts = [page_text(seed, num_words=20 * seed) for seed in range(5)]
+
+    assert chunker.chunk_texts(texts) == [chunker.chunk_text(text) for text in texts]
+    assert chunker.chunk_text("") == []
+    assert chunker.chunk_text("Net debt") == ["Net debt"]
+
+
+def test_iter_chunks_keeps_page_metadata_and_numbers_chunks(tokenizer):
+    chunker = TokenChunking("stub", max_seq_length=MAX_SEQ_LENGTH, batch_size=2, tokenizer=tokenizer)
+    pages = [
+        Document(page_content=page_text(page), metadata={"Company_Name": "VGS", "Year": 2022, "page": page})
+        for page in range(1, 4)
+    ]
+
+    chunks = list(chunker.iter_chunks(iter(pages)))
+
+    for page in pages:
+        page_chunks = [chunk for chunk in chunks if chunk.metadata["page"] == page.metadata["page"]]
+        assert [chunk.page_content for chunk in page_chunks] == chunker.chunk_text(page.page_content)
+        assert [chunk.metadata["chunk_index"] for chunk in page_chunks] == list(range(len(page_chunks)))
+        assert all(chunk.metadata["Company_Name"] == "VGS" for chunk in page_chunks)
+
+
+def test_overlap_must_be_smaller_than_the_chunk(tokenizer):
+    with pytest.raises(ValueError):
+        TokenChunking("stub", max_seq_length=MAX_SEQ_LENGTH, chunk_overlap=MAX_SEQ_LENGTH - 2, tokenizer=tokenizer)
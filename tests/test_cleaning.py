@@ -0,0 +1,68 @@
+from langchain_core.documents import Document
+
+from bussinessreportanalysisagent.application.preprocessing.cleaning import RepeatedLineCleaner
+
+DISCLAIMER = "This report contains forward-looking statements that involve risks and uncertainties."
+TOPICS = ["strategy", "customers", "network", "people", "governance", "outlook"]
+
+
+def report_pages(num_pages: int) -> list[Document]:
+    return [
+        Document(
+            page_content="\n".join(
+                [
+                    "VGS Annual Report 2022",
+                    f"Our {topic}",
+                    f"The {topic} section of the report.",
+                    "2022",
+                    f"Highlights of {topic} this year.",
+                    DISCLAIMER,
+                    f"More on {topic} next year.",
+                    f"Page {page} of {num_pages}",
+                ]
+            ),
+            metadata={"source": "VGS_2022.pdf", "page": page},
+        )
+        for page, topic in enumerate(TOPICS[:num_pages], start=1)
+    ]
+
+
+def test_strips_headers_footers_and_disclaimers():
+    cleaner = RepeatedLineCleaner()
+    pages = report_pages(6)
+    cleaned = cleaner.clean_pages("VGS_2022.pdf", pages)
+
+    lines = cleaned[2].page_content.split("\n")
+    assert "VGS Annual Report 2022" not in lines
+    assert "Page 3 of 6" not in lines
+    assert DISCLAIMER not in lines
+    # A short repeated cell in the middle of the page is kept
+    assert lines == [
+        "Our network",
+        "The network section of the report.",
+        "2022",
+        "Highlights of network this year.",
+        "More on network next year.",
+    ]
+    assert [page.metadata for page in cleaned] == [page.metadata for page in pages]
+    assert cleaner.stats["reports"] == 1
+    assert cleaner.stats["pages"] == 6
+    assert cleaner.stats["lines_removed"] == 3 * 6
+
+
+def test_keeps_every_line_of_a_report_with_too_few_pages():
+    cleaner = RepeatedLineCleaner(min_pages=3)
+    pages = report_pages(2)
+    assert [page.page_content for page in cleaner.clean_pages("VGS_2022.pdf", pages)] == [
+        page.page_content for page in pages
+    ]
+
+
+def test_reports_are_cleaned_independently():
+    cleaner = RepeatedLineCleaner()
+    cleaner.clean_pages("VGS_2022.pdf", report_pages(6))
+    # Lines counted in the previous report do not carry over to this one
+    pages = report_pages(2)
+    assert cleaner.clean_pages("VGS_2021.pdf", pages)[0].page_content == pages[0].page_content
+    assert cleaner.stats["reports"] == 2
+    assert cleaner.stats["pages"] == 8
@@ -0,0 +1,196 @@
+import threading
+
+import pytest
+
+from benchmarks.stubs import StubChatModel
+from benchmarks.synthetic_corpus import write_synthetic_reports
+from bussinessreportanalysisagent.application.preprocessing import data_loader
+from bussinessreportanalysisagent.application.preprocessing.data_loader import PdfLoader
+from bussinessreportanalysisagent.metrics import metrics
+from bussinessreportanalysisagent.services.content_keyword_generation import ContentKeyword
+
+KEYWORDS = ["Net Debt", "Balance Sheet", "Risks"]
+LOCK = threading.Lock()
+
+
+class RecordingChatModel(StubChatModel):
+    """
+    Stub model recording the prompts it answers, failing on those containing `fail_on`.
+    """
+
+    latency: float = 0.0
+    fail_on: str = None
+    prompts: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = messages[0].content
+        with LOCK:
+            self.prompts.append(prompt)
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("rate limited")
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+@pytest.fixture
+def reports_dir(tmp_path) -> str:
+    reports_dir = tmp_path / "reports"
+    write_synthetic_reports(str(reports_dir), num_reports=2, pages_per_report=5, lines_per_page=5)
+    return str(reports_dir)
+
+
+def load(reports_dir: str, llm, **kwargs) -> list:
+    return PdfLoader.load_and_parse(
+        pdfs_file_path=reports_dir,
+        keywords_list=KEYWORDS,
+        model_name="stub",
+        model_temperature=0,
+        llm=llm,
+        **kwargs,
+    )
+
+
+def test_load_and_parse_tags_every_page_with_the_report_metadata(reports_dir):
+    llm = RecordingChatModel(prompts=[])
+    reports = load(reports_dir, llm, batch_size=2, max_concurrency=4)
+
+    assert [len(report) for report in reports] == [5, 5]
+    first = reports[0][0]
+    assert first.metadata["keywords"] == ["Net Debt", "Balance Sheet"]
+    assert first.metadata["Net Debt"] == "Net Debt"
+    assert (first.metadata["Company_Name"], first.metadata["Year"], first.metadata["Document_Type"]) == (
+        "Company0",
+        2019,
+        "pdf",
+    )
+    assert [page.metadata["page"] for page in reports[1]] == list(range(5))
+    assert len(llm.prompts) == 10
+
+
+def test_a_failed_page_gets_no_keywords_and_the_others_are_tagged():
+    llm = RecordingChatModel(prompts=[], fail_on="second page")
+    chain = ContentKeyword.build_chain(model_name="stub", model_temperature=0, llm=llm)
+    keywords = ContentKeyword.get_content_keywords_batch(
+        keywords_list=KEYWORDS,
+        contents=["first page", "second page", "third page"],
+        chain=chain,
+        max_concurrency=3,
+    )
+
+    assert keywords == [["Net Debt", "Balance Sheet"], [], ["Net Debt", "Balance Sheet"]]
+
+
+def test_failed_calls_are_retried(monkeypatch):
+    llm = RecordingChatModel(prompts=[], fail_on="page")
+    chain = ContentKeyword.build_chain(model_name="stub", model_temperature=0, max_retries=3, llm=llm)
+    # No backoff between attempts
+    monkeypatch.setattr("tenacity.nap.time.sleep", lambda seconds: None)
+
+    assert ContentKeyword.get_content_keywords_batch(KEYWORDS, ["page"], chain) == [[]]
+    assert len(llm.prompts) == 3
+
+
+def page_numbers(page_ranges) -> list:
+    return [(pdf_name, [page.metadata["page"] for page in pages]) for pdf_name, pages in page_ranges]
+
+
+def test_page_ranges_are_extracted_in_file_and_page_order(reports_dir):
+    in_process = list(PdfLoader.iter_page_ranges(reports_dir, num_workers=1, pages_per_task=2))
+    in_pool = list(PdfLoader.iter_page_ranges(reports_dir, num_workers=2, pages_per_task=2))
+
+    assert page_numbers(in_pool) == page_numbers(in_process) == [
+        ("Company0_2019.pdf", [0, 1]),
+        ("Company0_2019.pdf", [2, 3]),
+        ("Company0_2019.pdf", [4]),
+        ("Company1_2020.pdf", [0, 1]),
+        ("Company1_2020.pdf", [2, 3]),
+        ("Company1_2020.pdf", [4]),
+    ]
+    assert [page.page_content for _, pages in in_pool for page in pages] == [
+        page.page_content for _, pages in in_process for page in pages
+    ]
+    assert in_pool[0][1][0].metadata["total_pages"] == 5
+
+
+def test_invalid_and_unreadable_files_are_skipped(reports_dir):
+    with open(f"{reports_dir}/notes.pdf", "wb") as file:
+        file.write(b"no year in the name")
+    with open(f"{reports_dir}/Broken_2021.pdf", "wb") as file:
+        file.write(b"not a pdf")
+
+    extracted = PdfLoader.extract_pages(reports_dir, num_workers=2, pages_per_task=2)
+    assert list(extracted) == ["Company0_2019.pdf", "Company1_2020.pdf"]
+    assert [len(pages) for pages in extracted.values()] == [5, 5]
+
+
+def test_a_report_with_a_failed_range_is_left_out(reports_dir, monkeypatch):
+    extract = data_loader._extract_page_range
+
+    def fail_second_range(file_path, start_page, end_page):
+        if "Company0" in file_path and start_page == 2:
+            raise RuntimeError("damaged page")
+        return extract(file_path, start_page, end_page)
+
+    monkeypatch.setattr(data_loader, "_extract_page_range", fail_second_range)
+    assert list(PdfLoader.extract_pages(reports_dir, num_workers=1, pages_per_task=2)) == ["Company1_2020.pdf"]
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_extraction_is_timed_by_the_worker(reports_dir, num_workers):
+    since = metrics.snapshot()
+
+    list(PdfLoader.iter_page_ranges(reports_dir, num_workers=num_workers, pages_per_task=2))
+
+    stage = metrics.summary(since)["pdf_extract"]
+    assert (stage["calls"], stage["items"], stage["errors"]) == (6, 10, 0)
+    assert stage["bytes"] > 0
+
+
+def test_extraction_time_excludes_the_wait_for_the_result(reports_dir, monkeypatch):
+    extract = data_loader._extract_page_range
+
+    def slow_range(file_path, start_page, end_page):
+        if start_page == 4:
+            raise RuntimeError("damaged page")
+        pages, _ = extract(file_path, start_page, end_page)
+        return pages, 0.25
+
+    monkeypatch.setattr(data_loader, "_extract_page_range", slow_range)
+    since = metrics.snapshot()
+
+    list(PdfLoader.iter_page_ranges(reports_dir, pages_per_task=2))
+
+    stage = metrics.summary(since)["pdf_extract"]
+    assert (stage["calls"], stage["items"], stage["errors"]) == (6, 8, 2)
+    assert stage["seconds"] == 1.0
+
+
+def test_streamed_pages_match_the_loaded_ones_and_skip_failed_reports(reports_dir, monkeypatch):
+    llm = RecordingChatModel(prompts=[])
+    loaded = [page for report in load(reports_dir, llm, batch_size=2) for page in report]
+    streamed = PdfLoader.iter_documents(
+        pdfs_file_path=reports_dir, keywords_list=KEYWORDS, model_name="stub", model_temperature=0, batch_size=2, llm=llm
+    )
+    first = next(streamed)
+    assert first.page_content == loaded[0].page_content
+    assert [(page.page_content, page.metadata) for page in [first, *streamed]] == [
+        (page.page_content, page.metadata) for page in loaded
+    ]
+
+    extract = data_loader._extract_page_range
+
+    def fail_last_range(file_path, start_page, end_page):
+        if "Company0" in file_path and start_page == 4:
+            raise RuntimeError("damaged page")
+        return extract(file_path, start_page, end_page)
+
+    # The first ranges of Company0 were extracted before its last one failed
+    monkeypatch.setattr(data_loader, "_extract_page_range", fail_last_range)
+    streamed = PdfLoader.iter_documents(
+        pdfs_file_path=reports_dir,
+        keywords_list=KEYWORDS,
+        model_name="stub",
+        model_temperature=0,
+        llm=llm,
+        pages_per_task=2,
+    )
+    assert {page.metadata["Company_Name"] for page in streamed} == {"Company1"}
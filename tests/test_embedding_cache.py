@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from bussinessreportanalysisagent.db import embeddings
+from bussinessreportanalysisagent.db.embedding_cache import EmbeddingCache
+from bussinessreportanalysisagent.db.embeddings import VectorEmbeddings
+
+
+def vectors(*values: float) -> np.ndarray:
+    return np.array([[value, 1.0, 0.0] for value in values], dtype=np.float32)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = iter(range(1, 1_000))
+    monkeypatch.setattr("bussinessreportanalysisagent.db.embedding_cache.time.time", lambda: next(now))
+
+
+def test_cached_vectors_survive_reopening(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    assert cache.get_many(["a"])[0] == []
+    cache.put_many(["a", "b", "a"], vectors(1, 2, 3))
+    cache.close()
+
+    cache = EmbeddingCache(str(tmp_path), "model")
+    hit_indexes, cached = cache.get_many(["b", "c", "a"])
+    assert hit_indexes == [0, 2]
+    assert cached[:, 0].tolist() == [2, 1]
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.close()
+
+
+def test_least_recently_used_vectors_are_evicted(tmp_path, clock):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=2)
+    cache.put_many(["old"], vectors(1))
+    cache.put_many(["recent"], vectors(2))
+    # Reading "old" makes "recent" the least recently used vector
+    cache.get_many(["old"])
+    cache.put_many(["new"], vectors(3))
+
+    hit_indexes, cached = cache.get_many(["old", "recent", "new"])
+    assert hit_indexes == [0, 2]
+    assert cached[:, 0].tolist() == [1, 3]
+    cache.close()
+
+
+def test_a_larger_capacity_grows_the_cache_in_place(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=2)
+    cache.put_many(["a", "b"], vectors(1, 2))
+    cache.close()
+
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=4)
+    cache.put_many(["c", "d"], vectors(3, 4))
+    hit_indexes, cached = cache.get_many(["a", "b", "c", "d"])
+    assert hit_indexes == [0, 1, 2, 3]
+    assert cached[:, 0].tolist() == [1, 2, 3, 4]
+    cache.close()
+
+
+def test_a_smaller_capacity_clears_the_cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=4)
+    cache.put_many(["a", "b", "c"], vectors(1, 2, 3))
+    cache.close()
+
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=2)
+    assert cache.get_many(["a", "b", "c"])[0] == []
+    cache.put_many(["d", "e", "f"], vectors(4, 5, 6))
+    assert cache.get_many(["d", "e", "f"])[0] == [1, 2]
+    cache.close()
+
+
+def test_each_model_and_runtime_has_its_own_cache(tmp_path):
+    torch_cache = EmbeddingCache(str(tmp_path), "model")
+    torch_cache.put_many(["a"], vectors(1))
+    onnx_cache = EmbeddingCache(str(tmp_path), "model", backend="onnx", onnx_file_name="onnx/model_qint8_avx2.onnx")
+    other_cache = EmbeddingCache(str(tmp_path), "other-model")
+
+    assert len({torch_cache.cache_dir, onnx_cache.cache_dir, other_cache.cache_dir}) == 3
+    assert onnx_cache.get_many(["a"])[0] == []
+    assert other_cache.get_many(["a"])[0] == []
+    for cache in (torch_cache, onnx_cache, other_cache):
+        cache.close()
+
+
+def test_only_uncached_texts_are_embedded(tmp_path, monkeypatch):
+    requests = []
+
+    def embed_content(content, model):
+        requests.append(content)
+        return {"embedding": [[float(len(text)), 1.0, 0.0] for text in content]}
+
+    monkeypatch.setattr(embeddings, "embed_content", embed_content)
+    cache = EmbeddingCache(str(tmp_path), "models/stub")
+    vector_embeddings = VectorEmbeddings("models/stub", cache=cache)
+
+    first = vector_embeddings.get_embeddings(["a", "bb"])
+    second = vector_embeddings.get_embeddings(["bb", "ccc", "a"])
+    assert requests == [["a", "bb"], ["ccc"]]
+    assert second[:, 0].tolist() == [2, 3, 1]
+    assert np.array_equal(first, second[[2, 0]])
+    cache.close()
@@ -0,0 +1,112 @@
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from benchmarks.stubs import StubChatModel
+from bussinessreportanalysisagent.db.embeddings import EmbeddingError
+from bussinessreportanalysisagent.services.content_keyword_generation import ContentKeyword
+from bussinessreportanalysisagent.services.embedding_keyword_tagger import LABEL_TEMPLATE, EmbeddingKeywordTagger
+
+KEYWORDS = ["Net Debt", "Balance Sheet", "Risks", "Sustainability"]
+
+
+class FakeEmbeddings:
+    """
+    Keyword labels embed to one-hot vectors, pages to the vectors given for them.
+    Pages starting with "unreadable" cannot be embedded.
+    """
+
+    def __init__(self, pages: Dict[str, List[float]]) -> None:
+        self.vectors = {
+            LABEL_TEMPLATE.format(keyword=keyword): np.eye(len(KEYWORDS))[index] for index, keyword in enumerate(KEYWORDS)
+        }
+        self.vectors.update({page: np.asarray(vector) for page, vector in pages.items()})
+        self.calls = []
+
+    def get_embeddings(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        self.calls.append(list(texts))
+        embeddings = np.full((len(texts), len(KEYWORDS)), np.nan, dtype=np.float32)
+        failures = {}
+        for index, text in enumerate(texts):
+            if text.startswith("unreadable"):
+                failures[index] = "ValueError: unreadable"
+            else:
+                embeddings[index] = self.vectors[text]
+        if failures:
+            raise EmbeddingError(failures, None if len(failures) == len(texts) else embeddings)
+        return embeddings
+
+
+PAGES = {
+    # Clearly about net debt, then the balance sheet
+    "debt page": [0.9, 0.4, 0.0, 0.0],
+    # Net debt and balance sheet are too close to tell apart
+    "ambiguous page": [0.6, 0.59, 0.0, 0.0],
+    # About sustainability, barely about risks
+    "esg page": [0.0, 0.0, 0.1, 1.0],
+}
+
+
+def make_tagger(top_k: int = 2, **kwargs) -> EmbeddingKeywordTagger:
+    return EmbeddingKeywordTagger(
+        KEYWORDS, FakeEmbeddings(PAGES), top_k=top_k, min_similarity=0.25, min_margin=0.02, **kwargs
+    )
+
+
+def test_predict_keeps_the_closest_labels_above_the_threshold():
+    tagger = make_tagger(top_k=1)
+
+    keywords, low_confidence = tagger.predict(["debt page", "ambiguous page"])
+
+    assert keywords == [["Net Debt"], ["Net Debt"]]
+    assert low_confidence.tolist() == [False, True]
+
+
+def test_predict_ranks_several_tags_and_drops_weak_ones():
+    tagger = make_tagger(top_k=2)
+
+    keywords, _ = tagger.predict(["debt page", "esg page"])
+
+    assert keywords == [["Net Debt", "Balance Sheet"], ["Sustainability"]]
+
+
+def test_pages_that_cannot_be_embedded_are_low_confidence():
+    tagger = make_tagger()
+
+    keywords, low_confidence = tagger.predict(["debt page", "unreadable page"])
+    assert keywords[1] == [] and low_confidence.tolist() == [False, True]
+
+    keywords, low_confidence = tagger.predict(["unreadable page"])
+    assert keywords == [[]] and low_confidence.tolist() == [True]
+
+
+def test_labels_are_embedded_once_and_pages_in_one_batch():
+    tagger = make_tagger()
+    tagger.tag(["debt page", "ambiguous page"])
+    tagger.tag(["esg page"])
+
+    assert tagger.embeddings.calls == [
+        [LABEL_TEMPLATE.format(keyword=keyword) for keyword in KEYWORDS],
+        ["debt page", "ambiguous page"],
+        ["esg page"],
+    ]
+
+
+def test_only_low_confidence_pages_are_escalated_to_the_llm():
+    llm = StubChatModel(latency=0.0, response='{"newKeyword": ["Balance Sheet"]}')
+    chain = ContentKeyword.build_chain(model_name="stub", model_temperature=0, llm=llm)
+    tagger = make_tagger(top_k=1)
+
+    keywords = tagger.tag(["debt page", "ambiguous page", "unreadable page"], chain=chain)
+
+    assert keywords == [["Net Debt"], ["Balance Sheet"], ["Balance Sheet"]]
+    assert tagger.stats() == {"pages": 3, "escalated": 2, "escalation_rate": pytest.approx(2 / 3)}
+
+
+def test_without_escalation_the_embedding_tags_are_kept():
+    chain = ContentKeyword.build_chain(model_name="stub", model_temperature=0, llm=StubChatModel(latency=0.0))
+    tagger = make_tagger(top_k=1, escalate=False)
+
+    assert tagger.tag(["ambiguous page"], chain=chain) == [["Net Debt"]]
+    assert tagger.stats()["escalated"] == 0
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from bussinessreportanalysisagent.db import embeddings
+from bussinessreportanalysisagent.db.embeddings import EmbeddingError, VectorEmbeddings
+
+
+class FakeEmbedContent:
+    """
+    Stand-in for the Gemini embed_content call: the vector of a text is [len(text), 1],
+    and a request containing a text starting with "bad" fails.
+    """
+
+    def __init__(self) -> None:
+        self.requests = []
+
+    def __call__(self, content, model):
+        self.requests.append(content)
+        texts = [content] if isinstance(content, str) else content
+        if any(text.startswith("bad") for text in texts):
+            raise RuntimeError("invalid input")
+        vectors = [[float(len(text)), 1.0] for text in texts]
+        return {"embedding": vectors[0] if isinstance(content, str) else vectors}
+
+
+@pytest.fixture
+def embed_content(monkeypatch) -> FakeEmbedContent:
+    embed_content = FakeEmbedContent()
+    monkeypatch.setattr(embeddings, "embed_content", embed_content)
+    return embed_content
+
+
+def test_get_embeddings_sends_one_request_per_batch(embed_content):
+    texts = [f"text {index}" for index in range(5)] + ["text 10"]
+    vectors = VectorEmbeddings("models/stub").get_embeddings(texts, batch_size=4)
+
+    assert [len(request) for request in embed_content.requests] == [4, 2]
+    assert vectors.dtype == np.float32 and vectors.flags["C_CONTIGUOUS"]
+    assert vectors[:, 0].tolist() == [6, 6, 6, 6, 6, 7]
+
+
+def test_a_failed_batch_is_retried_text_by_text(embed_content):
+    with pytest.raises(EmbeddingError) as error:
+        VectorEmbeddings("models/stub").get_embeddings(["one", "bad", "three"], batch_size=3)
+
+    assert list(error.value.failures) == [1]
+    assert "RuntimeError: invalid input" in error.value.failures[1]
+    assert error.value.embeddings[[0, 2], 0].tolist() == [3, 5]
+    assert np.isnan(error.value.embeddings[1]).all()
+    assert len(embed_content.requests) == 1 + 3
+
+
+def test_embeddings_are_none_when_every_text_failed(embed_content):
+    with pytest.raises(EmbeddingError) as error:
+        VectorEmbeddings("models/stub").get_embeddings(["bad one", "bad two"])
+    assert error.value.embeddings is None
+    assert sorted(error.value.failures) == [0, 1]
+
+
+def test_get_embedding_raises_instead_of_returning_an_empty_vector(embed_content):
+    vector_embeddings = VectorEmbeddings("models/stub")
+    assert vector_embeddings.get_embedding("query") == [5.0, 1.0]
+    with pytest.raises(EmbeddingError):
+        vector_embeddings.get_embedding("bad query")
+
+
+def test_a_failed_local_query_embedding_raises(monkeypatch):
+    class BrokenModel:
+        def encode(self, texts, **kwargs):
+            raise RuntimeError("out of memory")
+
+    monkeypatch.setattr(embeddings.LLMModel, "get_sentence_transformer_model", lambda model_id, **kwargs: BrokenModel())
+    with pytest.raises(EmbeddingError, match="out of memory"):
+        VectorEmbeddings("sentence-transformers/all-MiniLM-L6-v2").get_embedding("query")
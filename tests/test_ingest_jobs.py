@@ -0,0 +1,225 @@
+import copy
+import os
+import threading
+from typing import Iterator, List
+
+import pytest
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+from benchmarks.stubs import StubEmbeddings
+from bussinessreportanalysisagent.core import components, ingest_jobs
+from bussinessreportanalysisagent.core.ingest_jobs import IngestJobQueue
+from bussinessreportanalysisagent.db.ingest_manifest import IngestManifest
+from bussinessreportanalysisagent.db.ingest_versions import IngestVersions
+
+
+class PageChunking:
+    """
+    One chunk per page.
+    """
+
+    @staticmethod
+    def iter_chunks(pages: Iterator[Document]) -> Iterator[Document]:
+        for page in pages:
+            yield Document(page_content=page.page_content, metadata={**page.metadata, "chunk_index": 0})
+
+
+class FakeReports:
+    """
+    Pages of the uploaded reports, read by the patched `PdfLoader.iter_documents`. A report
+    can fail after some pages or block after its first page until it is released.
+    """
+
+    def __init__(self) -> None:
+        self.fail_after = {}
+        self.blocking = set()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        # Process id and priority of the last ingestion
+        self.priority_path = None
+
+    def iter_documents(self, file_names: List[str], **kwargs) -> Iterator[Document]:
+        file_name = file_names[0]
+        if self.priority_path:
+            with open(self.priority_path, "w") as file:
+                file.write(f"{os.getpid()} {os.getpriority(os.PRIO_PROCESS, 0)}")
+        company_name, year = file_name[:-4].rsplit("_", 1)
+        for page in range(1, 6):
+            if self.fail_after.get(file_name) == page:
+                raise RuntimeError(f"Page {page} of {file_name} could not be parsed")
+            yield Document(
+                page_content=f"{company_name} {year} page {page}: " + " ".join(f"word{page * index}" for index in range(60)),
+                metadata={"source": file_name, "page": page, "Company_Name": company_name, "Year": int(year), "keywords": []},
+            )
+            if file_name in self.blocking and page == 1:
+                self.started.set()
+                assert self.release.wait(timeout=30)
+
+
+@pytest.fixture
+def reports(monkeypatch) -> FakeReports:
+    reports = FakeReports()
+    monkeypatch.setattr(ingest_jobs.PdfLoader, "iter_documents", staticmethod(reports.iter_documents))
+    monkeypatch.setattr(ingest_jobs, "get_chunking", lambda config_data: PageChunking())
+    monkeypatch.setattr(ingest_jobs, "get_embedding_tagger", lambda config_data: None)
+    return reports
+
+
+@pytest.fixture
+def make_queue(config_data, reports, monkeypatch):
+    vector_size = config_data["configurations"]["vector_database_config"]["vector_size"]
+
+    # A Gemini store does not load a model, its embeddings are replaced
+    stub_config = copy.deepcopy(config_data)
+    stub_config["configurations"]["vector_database_config"]["embedding_model_type"] = "gemini"
+    stub_config["configurations"]["embedding_model_config"]["model_id"] = "models/stub"
+
+    def get_vector_store(config_data, client=None, embedding_cache=None):
+        # Ingestion processes have no client, they get an in-memory Qdrant of their own
+        client = client or QdrantClient(":memory:")
+        vector_store = components.get_vector_store(stub_config, client=client, embedding_cache=embedding_cache)
+        vector_store.doc_store = StubEmbeddings(vector_size)
+        return vector_store
+
+    monkeypatch.setattr(ingest_jobs, "get_vector_store", get_vector_store)
+    queues = []
+
+    def make_queue(run_in_process: bool = False) -> IngestJobQueue:
+        jobs_config = config_data["configurations"]["ingest_jobs_config"]
+        jobs_config["run_in_process"] = run_in_process
+        # Forked processes keep the patched loader and store
+        jobs_config["start_method"] = "fork"
+        queue = IngestJobQueue(config_data, client=None if run_in_process else QdrantClient(":memory:"))
+        queues.append(queue)
+        return queue
+
+    yield make_queue
+    reports.release.set()
+    for queue in queues:
+        queue.shutdown()
+
+
+@pytest.fixture
+def queue(make_queue):
+    return make_queue()
+
+
+def count_points(queue: IngestJobQueue, company_name: str, year: int) -> int:
+    vector_store = ingest_jobs.get_vector_store(queue.config_data, client=queue.client)
+    if not queue.client.collection_exists(vector_store.collection_name):
+        return 0
+    return vector_store.count_report_points(company_name, year)
+
+
+def versions(config_data: dict, company_name: str) -> int:
+    ingest_versions = IngestVersions(config_data["configurations"]["answer_cache_config"]["versions_path"])
+    version = ingest_versions.get([company_name])[0]
+    ingest_versions.close()
+    return version
+
+
+def test_completed_job_is_recorded(queue, config_data):
+    job = queue.submit("VGS_2022.pdf", b"2022 report")
+    queue.futures[job.job_id].result(timeout=60)
+
+    assert job.status == "completed", job.error
+    assert job.pages_tagged == job.chunks_produced == job.points_upserted == 5
+    assert count_points(queue, "VGS", 2022) == 5
+    assert versions(config_data, "VGS") == 1
+    # The same content is not ingested twice
+    assert queue.submit("VGS_2022.pdf", b"2022 report") is job
+
+
+def test_failed_job_forgets_the_previous_version(queue, reports, config_data):
+    job = queue.submit("VGS_2022.pdf", b"2022 report")
+    queue.futures[job.job_id].result(timeout=60)
+
+    reports.fail_after["VGS_2022.pdf"] = 3
+    failed = queue.submit("VGS_2022.pdf", b"2022 report, restated")
+    queue.futures[failed.job_id].result(timeout=60)
+
+    assert failed.status == "failed"
+    assert "Page 3 of VGS_2022.pdf could not be parsed" in failed.error
+    assert failed.finished_at is not None
+    manifest = IngestManifest(config_data["configurations"]["ingest_jobs_config"]["manifest_path"])
+    assert manifest.find_by_hash(job.file_hash) is None
+    manifest.close()
+    assert versions(config_data, "VGS") == 2
+    assert count_points(queue, "VGS", 2022) == 0
+    # The previous content is ingested again, its completed job is stale
+    del reports.fail_after["VGS_2022.pdf"]
+    retried = queue.submit("VGS_2022.pdf", b"2022 report")
+    assert retried is not job
+    queue.futures[retried.job_id].result(timeout=60)
+    assert retried.status == "completed", retried.error
+    assert count_points(queue, "VGS", 2022) == 5
+
+
+def test_cancelled_running_job_deletes_its_points(queue, reports, config_data):
+    reports.blocking.add("VGS_2022.pdf")
+    job = queue.submit("VGS_2022.pdf", b"2022 report")
+    assert reports.started.wait(timeout=30)
+
+    assert queue.cancel(job.job_id).status == "running"
+    reports.release.set()
+    queue.futures[job.job_id].result(timeout=60)
+
+    assert job.status == "cancelled"
+    assert count_points(queue, "VGS", 2022) == 0
+    assert versions(config_data, "VGS") == 1
+    manifest = IngestManifest(config_data["configurations"]["ingest_jobs_config"]["manifest_path"])
+    assert manifest.find_by_hash(job.file_hash) is None
+    manifest.close()
+
+
+def test_cancelled_queued_job_never_runs(queue, reports):
+    reports.blocking.add("VGS_2022.pdf")
+    running = queue.submit("VGS_2022.pdf", b"2022 report")
+    assert reports.started.wait(timeout=30)
+    queued = queue.submit("VGS_2021.pdf", b"2021 report")
+
+    assert queue.cancel(queued.job_id).status == "cancelled"
+    reports.release.set()
+    queue.futures[running.job_id].result(timeout=60)
+
+    assert running.status == "completed", running.error
+    assert queued.started_at is None and queued.pages_tagged == 0
+    assert count_points(queue, "VGS", 2021) == 0
+
+
+def test_job_runs_in_a_process_with_a_lower_priority(make_queue, reports, config_data, tmp_path):
+    reports.priority_path = str(tmp_path / "priority")
+    queue = make_queue(run_in_process=True)
+    ingested = []
+    queue.on_ingested = ingested.append
+
+    job = queue.submit("VGS_2022.pdf", b"2022 report")
+    queue.futures[job.job_id].result(timeout=120)
+
+    assert job.status == "completed", job.error
+    assert job.pages_tagged == job.chunks_produced == job.points_upserted == 5
+    with open(reports.priority_path) as file:
+        pid, priority = map(int, file.read().split())
+    assert pid != os.getpid()
+    nice = config_data["configurations"]["ingest_jobs_config"]["nice"]
+    assert priority == min(19, os.getpriority(os.PRIO_PROCESS, 0) + nice)
+    # The manifest and the answer cache versions are shared with the process
+    manifest = IngestManifest(config_data["configurations"]["ingest_jobs_config"]["manifest_path"])
+    assert manifest.find_by_hash(job.file_hash) == ("VGS_2022.pdf", 5)
+    manifest.close()
+    assert versions(config_data, "VGS") == 1
+    assert [report.company_name for report in ingested] == ["VGS"]
+
+
+def test_failure_in_the_process_fails_the_job(make_queue, reports, config_data):
+    reports.fail_after["VGS_2022.pdf"] = 3
+    queue = make_queue(run_in_process=True)
+
+    job = queue.submit("VGS_2022.pdf", b"2022 report")
+    queue.futures[job.job_id].result(timeout=120)
+
+    assert job.status == "failed"
+    assert "Page 3 of VGS_2022.pdf could not be parsed" in job.error
+    assert job.pages_tagged == 2
+    assert versions(config_data, "VGS") == 1
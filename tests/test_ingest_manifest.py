@@ -0,0 +1,58 @@
+import os
+
+from bussinessreportanalysisagent.db.ingest_manifest import IngestManifest
+
+
+def write(path, content: bytes, mtime: float = None) -> None:
+    with open(path, "wb") as file:
+        file.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_diff_reports_new_changed_and_removed_files(tmp_path):
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    write(reports_dir / "VGS_2021.pdf", b"2021 report", mtime=1_000)
+    write(reports_dir / "VGS_2022.pdf", b"2022 report", mtime=1_000)
+    write(reports_dir / "notes.txt", b"not a report")
+    manifest = IngestManifest(str(tmp_path / "manifest.sqlite"))
+
+    assert manifest.diff(str(reports_dir)) == (["VGS_2021.pdf", "VGS_2022.pdf"], [])
+
+    manifest.record(str(reports_dir), "VGS_2021.pdf", num_points=10)
+    manifest.record(str(reports_dir), "VGS_2022.pdf", num_points=12)
+    assert manifest.diff(str(reports_dir)) == ([], [])
+
+    write(reports_dir / "VGS_2022.pdf", b"2022 report, restated", mtime=2_000)
+    os.remove(reports_dir / "VGS_2021.pdf")
+    assert manifest.diff(str(reports_dir)) == (["VGS_2022.pdf"], ["VGS_2021.pdf"])
+    manifest.close()
+
+
+def test_diff_skips_a_touched_but_identical_file(tmp_path):
+    write(tmp_path / "VGS_2022.pdf", b"2022 report", mtime=1_000)
+    manifest = IngestManifest(str(tmp_path / "cache" / "manifest.sqlite"))
+    manifest.record(str(tmp_path), "VGS_2022.pdf", num_points=12)
+
+    write(tmp_path / "VGS_2022.pdf", b"2022 report", mtime=2_000)
+    assert manifest.diff(str(tmp_path)) == ([], [])
+    # The new modification time is recorded, the file is not hashed again
+    size, mtime = manifest.connection.execute(
+        "SELECT size, mtime FROM ingested_files WHERE file_name = 'VGS_2022.pdf'"
+    ).fetchone()
+    assert (size, mtime) == (len(b"2022 report"), 2_000)
+    manifest.close()
+
+
+def test_find_by_hash_and_remove(tmp_path):
+    write(tmp_path / "VGS_2022.pdf", b"2022 report")
+    manifest = IngestManifest(str(tmp_path / "manifest.sqlite"))
+    manifest.record(str(tmp_path), "VGS_2022.pdf", num_points=12)
+    content_hash = IngestManifest.file_hash(str(tmp_path / "VGS_2022.pdf"))
+
+    assert manifest.find_by_hash(content_hash) == ("VGS_2022.pdf", 12)
+    manifest.remove("VGS_2022.pdf")
+    assert manifest.find_by_hash(content_hash) is None
+    assert manifest.diff(str(tmp_path)) == (["VGS_2022.pdf"], [])
+    manifest.close()
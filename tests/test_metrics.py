@@ -0,0 +1,89 @@
+import pytest
+
+from bussinessreportanalysisagent.metrics import StageMetrics, text_bytes
+
+
+@pytest.fixture
+def stage_metrics() -> StageMetrics:
+    return StageMetrics(buckets=(0.01, 0.1, 1.0))
+
+
+def test_observe_accumulates_the_stage_totals(stage_metrics):
+    stage_metrics.observe("embed", 0.005, items=4, num_bytes=100)
+    stage_metrics.observe("embed", 0.05, items=2, num_bytes=50, errors=1)
+    stage_metrics.observe("embed", 5.0)
+
+    # calls, errors, items, bytes, seconds, then the bucket counts up to +Inf
+    assert stage_metrics.snapshot() == {"embed": [3, 1, 6, 150, 5.055, 1, 1, 0, 1]}
+
+
+def test_track_records_the_span_counts_and_errors(stage_metrics):
+    with stage_metrics.track("chunk", items=1) as span:
+        span.bytes = 10
+    with pytest.raises(RuntimeError):
+        with stage_metrics.track("chunk"):
+            raise RuntimeError("failed")
+    with pytest.raises(RuntimeError):
+        with stage_metrics.track("chunk") as span:
+            span.errors = 3
+            raise RuntimeError("failed")
+
+    calls, errors, items, num_bytes, seconds = stage_metrics.snapshot()["chunk"][:5]
+    assert (calls, errors, items, num_bytes) == (3, 4, 1, 10)
+    assert seconds >= 0
+
+
+def test_disabled_metrics_record_nothing():
+    stage_metrics = StageMetrics(enabled=False)
+
+    with stage_metrics.track("chunk") as span:
+        span.items = 5
+    stage_metrics.observe("chunk", 1.0)
+
+    assert stage_metrics.snapshot() == {}
+
+
+def test_summary_only_counts_the_calls_since_a_snapshot(stage_metrics):
+    stage_metrics.observe("embed", 0.5, items=10)
+    stage_metrics.observe("tag", 0.05)
+    since = stage_metrics.snapshot()
+    for _ in range(4):
+        stage_metrics.observe("embed", 0.05, items=2, num_bytes=8)
+
+    summary = stage_metrics.summary(since)
+
+    assert list(summary) == ["embed"]
+    assert summary["embed"] == {
+        "calls": 4,
+        "errors": 0,
+        "items": 8,
+        "bytes": 32,
+        "seconds": 0.2,
+        "mean_ms": 50.0,
+        "p50_ms": 55.0,
+        "p95_ms": 95.5,
+    }
+    assert stage_metrics.summary()["embed"]["calls"] == 5
+
+
+def test_prometheus_text_has_cumulative_buckets_and_counters(stage_metrics):
+    stage_metrics.observe("embed", 0.005, items=4, num_bytes=100)
+    stage_metrics.observe("embed", 0.5, items=1, num_bytes=20, errors=1)
+
+    lines = stage_metrics.prometheus_text().splitlines()
+
+    assert "# TYPE pipeline_stage_seconds histogram" in lines
+    assert [line for line in lines if line.startswith("pipeline_stage_seconds_bucket")] == [
+        'pipeline_stage_seconds_bucket{stage="embed",le="0.01"} 1',
+        'pipeline_stage_seconds_bucket{stage="embed",le="0.1"} 1',
+        'pipeline_stage_seconds_bucket{stage="embed",le="1.0"} 2',
+        'pipeline_stage_seconds_bucket{stage="embed",le="+Inf"} 2',
+    ]
+    assert 'pipeline_stage_seconds_count{stage="embed"} 2' in lines
+    assert 'pipeline_stage_errors_total{stage="embed"} 1' in lines
+    assert 'pipeline_stage_items_total{stage="embed"} 5' in lines
+    assert 'pipeline_stage_bytes_total{stage="embed"} 120' in lines
+
+
+def test_text_bytes_counts_utf8_bytes():
+    assert text_bytes(["abc", "Ørsted", ""]) == 10
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from benchmarks.stubs import stub_tokenizer
+from bussinessreportanalysisagent.application.preprocessing.chunking import Chunking
+from bussinessreportanalysisagent.db.embeddings import VectorEmbeddings
+from bussinessreportanalysisagent.models import models
+from bussinessreportanalysisagent.models.models import LLMModel
+
+
+class FakeSentenceTransformer:
+    """
+    Records how the model was loaded, embeds a text as [len(text), 1] in float64.
+    """
+
+    loads = []
+
+    def __init__(self, model_id, backend="torch", model_kwargs=None, local_files_only=False) -> None:
+        self.loads.append({"model_id": model_id, "backend": backend, "model_kwargs": model_kwargs})
+        self.tokenizer = stub_tokenizer()
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        if isinstance(texts, str):
+            return np.array([len(texts), 1.0])
+        return np.array([[len(text), 1.0] for text in texts])
+
+
+@pytest.fixture(autouse=True)
+def fake_sentence_transformer(monkeypatch):
+    FakeSentenceTransformer.loads = []
+    monkeypatch.setattr(models, "SentenceTransformer", FakeSentenceTransformer)
+    LLMModel.get_sentence_transformer_model.cache_clear()
+    yield
+    LLMModel.get_sentence_transformer_model.cache_clear()
+
+
+def test_the_embedder_and_the_chunker_share_one_loaded_model():
+    runtime = {"backend": "torch", "local_files_only": True}
+    vector_embeddings = VectorEmbeddings("sentence-transformers/all-MiniLM-L6-v2", model_kwargs=runtime)
+    chunking = Chunking(
+        model_id="sentence-transformers/all-MiniLM-L6-v2",
+        chunk_size=500,
+        chunk_overlap=50,
+        max_seq_length=128,
+        model_kwargs=runtime,
+    )
+
+    assert len(FakeSentenceTransformer.loads) == 1
+    assert chunking.token_text_splitter.decode == vector_embeddings.sentence_model.tokenizer.decode
+
+
+def test_a_different_runtime_loads_another_model():
+    LLMModel.get_sentence_transformer_model("model", backend="torch")
+    LLMModel.get_sentence_transformer_model("model", backend="torch")
+    LLMModel.get_sentence_transformer_model("model", backend="openvino")
+    assert [load["backend"] for load in FakeSentenceTransformer.loads] == ["torch", "openvino"]
+
+
+def test_onnx_backend_loads_the_configured_file():
+    pytest.importorskip("onnxruntime")
+    LLMModel.get_sentence_transformer_model("model", backend="onnx", onnx_file_name="onnx/model_qint8_avx2.onnx")
+    (load,) = FakeSentenceTransformer.loads
+    assert load["backend"] == "onnx"
+    assert load["model_kwargs"] == {"file_name": "onnx/model_qint8_avx2.onnx"}
+
+
+def test_local_batches_are_encoded_in_one_call_as_float32():
+    vector_embeddings = VectorEmbeddings("sentence-transformers/all-MiniLM-L6-v2")
+    vectors = vector_embeddings.get_embeddings(["a", "bb", "ccc"], batch_size=8)
+
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == [1, 2, 3]
+    assert vector_embeddings.get_embedding("dddd") == [4.0, 1.0]
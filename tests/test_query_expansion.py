@@ -0,0 +1,110 @@
+import json
+import threading
+from typing import List
+
+import pytest
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings
+from bussinessreportanalysisagent.application.rag.query_expansion import QueryExpansion
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+
+TEXTS = ["Net debt fell sharply", "Borrowings were repaid", "Leverage ratio improved", "Dividend was raised"]
+
+LOCK = threading.Lock()
+
+
+class CountingChatModel(StubChatModel):
+    latency: float = 0.0
+    calls: List[str] = []
+    fail: bool = False
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with LOCK:
+            self.calls.append(messages[-1].content)
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def paraphrase_model(*queries: str, fail: bool = False) -> CountingChatModel:
+    return CountingChatModel(response=json.dumps({"queries": list(queries)}), calls=[], fail=fail)
+
+
+def point(point_id: str) -> Document:
+    return Document(page_content=point_id, metadata={"point_id": point_id})
+
+
+@pytest.fixture(scope="module")
+def retriever():
+    store = QdrantVectorStore("reports", "gemini", "models/stub", client=QdrantClient(":memory:"))
+    store.doc_store = StubEmbeddings(8)
+    store.create_collection(vector_size=8)
+    store.bulk_insert_documents(
+        [
+            Document(page_content=text, metadata={"Company_Name": "VGS", "Year": 2022, "page": 1, "chunk_index": index})
+            for index, text in enumerate(TEXTS)
+        ]
+    )
+    return BusinessReportRetriever(store)
+
+
+def test_expand_drops_duplicates_and_the_question_and_caches_paraphrases():
+    llm = paraphrase_model("What is the net debt", "How much debt?", "how much debt", "Leverage?", "Borrowings?")
+    expansion = QueryExpansion(None, "stub", num_queries=2, llm=llm)
+
+    assert expansion.expand("What is the net debt?") == ["How much debt?", "Leverage?"]
+    assert expansion.expand("what is the  NET debt") == ["How much debt?", "Leverage?"]
+    assert len(llm.calls) == 1
+    assert (expansion.hits, expansion.misses) == (1, 1)
+
+
+def test_expansion_cache_evicts_least_recently_used():
+    llm = paraphrase_model("Paraphrase")
+    expansion = QueryExpansion(None, "stub", cache_max_entries=2, llm=llm)
+    for question in ["first", "second", "first", "third", "first", "second"]:
+        expansion.expand(question)
+
+    # "second" was evicted by "third", "first" stayed cached
+    assert len(llm.calls) == 4
+
+
+def test_failed_expansion_gives_no_paraphrase():
+    expansion = QueryExpansion(None, "stub", llm=paraphrase_model(fail=True))
+
+    assert expansion.expand("net debt") == []
+
+
+def test_fuse_ranks_chunks_found_by_several_queries_first():
+    expansion = QueryExpansion(None, "stub", rrf_k=60, llm=paraphrase_model())
+
+    fused = expansion.fuse([[point("a"), point("b")], [point("c"), point("b")], [point("b")]], limit=2)
+
+    assert [document.metadata["point_id"] for document in fused] == ["b", "a"]
+    assert fused[0].metadata["fusion_score"] == pytest.approx(2 / 62 + 1 / 61)
+    assert fused[1].metadata["fusion_score"] == pytest.approx(1 / 61)
+
+
+def test_retrieve_fuses_the_question_and_its_paraphrases(retriever):
+    queries = ["Net debt fell sharply", "Borrowings were repaid", "Dividend was raised"]
+    expansion = QueryExpansion(retriever, "stub", llm=paraphrase_model(*queries[1:]))
+
+    documents = expansion.retrieve(queries[0], limit=4)
+
+    expected = expansion.fuse([retriever.retrieve(query, limit=4) for query in queries], limit=4)
+    assert [document.metadata["point_id"] for document in documents] == [
+        document.metadata["point_id"] for document in expected
+    ]
+    assert len(set(document.page_content for document in documents)) == 4
+
+
+def test_retrieve_falls_back_to_the_question_when_expansion_fails(retriever):
+    expansion = QueryExpansion(retriever, "stub", llm=paraphrase_model(fail=True))
+
+    documents = expansion.retrieve("Net debt fell sharply", limit=2)
+
+    assert [document.page_content for document in documents] == [
+        document.page_content for document in retriever.retrieve("Net debt fell sharply", limit=2)
+    ]
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from bussinessreportanalysisagent.application.rag.reranker import CrossEncoderReranker
+from bussinessreportanalysisagent.application.rag.retriever import DEFAULT_NUM_CANDIDATES, BusinessReportRetriever
+from bussinessreportanalysisagent.models.models import LLMModel
+
+
+class FakeCrossEncoder:
+    """
+    Scores a pair by the number of query words found in the chunk and records the
+    pairs sent to the model.
+    """
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.pairs = []
+
+    def predict(self, pairs, batch_size, show_progress_bar, convert_to_numpy):
+        if self.fail:
+            raise RuntimeError("model crashed")
+        self.pairs.extend(pairs)
+        return np.asarray(
+            [sum(word in text.lower().split() for word in query.lower().split()) for query, text in pairs],
+            dtype=np.float32,
+        )
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeCrossEncoder()
+    monkeypatch.setattr(LLMModel, "get_cross_encoder_model", lambda *args, **kwargs: model)
+    return model
+
+
+def chunk(text: str, point_id: str = None) -> Document:
+    return Document(page_content=text, metadata={"point_id": point_id or text})
+
+
+CHUNKS = [chunk("dividend was raised"), chunk("net debt rose"), chunk("net debt fell in 2022"), chunk("revenue grew")]
+
+
+def test_rerank_orders_by_score_and_keeps_top_k(model):
+    reranker = CrossEncoderReranker("stub", top_k=2)
+
+    documents = reranker.rerank("net debt 2022", CHUNKS)
+
+    assert [document.page_content for document in documents] == ["net debt fell in 2022", "net debt rose"]
+    assert [document.metadata["rerank_score"] for document in documents] == [3.0, 2.0]
+
+
+def test_only_max_candidates_are_scored(model):
+    reranker = CrossEncoderReranker("stub", top_k=4, max_candidates=2)
+
+    documents = reranker.rerank("net debt 2022", CHUNKS)
+
+    assert len(model.pairs) == 2
+    # The scored candidates come first, the others keep their retrieval order
+    assert [document.page_content for document in documents] == [
+        "net debt rose",
+        "dividend was raised",
+        "net debt fell in 2022",
+        "revenue grew",
+    ]
+
+
+def test_scores_are_cached_by_query_and_text(model):
+    reranker = CrossEncoderReranker("stub")
+    reranker.score("net debt", CHUNKS)
+    model.pairs.clear()
+
+    reranker.score("net debt", CHUNKS)
+    assert model.pairs == []
+    assert (reranker.hits, reranker.misses) == (4, 4)
+
+    # A re-ingested report keeps its point ids but not its text
+    restated = chunk("net debt was restated", point_id="net debt rose")
+    assert reranker.score("net debt", [restated]) == [2.0]
+    assert model.pairs == [("net debt", "net debt was restated")]
+
+
+def test_score_cache_evicts_least_recently_used(model):
+    reranker = CrossEncoderReranker("stub", cache_max_entries=2)
+    reranker.score("net debt", CHUNKS[:2])
+    reranker.score("net debt", CHUNKS[:1])
+    reranker.score("net debt", CHUNKS[2:3])
+    model.pairs.clear()
+
+    reranker.score("net debt", CHUNKS[:3])
+
+    assert model.pairs == [("net debt", "net debt rose")]
+
+
+def test_rerank_keeps_retrieval_order_when_the_model_fails(monkeypatch):
+    monkeypatch.setattr(LLMModel, "get_cross_encoder_model", lambda *args, **kwargs: FakeCrossEncoder(fail=True))
+    reranker = CrossEncoderReranker("stub", top_k=2)
+
+    assert reranker.rerank("net debt", CHUNKS) == CHUNKS[:2]
+
+
+def test_retriever_searches_for_the_reranked_candidates(model):
+    assert BusinessReportRetriever(None).search_limit(5) == 5
+    assert BusinessReportRetriever(None, CrossEncoderReranker("stub", max_candidates=20)).search_limit(5) == 20
+    assert BusinessReportRetriever(None, CrossEncoderReranker("stub", max_candidates=20)).search_limit(5, 30) == 30
+    assert BusinessReportRetriever(None, CrossEncoderReranker("stub", max_candidates=3)).search_limit(5) == 5
+    assert BusinessReportRetriever(None, CrossEncoderReranker("stub")).search_limit(5) == DEFAULT_NUM_CANDIDATES
@@ -0,0 +1,93 @@
+import pytest
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from benchmarks.stubs import StubEmbeddings
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+
+VECTOR_SIZE = 8
+
+CHUNKS = [
+    ("VGS", 2021, ["Revenue"], "VGS revenue grew in 2021"),
+    ("VGS", 2022, ["Revenue"], "VGS revenue grew in 2022"),
+    ("VGS", 2022, ["Net Debt"], "VGS net debt fell in 2022"),
+    ("Acme", 2022, ["Revenue"], "Acme revenue grew in 2022"),
+]
+
+
+@pytest.fixture
+def retriever():
+    store = QdrantVectorStore("reports", "gemini", "models/stub", client=QdrantClient(":memory:"))
+    store.doc_store = StubEmbeddings(VECTOR_SIZE)
+    store.create_collection(vector_size=VECTOR_SIZE)
+    store.bulk_insert_documents(
+        [
+            Document(
+                page_content=text,
+                metadata={
+                    "Company_Name": company,
+                    "Year": year,
+                    "Document_Type": "pdf",
+                    "keywords": keywords,
+                    "page": 1,
+                    "chunk_index": index,
+                },
+            )
+            for index, (company, year, keywords, text) in enumerate(CHUNKS)
+        ]
+    )
+    return BusinessReportRetriever(store)
+
+
+def test_build_filter_without_fields_is_none():
+    assert BusinessReportRetriever.build_filter() is None
+
+
+def test_build_filter_matches_single_values_and_lists():
+    query_filter = BusinessReportRetriever.build_filter(
+        company_name=["VGS", "Acme"], year=2022, document_type="pdf", keywords=["Revenue"]
+    )
+
+    conditions = {condition.key: condition.match for condition in query_filter.must}
+    assert conditions == {
+        "Company_Name": models.MatchAny(any=["VGS", "Acme"]),
+        "Year": models.MatchValue(value=2022),
+        "Document_Type": models.MatchValue(value="pdf"),
+        "keywords": models.MatchAny(any=["Revenue"]),
+    }
+
+
+def test_retrieve_is_scoped_by_company_and_year(retriever):
+    documents = retriever.retrieve("VGS revenue grew in 2021", limit=10, company_name="VGS", year=2022)
+
+    assert {document.page_content for document in documents} == {
+        "VGS revenue grew in 2022",
+        "VGS net debt fell in 2022",
+    }
+    assert all(document.metadata["point_id"] for document in documents)
+
+
+def test_retrieve_filters_on_keywords_and_several_companies(retriever):
+    documents = retriever.retrieve(
+        "revenue", limit=10, company_name=["VGS", "Acme"], year=[2022], keywords=["Revenue"]
+    )
+
+    assert {document.page_content for document in documents} == {
+        "VGS revenue grew in 2022",
+        "Acme revenue grew in 2022",
+    }
+
+
+def test_retrieve_ranks_the_closest_chunk_first(retriever):
+    documents = retriever.retrieve("VGS net debt fell in 2022", limit=2)
+
+    assert len(documents) == 2
+    assert documents[0].page_content == "VGS net debt fell in 2022"
+    assert documents[0].metadata["score"] == pytest.approx(1.0)
+
+
+def test_hybrid_retrieval_needs_a_sparse_encoder(retriever):
+    with pytest.raises(ValueError):
+        retriever.retrieve("net debt", hybrid=True)
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from bussinessreportanalysisagent.application.rag.self_query import SelfQuery
+from bussinessreportanalysisagent.db.report_index import ReportIndex
+from bussinessreportanalysisagent.validations.file_name_validation import AnnualReportFile
+
+
+@pytest.fixture
+def self_query(tmp_path) -> SelfQuery:
+    index_path = tmp_path / "report_index.json"
+    index_path.write_text(
+        json.dumps({"Deutsche_Telekom": [2021, 2022], "Deutsche_Bank": [2022], "VGS": [2019, 2020, 2021, 2022]})
+    )
+    return SelfQuery(ReportIndex(str(index_path)), use_llm=False)
+
+
+@pytest.mark.parametrize(
+    "question, company_names, years",
+    [
+        ("What was the net debt of Deutsche Telekom in 2022?", ["Deutsche_Telekom"], [2022]),
+        ("Compare DeutscheTelekom and deutsche bank", ["Deutsche_Telekom", "Deutsche_Bank"], []),
+        ("VGS revenue between 2019 and 2021", ["VGS"], [2019, 2020, 2021]),
+        ("VGS margins 2020-2022, and in 1999", ["VGS"], [2020, 2021, 2022]),
+        ("Is Deutsche mentioned anywhere?", [], []),
+        ("What happened in 2021 and 2021?", [], [2021]),
+    ],
+)
+def test_match(self_query, question, company_names, years):
+    metadata = self_query.match(question)
+    assert metadata.company_names == company_names
+    assert metadata.years == years
+
+
+def test_extract_counts_the_path_of_each_question(self_query):
+    self_query.extract("VGS in 2022")
+    self_query.extract("What is the outlook?")
+    stats = self_query.stats()
+    assert stats["rules"]["count"] == 1
+    assert stats["none"]["count"] == 1
+    assert stats["llm"]["count"] == 0
+
+
+def test_add_report_makes_a_new_company_and_year_known(self_query):
+    assert self_query.match("Vodafone Group 2023").company_names == []
+    self_query.add_report(AnnualReportFile(filename="Vodafone_Group_2023.pdf"))
+
+    metadata = self_query.match("vodafone group results 2023")
+    assert metadata.company_names == ["Vodafone_Group"]
+    assert metadata.years == [2023]
+    assert "Vodafone_Group" in self_query.company_names
+
+
+def test_get_filter_is_none_without_companies_or_years(self_query):
+    assert self_query.get_filter("What is the outlook?") is None
+    assert self_query.get_filter("VGS outlook") is not None
@@ -0,0 +1,79 @@
+import pytest
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+from benchmarks.stubs import StubEmbeddings
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.db.sparse_embeddings import BM25SparseEncoder, _token_index
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+
+
+def weights(vector) -> dict:
+    return dict(zip(vector.indices, vector.values))
+
+
+def test_tokenize_drops_stop_words_and_adds_bigrams():
+    assert BM25SparseEncoder.tokenize("The Net Debt of VGS's group was 1,234.5") == [
+        "net",
+        "debt",
+        "vgs's",
+        "group",
+        "1,234.5",
+        "net debt",
+        "debt vgs's",
+        "vgs's group",
+        "group 1,234.5",
+    ]
+
+
+def test_document_weights_saturate_and_are_length_normalized():
+    encoder = BM25SparseEncoder(k1=1.2, b=0.75, avg_doc_length=4)
+    once, twice, long = encoder.encode_documents(
+        ["debt rose", "debt debt rose", "debt rose sharply across every business segment this year"]
+    )
+    debt = _token_index("debt")
+
+    assert weights(once)[debt] < weights(twice)[debt] < encoder.k1 + 1
+    assert weights(long)[debt] < weights(once)[debt]
+    assert len(once.indices) == len(set(once.indices)) == 3
+
+
+def test_query_uses_the_document_token_indices_with_unit_weights():
+    encoder = BM25SparseEncoder()
+    query = encoder.encode_query("net debt net debt")
+    document = encoder.encode_documents(["Net debt decreased"])[0]
+
+    assert query.indices == sorted({_token_index("net"), _token_index("debt"), _token_index("net debt"), _token_index("debt net")})
+    assert query.values == [1.0] * len(query.indices)
+    assert {_token_index("net"), _token_index("debt"), _token_index("net debt")} <= set(document.indices)
+
+
+def test_empty_text_encodes_to_an_empty_vector():
+    (vector,) = BM25SparseEncoder().encode_documents([""])
+    assert vector.indices == [] and vector.values == []
+    assert BM25SparseEncoder().encode_query("the of and").indices == []
+
+
+@pytest.mark.parametrize("token", ["debt", "net debt", "2022"])
+def test_token_index_is_stable_and_31_bit(token):
+    assert _token_index(token) == _token_index(token) < 2**31
+
+
+def test_hybrid_retrieval_finds_exact_terms():
+    store = QdrantVectorStore(
+        "reports", "gemini", "models/stub", client=QdrantClient(":memory:"), sparse_encoder=BM25SparseEncoder()
+    )
+    store.doc_store = StubEmbeddings(8)
+    store.create_collection(vector_size=8)
+    texts = ["EBITDA margin improved", "Revenue grew in every segment", "Net debt fell sharply", "Dividend was raised"]
+    store.bulk_insert_documents(
+        [
+            Document(page_content=text, metadata={"Company_Name": "VGS", "Year": 2022, "page": 1, "chunk_index": index})
+            for index, text in enumerate(texts)
+        ]
+    )
+
+    documents = BusinessReportRetriever(store).retrieve("What was the net debt?", limit=4, hybrid=True)
+
+    # The stub dense vectors are unrelated to the text, only BM25 matches the terms
+    assert documents[0].page_content == "Net debt fell sharply"
@@ -0,0 +1,181 @@
+import pandas as pd
+import pymupdf
+import pytest
+from langchain_core.documents import Document
+
+from bussinessreportanalysisagent.application.preprocessing.table_extraction import COLUMNS, FinancialTableExtractor
+from bussinessreportanalysisagent.db.financial_tables import FinancialTableStore
+
+
+@pytest.mark.parametrize(
+    "cell, value",
+    [
+        ("1,234.5", 1234.5),
+        ("1 234", 1234.0),
+        ("(1,234)", -1234.0),
+        ("( 56.7 )", -56.7),
+        ("-12", -12.0),
+        ("− 7", -7.0),
+        ("– 3.5", -3.5),
+        ("12.3%", 12.3),
+        ("  42  ", 42.0),
+        ("0", 0.0),
+    ],
+)
+def test_parse_number(cell, value):
+    assert FinancialTableExtractor.parse_number(cell) == value
+
+
+@pytest.mark.parametrize("cell", [None, "", "-", "—", "n/a", "(12", "12)", "Net debt", "1.2.3"])
+def test_parse_number_rejects_non_numbers(cell):
+    assert FinancialTableExtractor.parse_number(cell) is None
+
+
+@pytest.mark.parametrize(
+    "label, line_item",
+    [
+        ("Net debt (note 12)", "net debt"),
+        ("Property, plant & equipment 4", "property plant and equipment"),
+        ("  TOTAL ASSETS  ", "total assets"),
+        ("Earnings per share (EUR)", "earnings per share"),
+    ],
+)
+def test_normalize_line_item(label, line_item):
+    assert FinancialTableExtractor.normalize_line_item(label) == line_item
+
+
+def write_statement(path: str, rows: list, ruled: bool) -> None:
+    x, height, top = [40, 300, 360, 450, 540], 16, 80
+    pdf = pymupdf.open()
+    pdf.new_page().insert_text((40, 40), "Chairman's letter", fontsize=10)
+    page = pdf.new_page()
+    page.insert_text((40, 40), "Consolidated Balance Sheet\n(NOK million)", fontsize=10)
+    for row_index, row in enumerate(rows):
+        for column, cell in enumerate(row):
+            page.insert_text((x[column] + 3, top + row_index * height + 12), cell, fontsize=8)
+    if ruled:
+        for row_index in range(len(rows) + 1):
+            page.draw_line((x[0], top + row_index * height), (x[-1], top + row_index * height))
+        for column_x in x:
+            page.draw_line((column_x, top), (column_x, top + len(rows) * height))
+    pdf.save(path)
+    pdf.close()
+
+
+@pytest.mark.parametrize("ruled", [True, False])
+def test_extract_report_reads_the_tagged_statement_pages(tmp_path, ruled):
+    path = str(tmp_path / "VGS_2022.pdf")
+    statement = {
+        "Property, plant & equipment": (8_200.0, 7_900.0),
+        "Trade receivables": (1_150.0, 980.0),
+        "Cash and cash equivalents": (2_995.0, 2_120.0),
+        "Total assets": (12_345.0, 11_000.0),
+        "Total equity": (6_010.0, 5_400.0),
+        "Net debt": (-1_500.0, 250.0),
+    }
+    rows = [["", "Note", "2022", "2021"]]
+    for note, (label, values) in enumerate(statement.items(), start=1):
+        rows.append([label, str(note), *(f"({-value:,.0f})" if value < 0 else f"{value:,.0f}" for value in values)])
+    write_statement(path, rows, ruled)
+    extractor = FinancialTableExtractor(keywords=["Balance Sheet"])
+    extractor.record_page(Document("", metadata={"file_path": path, "Company_Name": "VGS", "Year": 2022, "page": 0}))
+    extractor.record_page(
+        Document(
+            "",
+            metadata={"file_path": path, "Company_Name": "VGS", "Year": 2022, "page": 1, "keywords": ["Balance Sheet"]},
+        )
+    )
+
+    (company_name, year, line_items), = list(extractor.iter_reports())
+
+    assert (company_name, year) == ("VGS", 2022)
+    assert list(line_items.columns) == COLUMNS
+    figures = {(row.line_item, row.fiscal_year): row.value for row in line_items.itertuples()}
+    assert figures == {
+        (FinancialTableExtractor.normalize_line_item(label), fiscal_year): value
+        for label, values in statement.items()
+        for fiscal_year, value in zip((2022, 2021), values)
+    }
+    assert set(line_items["page"]) == {1}
+    assert set(line_items["statement"]) == {"Balance Sheet"}
+    assert set(line_items["unit"]) == {"NOK million"}
+    assert extractor.tagged_pages == {}
+
+
+def line_items(company_name: str, report_year: int, figures: dict) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "company_name": company_name,
+                "report_year": report_year,
+                "fiscal_year": fiscal_year,
+                "statement": "Balance Sheet",
+                "page": 1,
+                "line_item": line_item,
+                "label": line_item.capitalize(),
+                "value": value,
+                "unit": "NOK million",
+            }
+            for (line_item, fiscal_year), value in figures.items()
+        ],
+        columns=COLUMNS,
+    )
+
+
+@pytest.fixture
+def table_store(tmp_path):
+    store = FinancialTableStore(str(tmp_path / "tables"))
+    store.write_report("VGS", 2021, line_items("VGS", 2021, {("net debt", 2021): 100.0, ("net debt", 2020): 90.0}))
+    store.write_report(
+        "VGS", 2022, line_items("VGS", 2022, {("net debt", 2022): 120.0, ("net debt", 2021): 105.0, ("total assets", 2022): 900.0})
+    )
+    store.write_report("Acme", 2022, line_items("Acme", 2022, {("net debt", 2022): 50.0, ("net debt", 2021): 40.0}))
+    return store
+
+
+@pytest.mark.parametrize(
+    "query, years",
+    [
+        ("net debt 2019-2021", [2019, 2020, 2021]),
+        ("net debt from 2020 to 2022", [2020, 2021, 2022]),
+        ("net debt between 2020 and 2021", [2020, 2021]),
+        ("net debt in 2018 and 2022", [2018, 2022]),
+        ("net debt", []),
+    ],
+)
+def test_parse_years(query, years):
+    assert FinancialTableStore.parse_years(query) == years
+
+
+def test_trend_prefers_the_latest_report(table_store):
+    line_item, figures = table_store.trend("Net debt 2020-2022", company_names=["VGS"])
+
+    assert line_item == "net debt"
+    assert list(zip(figures["fiscal_year"], figures["value"], figures["report_year"])) == [
+        (2020, 90.0, 2021),
+        (2021, 105.0, 2022),
+        (2022, 120.0, 2022),
+    ]
+
+
+def test_trend_filters_companies_and_years(table_store):
+    _, figures = table_store.trend("net debt in 2021")
+
+    assert list(zip(figures["company_name"], figures["value"])) == [("Acme", 40.0), ("VGS", 105.0)]
+    assert table_store.trend("total assets")[1]["value"].tolist() == [900.0]
+    line_item, figures = table_store.trend("free cash flow 2022")
+    assert line_item is None and figures.empty
+
+
+def test_rewritten_and_removed_reports_are_reloaded(table_store):
+    table_store.load()
+    table_store.write_report("Acme", 2022, line_items("Acme", 2022, {("net debt", 2022): 55.0}))
+
+    assert table_store.trend("net debt 2022", company_names=["Acme"])[1]["value"].tolist() == [55.0]
+
+    table_store.remove_report("VGS", 2022)
+    table_store.write_report("Acme", 2022, line_items("Acme", 2022, {}))
+
+    _, figures = table_store.trend("net debt")
+    assert list(zip(figures["fiscal_year"], figures["value"])) == [(2020, 90.0), (2021, 100.0)]
+    assert table_store.match_line_item("total assets") is None
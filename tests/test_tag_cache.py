@@ -0,0 +1,73 @@
+import pytest
+
+from benchmarks.stubs import StubChatModel
+from bussinessreportanalysisagent.db.tag_cache import KeywordTagCache
+from bussinessreportanalysisagent.services.content_keyword_generation import ContentKeyword
+
+KEYWORDS = ["Net Debt", "Balance Sheet", "Risks"]
+
+
+def open_cache(tmp_path, **kwargs) -> KeywordTagCache:
+    options = {"model_name": "llama", "model_temperature": 0, "keywords_list": KEYWORDS, **kwargs}
+    return KeywordTagCache(str(tmp_path / "cache" / "keyword_tags.sqlite"), **options)
+
+
+def test_cached_keywords_survive_reopening(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put_many(["page one", "page two"], [["Net Debt"], []])
+    cache.close()
+
+    cache = open_cache(tmp_path)
+    assert cache.get_many(["page two", "page one", "page three"]) == [[], ["Net Debt"], None]
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.close()
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [{"model_name": "mixtral"}, {"model_temperature": 1}, {"keywords_list": KEYWORDS + ["Governance"]}],
+)
+def test_a_different_model_or_keyword_list_misses(tmp_path, changed):
+    cache = open_cache(tmp_path)
+    cache.put_many(["page one"], [["Net Debt"]])
+    cache.close()
+
+    cache = open_cache(tmp_path, **changed)
+    assert cache.get_many(["page one"]) == [None]
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    now = iter(range(1, 100))
+    monkeypatch.setattr("bussinessreportanalysisagent.db.tag_cache.time.time", lambda: next(now))
+    cache = open_cache(tmp_path, max_entries=2)
+    cache.put_many(["old"], [["Risks"]])
+    cache.put_many(["recent"], [["Risks"]])
+    # Reading "old" makes "recent" the least recently used entry
+    cache.get_many(["old"])
+    cache.put_many(["new"], [["Risks"]])
+
+    assert cache.get_many(["old", "recent", "new"]) == [["Risks"], None, ["Risks"]]
+    cache.clear()
+    assert cache.get_many(["old"]) == [None]
+    cache.close()
+
+
+def test_only_uncached_pages_are_sent_to_the_model(tmp_path):
+    calls = []
+
+    class CountingChatModel(StubChatModel):
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            calls.append(messages[0].content)
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    cache = open_cache(tmp_path)
+    cache.put_many(["page one"], [["Risks"]])
+    chain = ContentKeyword.build_chain(model_name="stub", model_temperature=0, llm=CountingChatModel(latency=0))
+    keywords = ContentKeyword.get_content_keywords_batch(KEYWORDS, ["page one", "page two"], chain, cache=cache)
+
+    assert keywords == [["Risks"], ["Net Debt", "Balance Sheet"]]
+    assert len(calls) == 1 and "page two" in calls[0]
+    # The answer of the model is cached
+    assert cache.get_many(["page two"]) == [["Net Debt", "Balance Sheet"]]
+    cache.close()
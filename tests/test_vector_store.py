@@ -0,0 +1,249 @@
+import threading
+import time
+
+import httpx
+import pytest
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+from benchmarks.stubs import StubEmbeddings
+from bussinessreportanalysisagent.application.rag.retriever import BusinessReportRetriever
+from bussinessreportanalysisagent.db import vector_store
+from bussinessreportanalysisagent.db.vector_store import QdrantVectorStore
+
+VECTOR_SIZE = 8
+
+
+@pytest.fixture
+def store():
+    store = QdrantVectorStore("reports", "gemini", "models/stub", client=QdrantClient(":memory:"))
+    store.doc_store = StubEmbeddings(VECTOR_SIZE)
+    store.create_collection(vector_size=VECTOR_SIZE)
+    return store
+
+
+def chunk(company: str, year: int, page: int, chunk_index: int, text: str = None) -> Document:
+    return Document(
+        page_content=text or f"{company} {year} page {page} chunk {chunk_index}",
+        metadata={"Company_Name": company, "Year": year, "page": page, "chunk_index": chunk_index},
+    )
+
+
+def test_point_id_is_deterministic():
+    metadata = {"Company_Name": "VGS", "Year": 2022, "page": 3, "chunk_index": 1}
+
+    assert QdrantVectorStore.point_id(metadata) == QdrantVectorStore.point_id(dict(metadata))
+    assert QdrantVectorStore.point_id(metadata) != QdrantVectorStore.point_id({**metadata, "chunk_index": 2})
+    assert QdrantVectorStore.point_id(metadata) != QdrantVectorStore.point_id({**metadata, "Year": 2021})
+    # Incomplete metadata falls back to random ids
+    assert QdrantVectorStore.point_id({"page": 3}) != QdrantVectorStore.point_id({"page": 3})
+
+
+def test_reingesting_a_report_overwrites_its_points(store):
+    store.bulk_insert_documents([chunk("VGS", 2022, page, 0) for page in range(3)])
+    store.bulk_insert_documents([chunk("VGS", 2022, page, 0, text="restated") for page in range(3)])
+
+    assert store.count_report_points("VGS", 2022) == 3
+    points, _ = store.client.scroll(collection_name="reports", with_payload=["page_content"])
+    assert {point.payload["page_content"] for point in points} == {"restated"}
+
+
+def test_delete_report_points_keeps_other_reports(store):
+    store.bulk_insert_documents(
+        [chunk("VGS", 2021, 1, 0), chunk("VGS", 2022, 1, 0), chunk("VGS", 2022, 2, 0), chunk("Acme", 2022, 1, 0)]
+    )
+
+    store.delete_report_points("VGS", 2022)
+
+    assert store.count_report_points("VGS", 2022) == 0
+    assert store.count_report_points("VGS", 2021) == 1
+    assert store.count_report_points("Acme", 2022) == 1
+
+
+class FlakyClient:
+    """
+    Wraps the in-memory client, failing the first upserts with the given errors and
+    recording the size of each upsert request and the number of concurrent requests.
+    """
+
+    def __init__(self, client: QdrantClient, errors=(), latency: float = 0.0) -> None:
+        self.client = client
+        self.errors = list(errors)
+        self.latency = latency
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def upsert(self, collection_name, points, wait):
+        with self.lock:
+            self.requests.append(len(points))
+            error = self.errors.pop(0) if self.errors else None
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if error:
+                raise error
+            return self.client.upsert(collection_name=collection_name, points=points, wait=wait)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def unexpected_response(status_code: int) -> UnexpectedResponse:
+    return UnexpectedResponse(status_code, "", b"", httpx.Headers())
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(vector_store.time, "sleep", lambda _: None)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        unexpected_response(503),
+        unexpected_response(429),
+        ResponseHandlingException(httpx.ConnectError("connection refused")),
+        ResponseHandlingException(httpx.ReadTimeout("timed out")),
+    ],
+)
+def test_transient_upsert_failures_are_retried(store, no_backoff, error):
+    store.client = FlakyClient(store.client, errors=[error])
+
+    inserted = store.bulk_insert_documents([chunk("VGS", 2022, page, 0) for page in range(3)], max_retries=2)
+
+    assert inserted == 3
+    assert store.client.requests == [3, 3]
+    assert store.count_report_points("VGS", 2022) == 3
+
+
+@pytest.mark.parametrize(
+    "error", [unexpected_response(400), ResponseHandlingException(ValueError("invalid response"))]
+)
+def test_permanent_upsert_failures_are_not_retried(store, no_backoff, error):
+    store.client = FlakyClient(store.client, errors=[error])
+    documents = [chunk("VGS", 2022, page, 0) for page in range(3)]
+    for document in documents:
+        document.id = QdrantVectorStore.point_id(document.metadata)
+    failed = []
+
+    inserted = store.bulk_insert_documents(documents, max_retries=3, on_failed=failed.extend)
+
+    assert inserted == 0
+    assert store.client.requests == [3]
+    assert sorted(failed) == sorted(document.id for document in documents)
+
+
+def test_upsert_gives_up_after_max_retries(store, no_backoff):
+    store.client = FlakyClient(store.client, errors=[unexpected_response(503)] * 3)
+
+    assert store.bulk_insert_documents([chunk("VGS", 2022, 1, 0)], max_retries=3) == 0
+    assert store.client.requests == [1, 1, 1]
+
+
+def test_max_retries_must_allow_one_attempt(store):
+    with pytest.raises(ValueError):
+        store.bulk_insert_documents([chunk("VGS", 2022, 1, 0)], max_retries=0)
+
+
+def test_upserts_are_split_by_size_and_bounded_in_flight(store):
+    store.client = FlakyClient(store.client, latency=0.05)
+    documents = [chunk("VGS", 2022, page, chunk_index) for page in range(10) for chunk_index in range(4)]
+    upserted = []
+
+    inserted = store.bulk_insert_documents(
+        documents, batch_size=8, max_concurrent_upserts=2, max_request_bytes=1_000, on_upserted=upserted.extend
+    )
+
+    assert inserted == len(documents)
+    assert len(store.client.requests) > len(documents) // 8
+    assert 1 < store.client.max_in_flight <= 2
+    assert sorted(upserted) == sorted(QdrantVectorStore.point_id(document.metadata) for document in documents)
+    assert store.count_report_points("VGS", 2022) == len(documents)
+
+
+def tuned_store(**kwargs) -> QdrantVectorStore:
+    store = QdrantVectorStore("tuned", "gemini", "models/stub", client=QdrantClient(":memory:"), **kwargs)
+    store.doc_store = StubEmbeddings(VECTOR_SIZE)
+    return store
+
+
+class RecordingClient:
+    """
+    Records the options of the created collections, which the local Qdrant ignores.
+    """
+
+    def __init__(self, client: QdrantClient) -> None:
+        self.client = client
+        self.created = {}
+
+    def create_collection(self, collection_name, **kwargs):
+        self.created[collection_name] = kwargs
+        return self.client.create_collection(collection_name=collection_name, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def test_create_collection_applies_the_index_tuning():
+    store = tuned_store(
+        hnsw={"m": 32, "ef_construct": 200, "search_ef": 128},
+        quantization={"type": "scalar", "always_ram": False},
+        on_disk_vectors=True,
+        on_disk_payload=True,
+    )
+    store.client = RecordingClient(store.client)
+    store.create_collection(vector_size=VECTOR_SIZE)
+
+    created = store.client.created["tuned"]
+    assert created["vectors_config"] == models.VectorParams(
+        size=VECTOR_SIZE, distance=models.Distance.COSINE, on_disk=True
+    )
+    assert created["on_disk_payload"] is True
+    assert created["hnsw_config"] == models.HnswConfigDiff(m=32, ef_construct=200)
+    assert created["quantization_config"] == models.ScalarQuantization(
+        scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=False)
+    )
+    assert created["sparse_vectors_config"] is None
+    # An existing collection is kept as it is
+    store.create_collection(vector_size=VECTOR_SIZE)
+    assert len(store.client.created) == 1
+
+
+def test_default_collection_has_no_tuning():
+    store = tuned_store()
+
+    assert store.hnsw_config() is None
+    assert store.quantization_config() is None
+    assert store.search_params() is None
+
+
+def test_search_params_rescore_quantized_vectors():
+    store = tuned_store(hnsw={"search_ef": 128}, quantization={"type": "binary", "oversampling": 3.0})
+
+    assert isinstance(store.quantization_config(), models.BinaryQuantization)
+    assert store.search_params() == models.SearchParams(
+        hnsw_ef=128, quantization=models.QuantizationSearchParams(rescore=True, oversampling=3.0)
+    )
+
+
+def test_unsupported_quantization_is_rejected():
+    with pytest.raises(ValueError):
+        tuned_store(quantization={"type": "product"}).quantization_config()
+
+
+def test_tuned_collection_is_searchable():
+    store = tuned_store(hnsw={"m": 8, "ef_construct": 50, "search_ef": 64}, quantization={"type": "scalar"})
+    store.create_collection(vector_size=VECTOR_SIZE)
+    store.bulk_insert_documents([chunk("VGS", 2022, page, 0) for page in range(20)])
+
+    documents = BusinessReportRetriever(store).retrieve("VGS 2022 page 7 chunk 0", limit=3)
+
+    assert documents[0].metadata["page"] == 7